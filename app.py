@@ -10,6 +10,7 @@ from flask import (
     redirect,
     url_for,
     request,
+    jsonify,
 )
 
 # ===== optional extensions =====
@@ -24,24 +25,6 @@ DOCS_DIR = ROOT / "docs"
 
 
 # ===== utils =====
-def group_meds_by_letter(meds):
-    groups = {}
-    for m in meds:
-        label = (m.get("label") or "").strip()
-        ch = (label[0].upper() if label else "#")
-        if not ("A" <= ch <= "Z"):
-            ch = "#"
-        groups.setdefault(ch, []).append(m)
-
-    for ch, items in groups.items():
-        items.sort(key=lambda x: x.get("label") or "")
-
-    ordered = {ch: groups[ch] for ch in sorted(k for k in groups.keys() if k != "#")}
-    if "#" in groups:
-        ordered["#"] = groups["#"]
-    return ordered
-
-
 def _pick_update_date(cli_value: str = None) -> str:
     """คืนค่า string วันที่ที่ใช้แสดงใน template"""
     if cli_value:
@@ -85,10 +68,43 @@ def create_app(testing: bool = False, update_date: str = None):
 
     # ---------- Config ----------
     app.config.from_mapping(
-        SQLALCHEMY_DATABASE_URI="sqlite:///app.db",
+        SQLALCHEMY_DATABASE_URI=os.getenv("DATABASE_URL", "sqlite:///app.db"),
         SQLALCHEMY_TRACK_MODIFICATIONS=False,
+        # ฐานข้อมูล: DB_PROFILE=production (WAL + PRAGMA ทุก connection) / default ; ดู app_shared/db_profile.py
+        DB_PROFILE=os.getenv("DB_PROFILE", "default" if testing else "production"),
+        # thread ที่รับ request ต่อ gunicorn worker (--threads) → ใช้กำหนดขนาด connection pool
+        WEB_THREADS=int(os.getenv("WEB_THREADS", 1)),
         TESTING=testing,
         SECRET_KEY="dev",
+        # access log: เขียนแบบ background batch (ปิดตอน test ให้เขียนตรง ๆ)
+        ACCESS_LOG_ASYNC=not testing,
+        ACCESS_LOG_QUEUE_SIZE=int(os.getenv("ACCESS_LOG_QUEUE_SIZE", 10000)),
+        ACCESS_LOG_BATCH_SIZE=int(os.getenv("ACCESS_LOG_BATCH_SIZE", 100)),
+        ACCESS_LOG_FLUSH_MS=int(os.getenv("ACCESS_LOG_FLUSH_MS", 500)),
+        ACCESS_LOG_OVERFLOW=os.getenv("ACCESS_LOG_OVERFLOW", "drop"),
+        # OCR: worker process แยก (แต่ละตัวถือ EasyOCR Reader 1 ตัว)
+        OCR_WORKERS=int(os.getenv("OCR_WORKERS", 1)),
+        OCR_QUEUE_SIZE=int(os.getenv("OCR_QUEUE_SIZE", 8)),
+        OCR_TIMEOUT=float(os.getenv("OCR_TIMEOUT", 30)),
+        OCR_LANGS=tuple(os.getenv("OCR_LANGS", "en,th").split(",")),
+        OCR_PREWARM=os.getenv("OCR_PREWARM", "0") == "1" and not testing,
+        # cache ผล OCR (key = sha256 ของภาพ + scale/threshold) ; OCR_CACHE_DIR = เก็บลง disk ด้วย
+        OCR_CACHE_BYTES=int(os.getenv("OCR_CACHE_BYTES", 8 * 1024 * 1024)),
+        OCR_BITMAP_CACHE_BYTES=int(os.getenv("OCR_BITMAP_CACHE_BYTES", 256 * 1024 * 1024)),
+        OCR_CACHE_DIR=os.getenv("OCR_CACHE_DIR") or None,
+        OCR_CACHE_DISK_BYTES=int(os.getenv("OCR_CACHE_DISK_BYTES", 1024 * 1024 * 1024)),
+        # compatibility จากไฟล์ snapshot (flask compat export-snapshot) แทน DB ; ว่าง = ใช้ DB
+        COMPAT_SNAPSHOT=os.getenv("COMPAT_SNAPSHOT") or None,
+        # matrix ใน DB mode: worker ตรวจว่าข้อมูลเปลี่ยนจาก process อื่นไหม (version file + count/max id) ทุกกี่วินาที
+        COMPAT_CHECK_INTERVAL=float(os.getenv("COMPAT_CHECK_INTERVAL", 2.0)),
+        COMPAT_VERSION_FILE=os.getenv("COMPAT_VERSION_FILE") or None,
+        # ETag / 304 ของหน้า GET และ API compat ; HTTP_CACHE_MAX_AGE=0 → Cache-Control: no-cache (ถามทุกครั้ง)
+        HTTP_CACHE=os.getenv("HTTP_CACHE", "1") == "1",
+        HTTP_CACHE_MAX_AGE=int(os.getenv("HTTP_CACHE_MAX_AGE", 0)),
+        # เก็บหน้าที่ render แล้ว (ต่อ process) ; PAGE_CACHE_DIR = ใช้ร่วมกันทุก gunicorn worker ผ่าน disk
+        PAGE_CACHE_BYTES=int(os.getenv("PAGE_CACHE_BYTES", 32 * 1024 * 1024)),
+        PAGE_CACHE_DIR=os.getenv("PAGE_CACHE_DIR") or None,
+        PAGE_CACHE_DISK_BYTES=int(os.getenv("PAGE_CACHE_DISK_BYTES", 256 * 1024 * 1024)),
     )
 
     # เก็บ update date “ค่าเดียว”
@@ -107,10 +123,63 @@ def create_app(testing: bool = False, update_date: str = None):
 
     # ---------- init extensions ----------
     if db is not None:
+        from app_shared.db_profile import engine_options, install_sqlite_pragmas, sqlite_pragmas
+
+        pool_size = os.getenv("DB_POOL_SIZE")
+        app.config.setdefault("SQLALCHEMY_ENGINE_OPTIONS", engine_options(
+            app.config["SQLALCHEMY_DATABASE_URI"],
+            threads=app.config["WEB_THREADS"],
+            pool_size=int(pool_size) if pool_size else None,
+        ))
         db.init_app(app)
+        with app.app_context():
+            install_sqlite_pragmas(db.engine, sqlite_pragmas(app.config["DB_PROFILE"]))
     if migrate is not None and db is not None:
         migrate.init_app(app, db)
 
+    # ---------- HTTP cache (ETag) ----------
+    # สร้างก่อน blueprint เพื่อให้ blueprint ลงทะเบียน endpoint ของตัวเองได้ ; hook ติดตั้งท้าย create_app
+    http_cache = None
+    if app.config["HTTP_CACHE"]:
+        from app_shared.http_cache import HttpCache, SourceVersion
+
+        # ทุกอย่างที่มีผลกับ HTML: template, ตารางยา, โค้ด + วันที่ที่แสดงบนหน้า
+        source = SourceVersion(
+            [ROOT / "templates", ROOT / "data", ROOT / "static" / "dose_rules.json",
+             ROOT / "routes", ROOT / "app_shared", ROOT / "app.py"],
+            extra=app.config["UPDATE_DATE"],
+        )
+        store = None
+        if app.config["PAGE_CACHE_BYTES"] > 0 or app.config["PAGE_CACHE_DIR"]:
+            from app_shared.byte_lru import ByteLRU
+
+            store = ByteLRU(app.config["PAGE_CACHE_BYTES"], directory=app.config["PAGE_CACHE_DIR"],
+                            disk_max_bytes=app.config["PAGE_CACHE_DISK_BYTES"])
+        http_cache = HttpCache(source, max_age=app.config["HTTP_CACHE_MAX_AGE"], store=store)
+        app.extensions["http_cache"] = http_cache
+
+    # ---------- blueprints ----------
+    try:
+        from routes.routes_compatibility import compat_bp
+    except Exception:
+        compat_bp = None
+    if compat_bp is not None:
+        app.register_blueprint(compat_bp)
+
+    try:
+        from routes.routes_ocr import ocr_bp
+    except Exception:
+        ocr_bp = None
+    if ocr_bp is not None:
+        app.register_blueprint(ocr_bp)
+
+    try:
+        from routes.routes_verify import verify_bp
+    except Exception:
+        verify_bp = None
+    if verify_bp is not None:
+        app.register_blueprint(verify_bp)
+
     # ==============================
     # Template globals: has_endpoint / resolve_endpoint / u
     # ==============================
@@ -151,11 +220,13 @@ def create_app(testing: bool = False, update_date: str = None):
         return render_template("pma_template.html")
 
     try:
-        from app_shared.med_catalog import build_ctx_for_admin_page
+        from app_shared.med_catalog import build_ctx_for_admin_page, catalog_version
     except Exception:
         def build_ctx_for_admin_page():
             return {}
 
+        catalog_version = None
+
     @app.route("/medication_administration")
     def medication_administration():
         ctx = build_ctx_for_admin_page()
@@ -172,6 +243,29 @@ def create_app(testing: bool = False, update_date: str = None):
         print("DEBUG /None called, Referer=", request.headers.get("Referer"))
         return redirect(url_for("index"))
 
+    # หน้าคำนวณยา (ลงทะเบียนหลัง route ของ app เพื่อให้ /calculate_pma ข้างบนยังเป็นตัวหลัก)
+    try:
+        from routes.routes_medications import meds_bp
+    except Exception:
+        meds_bp = None
+    if meds_bp is not None:
+        app.register_blueprint(meds_bp)
+
+    # หน้าคำนวณ: ผลขึ้นกับ source + query string เท่านั้น
+    # (ติดตั้ง hook หลังสุด → before_request อื่น เช่น access log ยังทำงานกับ request ที่ได้ 304)
+    if http_cache is not None:
+        for endpoint in ("index", "calculate_pma_route"):
+            http_cache.register(endpoint)
+        # รายการยาโหลดใหม่ได้ระหว่างทำงาน (MedCatalog) → ETag/key ต้องตาม stamp ของไฟล์ ไม่ใช่แค่ source ตอน start
+        http_cache.register("medication_administration", dataset=catalog_version)
+        http_cache.register_blueprint(app, "meds")
+        http_cache.init_app(app)
+
+        # hit/miss ของ cache (ต่อ worker — ดู pid)
+        @app.route("/api/cache/stats")
+        def cache_stats():
+            return jsonify(http_cache.stats())
+
     return app
 
 
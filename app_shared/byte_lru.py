@@ -0,0 +1,173 @@
+# app_shared/byte_lru.py
+"""
+ByteLRU: cache แบบ LRU จำกัดด้วย "จำนวน byte รวม" (ไม่ใช่จำนวน key) + เก็บลง disk ได้
+
+ใช้กับ OCR (key = sha256 ของภาพ + พารามิเตอร์) และ page cache ของ http_cache (key = ETag)
+— key เป็น content-addressed ทั้งคู่ → ไม่มีวัน stale
+- memory: OrderedDict ; เกิน max_bytes → ทิ้งตัวที่ใช้ล่าสุดนานที่สุด
+- disk (optional): 1 key = 1 ไฟล์ pickle ใน directory ; จำกัดด้วย disk_max_bytes (ทิ้งไฟล์ที่ mtime เก่าสุด)
+  memory miss → ลองอ่านจาก disk แล้วดันกลับเข้า memory ; เขียนแบบ tmp + os.replace (หลาย process ใช้ dir เดียวกันได้)
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import pickle
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+
+def sizeof(value) -> int:
+    """ขนาดโดยประมาณ (byte) ของค่าที่ cache: bytes/str, numpy array, list ของพวกนี้"""
+    nbytes = getattr(value, "nbytes", None)
+    if nbytes is not None:
+        return int(nbytes)
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    if isinstance(value, str):
+        return len(value.encode("utf-8"))
+    if isinstance(value, (list, tuple)):
+        return sum(sizeof(v) for v in value) + 8 * len(value)
+    return len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+class ByteLRU:
+    def __init__(self, max_bytes: int, directory=None, disk_max_bytes: int | None = None):
+        self.max_bytes = max(0, int(max_bytes))
+        self.directory = Path(directory) if directory else None
+        self.disk_max_bytes = disk_max_bytes
+
+        self._lock = threading.Lock()
+        self._items = OrderedDict()  # key → (value, size)
+        self.total = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._disk_total = 0
+        if self.directory is not None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            self._disk_total = sum(p.stat().st_size for p in self.directory.glob("*.pkl"))
+
+    # ---------- memory ----------
+    def get(self, key: str, default=None):
+        with self._lock:
+            hit = self._items.get(key)
+            if hit is not None:
+                self._items.move_to_end(key)
+                self.hits += 1
+                return hit[0]
+
+        value = self._disk_get(key)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+                return default
+            self.disk_hits += 1
+        self._put_memory(key, value)
+        return value
+
+    def put(self, key: str, value) -> None:
+        self._put_memory(key, value)
+        self._disk_put(key, value)
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            if key in self._items:
+                return True
+        return self.directory is not None and self._path(key).exists()
+
+    def _put_memory(self, key: str, value) -> None:
+        size = sizeof(value)
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self.total -= old[1]
+            if size > self.max_bytes:  # ใหญ่กว่าทั้ง cache → ไม่เก็บใน memory (disk ยังเก็บได้)
+                return
+            self._items[key] = (value, size)
+            self.total += size
+            while self.total > self.max_bytes:
+                _, (_, s) = self._items.popitem(last=False)
+                self.total -= s
+                self.evictions += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "items": len(self._items),
+                "bytes": self.total,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+    # ---------- disk ----------
+    def _path(self, key: str) -> Path:
+        return self.directory / (hashlib.sha256(key.encode("utf-8")).hexdigest() + ".pkl")
+
+    def _disk_get(self, key: str):
+        if self.directory is None:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, "rb") as fp:
+                value = pickle.load(fp)
+        except FileNotFoundError:
+            return None
+        except Exception:
+            # ไฟล์เสีย (เขียนไม่จบ / pickle ผิดรุ่น ฯลฯ) → ทิ้งไป ถือเป็น miss ไม่ให้ request ล้ม
+            try:
+                path.unlink(missing_ok=True)
+            except OSError:
+                pass
+            return None
+        try:
+            os.utime(path)  # LRU ฝั่ง disk ใช้ mtime
+        except OSError:
+            pass
+        return value
+
+    def _disk_put(self, key: str, value) -> None:
+        if self.directory is None:
+            return
+        path = self._path(key)
+        tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            old = path.stat().st_size  # เขียนทับ key เดิม → หักขนาดไฟล์เก่าออก
+        except OSError:
+            old = 0
+        try:
+            with open(tmp, "wb") as fp:
+                pickle.dump(value, fp, protocol=pickle.HIGHEST_PROTOCOL)
+            size = tmp.stat().st_size
+            os.replace(tmp, path)
+        except OSError:
+            tmp.unlink(missing_ok=True)
+            return
+        with self._lock:
+            self._disk_total += size - old
+            over = self.disk_max_bytes is not None and self._disk_total > self.disk_max_bytes
+        if over:
+            self._trim_disk()
+
+    def _trim_disk(self) -> None:
+        files = []
+        for p in self.directory.glob("*.pkl"):
+            try:
+                st = p.stat()
+            except OSError:
+                continue
+            files.append((st.st_mtime_ns, st.st_size, p))
+        total = sum(s for _, s, _ in files)
+        for _, size, p in sorted(files, key=lambda f: f[0]):
+            if total <= self.disk_max_bytes:
+                break
+            p.unlink(missing_ok=True)
+            total -= size
+        with self._lock:
+            self._disk_total = total
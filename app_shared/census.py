@@ -0,0 +1,169 @@
+# app_shared/census.py
+"""
+Census batch dosing: รายชื่อทารกทั้ง ward (CSV) → ตารางขนาดยารายคน/รายยา
+
+input (CSV header): ga_weeks, ga_days, pna_days, bw, drugs [, patient/hn/bed]
+  - drugs คั่นด้วย ; , | หรือช่องว่าง เช่น "gentamicin;vancomycin"
+output: 1 แถวต่อ (ทารก, ยา) ตาม CENSUS_FIELDS
+
+- อ่าน/คำนวณทีละ chunk แล้ว yield ทันที (ไม่ต้องรอทั้งไฟล์ → stream กลับได้เลย)
+- ภายใน chunk จัดกลุ่มตามยาแล้ว lookup แบบทีละคอลัมน์ (RuleTable.lookup_many)
+"""
+from __future__ import annotations
+
+import csv
+import io
+import json
+import math
+import re
+from itertools import islice
+from typing import Iterable, Iterator
+
+CENSUS_FIELDS = (
+    "row", "patient", "drug",
+    "ga_weeks", "ga_days", "pna_days", "bw",
+    "pma_weeks", "pma_days",
+    "dose_per_kg", "dose_mg", "dose_min_mg", "dose_max_mg",
+    "interval", "interval_hours", "bracket", "error",
+)
+
+PATIENT_KEYS = ("patient", "hn", "bed", "id", "name")
+
+# ชื่อเรียกที่ใช้ใน ward → key ของตารางใน static/dose_rules.json
+DRUG_ALIASES = {
+    "amikacin": "amikin",
+    "genta": "gentamicin",
+    "vanco": "vancomycin",
+    "mero": "meropenem",
+}
+
+_DRUG_SPLIT = re.compile(r"[;,|\s]+")
+
+
+def parse_drugs(raw) -> list:
+    names = [s.strip().lower() for s in _DRUG_SPLIT.split(raw or "") if s.strip()]
+    return [DRUG_ALIASES.get(n, n) for n in names]
+
+
+def _patient_id(row: dict):
+    for k in PATIENT_KEYS:
+        v = (row.get(k) or "").strip()
+        if v:
+            return v
+    return None
+
+
+def _has_dose(table) -> bool:
+    """ตารางที่ใช้ highlight อย่างเดียว (เช่น amikin_pma) ไม่นับเป็นยา"""
+    return any("dose_per_kg" in r or "dose_min_per_kg" in r for r in table.rows)
+
+
+def _blank(n: int, patient, drug) -> dict:
+    out = dict.fromkeys(CENSUS_FIELDS)
+    out["row"] = n
+    out["patient"] = patient
+    out["drug"] = drug
+    return out
+
+
+def _evaluate_chunk(chunk, start: int, rules: dict, pma_fn) -> list:
+    results = []
+    jobs = {}  # drug → (ตำแหน่งใน results, pma_weeks, pna_days, bw)
+
+    for n, row in enumerate(chunk, start):
+        patient = _patient_id(row)
+        drugs = parse_drugs(row.get("drugs")) or [None]
+        try:
+            ga_w = int(row["ga_weeks"])
+            ga_d = int(row.get("ga_days") or 0)
+            pna = int(row["pna_days"])
+            bw = float(row["bw"])
+            # ค่าผิดช่วงให้เป็น error ของแถว (ไม่ให้ได้ dose ≤ 0 หรือ OverflowError กลาง stream)
+            if not (math.isfinite(bw) and bw > 0):
+                raise ValueError(f"bw ต้องมากกว่า 0 (ได้ {row['bw']!r})")
+            if pna < 0:
+                raise ValueError(f"pna_days ต้องไม่ติดลบ (ได้ {pna})")
+            if not 0 <= ga_d <= 6:
+                raise ValueError(f"ga_days ต้องอยู่ระหว่าง 0–6 (ได้ {ga_d})")
+            pma_w, pma_d, _calc = pma_fn(ga_w, ga_d, pna)
+        except (KeyError, TypeError, ValueError, ArithmeticError) as e:
+            for drug in drugs:
+                out = _blank(n, patient, drug)
+                out["error"] = f"invalid patient row: {e}"
+                results.append(out)
+            continue
+
+        for drug in drugs:
+            out = _blank(n, patient, drug)
+            out.update(ga_weeks=ga_w, ga_days=ga_d, pna_days=pna, bw=bw, pma_weeks=pma_w, pma_days=pma_d)
+            table = rules.get(drug) if drug else None
+            if table is None or not _has_dose(table):
+                out["error"] = f"unknown drug: {drug}" if drug else "no drugs"
+            else:
+                cols = jobs.setdefault(drug, ([], [], [], []))
+                cols[0].append(len(results))
+                cols[1].append(pma_w)
+                cols[2].append(pna)
+                cols[3].append(bw)
+            results.append(out)
+
+    for drug, (slots, pma_col, pna_col, bw_col) in jobs.items():
+        table = rules[drug]
+        columns = {"pma_weeks": pma_col, "postnatal_days": pna_col, "bw": bw_col}
+        matched = table.lookup_many(columns)
+        dose_mg = table.dose_mg
+        for slot, rule, bw in zip(slots, matched, bw_col):
+            out = results[slot]
+            if rule is None:
+                out["error"] = "no matching bracket"
+                continue
+            per_kg = rule.get("dose_per_kg")
+            try:
+                if per_kg is not None:
+                    out["dose_per_kg"] = per_kg
+                    out["dose_mg"] = dose_mg(per_kg, bw)
+                if "dose_min_per_kg" in rule:
+                    out["dose_min_mg"] = dose_mg(rule["dose_min_per_kg"], bw)
+                    out["dose_max_mg"] = dose_mg(rule["dose_max_per_kg"], bw)
+                if any(v is not None and not math.isfinite(v)
+                       for v in (out["dose_mg"], out["dose_min_mg"], out["dose_max_mg"])):
+                    raise OverflowError
+            except ArithmeticError:  # bw ใหญ่จน mg เกินช่วงตัวเลข (floor → OverflowError, round → inf)
+                out.update(dose_per_kg=None, dose_mg=None, dose_min_mg=None, dose_max_mg=None)
+                out["error"] = "invalid patient row: dose out of range"
+                continue
+            hours = rule.get("interval_hours")
+            out["interval_hours"] = hours
+            out["interval"] = rule.get("interval") or (f"every {hours} hours" if hours else None)
+            out["bracket"] = rule.get("active_row") or rule.get("scenario")
+    return results
+
+
+def iter_census(rows: Iterable[dict], rules: dict, pma_fn, chunk_size: int = 1000) -> Iterator[dict]:
+    """rows = dict ต่อทารก (เช่นจาก csv.DictReader) → yield dict ผลลัพธ์ทีละ (ทารก, ยา)"""
+    it = iter(rows)
+    start = 1
+    while True:
+        chunk = list(islice(it, chunk_size))
+        if not chunk:
+            return
+        yield from _evaluate_chunk(chunk, start, rules, pma_fn)
+        start += len(chunk)
+
+
+def iter_csv_lines(results: Iterable[dict]) -> Iterator[str]:
+    buf = io.StringIO()
+    writer = csv.DictWriter(buf, fieldnames=CENSUS_FIELDS, lineterminator="\n")
+    writer.writeheader()
+    for out in results:
+        writer.writerow(out)
+        if buf.tell() >= 1 << 14:
+            yield buf.getvalue()
+            buf.seek(0)
+            buf.truncate()
+    yield buf.getvalue()
+
+
+def iter_ndjson_lines(results: Iterable[dict]) -> Iterator[str]:
+    for out in results:
+        yield json.dumps(out, ensure_ascii=False) + "\n"
@@ -0,0 +1,245 @@
+# app_shared/compat_matrix.py
+"""
+CompatMatrix: ตาราง compatibility ของยาทุกคู่แบบ in-memory
+
+- โหลดตาราง drug / compatibility + meta จาก seed_compatibility.json "ครั้งเดียว"
+- เก็บสถานะเป็น bytes ขนาด N×N (1 byte ต่อคู่) + map id→index และ ชื่อ→index
+- lookup คู่ยาเป็น O(1) ไม่แตะ DB
+- ตัว matrix เป็น read-only: เมื่อข้อมูลเปลี่ยนให้สร้างใหม่แล้วสลับ reference (MatrixHolder)
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+import time
+from operator import itemgetter
+
+# เรียงจาก "ปลอดภัย" -> "อันตราย" เพื่อให้ max() = worst case
+STATUS_CODES = ("C", "ND", "U", "I")
+STATUS_INDEX = {code: i for i, code in enumerate(STATUS_CODES)}
+ND = STATUS_INDEX["ND"]
+
+
+def _identity(s: str) -> str:
+    return s
+
+
+class CompatMatrix:
+    __slots__ = (
+        "version",
+        "size",
+        "ids",
+        "names",
+        "brands",
+        "id_index",
+        "name_index",
+        "by_name",
+        "status",
+        "details",
+        "meta",
+        "digest",
+    )
+
+    def __init__(self, drugs, pairs, meta_map=None, canon=None, norm=None, version: int = 0):
+        """
+        drugs    : iterable ของ (id, generic_name, brand_name)
+        pairs    : iterable ของ (drug_id, co_drug_id, code, raw_status, source, note)
+        meta_map : dict {(name_a, name_b): payload} จาก load_pair_meta() (ชื่อผ่าน norm แล้ว)
+        canon    : ฟังก์ชันทำชื่อให้เป็นมาตรฐานสำหรับ name_index (เช่น canonicalize_name)
+        norm     : ฟังก์ชันเดียวกับที่ใช้สร้าง key ของ meta_map (เช่น _norm_txt)
+        """
+        canon = canon or _identity
+        norm = norm or _identity
+
+        # index เรียงตาม id → คู่ (i < j) ตรงกับคู่ (drug_id < co_drug_id) ใน DB
+        rows = sorted(drugs, key=lambda r: r[0])
+        n = len(rows)
+
+        self.version = version
+        self.size = n
+        self.ids = tuple(r[0] for r in rows)
+        self.names = tuple(r[1] for r in rows)
+        self.brands = tuple(r[2] for r in rows)
+        self.id_index = {drug_id: i for i, drug_id in enumerate(self.ids)}
+
+        self.name_index = {}
+        for i, name in enumerate(self.names):
+            key = canon(name or "")
+            if key:
+                self.name_index.setdefault(key, i)
+
+        self.by_name = tuple(sorted(range(n), key=lambda i: (self.names[i] or "").lower()))
+
+        status = bytearray([ND]) * (n * n)
+        details = {}
+        for a_id, b_id, code, raw, source, note in pairs:
+            i = self.id_index.get(a_id)
+            j = self.id_index.get(b_id)
+            if i is None or j is None or i == j:
+                continue
+            if i > j:
+                i, j = j, i
+            s = STATUS_INDEX.get(code, ND)
+            status[i * n + j] = s
+            status[j * n + i] = s
+            details[i * n + j] = (raw, source, note)
+        self.status = bytes(status)
+        self.details = details
+
+        meta = {}
+        if meta_map:
+            by_norm = {}
+            for i, name in enumerate(self.names):
+                by_norm.setdefault(norm(name or ""), []).append(i)
+            for (a, b), payload in meta_map.items():
+                for i in by_norm.get(a, ()):
+                    for j in by_norm.get(b, ()):
+                        if i != j:
+                            meta[min(i, j) * n + max(i, j)] = payload
+        self.meta = meta
+        self.digest = self._digest()
+
+    def _digest(self) -> str:
+        """hash ของเนื้อข้อมูล (ไม่ใช่ version ที่นับใน process) → เทียบข้าม worker / snapshot ได้"""
+        h = hashlib.sha256(self.status)
+        h.update(json.dumps(
+            [self.ids, self.names, self.brands, sorted(self.details.items()), sorted(self.meta.items())],
+            ensure_ascii=False, sort_keys=True, default=str,
+        ).encode("utf-8"))
+        return h.hexdigest()
+
+    # ---------- index helpers ----------
+    def index_of(self, key):
+        """รับ id (int) หรือชื่อยา (str) → index ใน matrix (ไม่เจอคืน None)"""
+        if isinstance(key, int):
+            return self.id_index.get(key)
+        if isinstance(key, str):
+            s = key.strip()
+            if s.isdigit():
+                return self.id_index.get(int(s))
+            return self.name_index.get(s)
+        return None
+
+    def name_of(self, drug_id: int):
+        i = self.id_index.get(drug_id)
+        return None if i is None else self.names[i]
+
+    def code_at(self, i: int, j: int) -> str:
+        return STATUS_CODES[self.status[i * self.size + j]]
+
+    # ---------- pair lookup ----------
+    def pair(self, drug_a_id: int, drug_b_id: int) -> dict:
+        """
+        คืนข้อมูลคู่ยาแบบเดียวกับที่ route เคย query:
+        code / status (ค่าดิบใน DB) / source / note / meta / ชื่อยาทั้งสองตัว
+        """
+        i = self.id_index.get(drug_a_id)
+        j = self.id_index.get(drug_b_id)
+
+        out = {
+            "code": "ND",
+            "status": "ND",
+            "source": None,
+            "note": None,
+            "meta": None,
+            "drug_a_name": None if i is None else self.names[i],
+            "drug_b_name": None if j is None else self.names[j],
+        }
+        if i is None or j is None or i == j:
+            return out
+
+        k = min(i, j) * self.size + max(i, j)
+        out["code"] = STATUS_CODES[self.status[k]]
+        out["meta"] = self.meta.get(k)
+
+        detail = self.details.get(k)
+        if detail is not None:
+            raw, source, note = detail
+            out["status"] = raw
+            out["source"] = source
+            out["note"] = note
+        return out
+
+    def submatrix(self, indices) -> tuple[list, str | None]:
+        """
+        gather สถานะของยาหลายตัวในรอบเดียว (ตรวจ Y-site หลายสาย)
+
+        indices : list ของ index (ไม่ซ้ำกัน)
+        คืน (grid, worst) : grid = list k×k ของ code (แนวทแยงเป็น None)
+                            worst = code ที่แย่ที่สุดในทุกคู่ (k < 2 คืน None)
+        """
+        k = len(indices)
+        if k == 0:
+            return [], None
+
+        n = self.size
+        pick = itemgetter(*indices)
+        status = self.status
+        if k == 1:
+            rows = [(pick(status[indices[0] * n:(indices[0] + 1) * n]),)]
+        else:
+            rows = [pick(status[i * n:(i + 1) * n]) for i in indices]
+
+        worst = -1
+        grid = []
+        for r, row in enumerate(rows):
+            off_diag = row[:r] + row[r + 1:]
+            if off_diag:
+                worst = max(worst, max(off_diag))
+            codes = [STATUS_CODES[v] for v in row]
+            codes[r] = None
+            grid.append(codes)
+
+        return grid, (STATUS_CODES[worst] if worst >= 0 else None)
+
+
+class MatrixHolder:
+    """
+    ถือ CompatMatrix ตัวปัจจุบันของแอป
+
+    - reader อ่าน reference ครั้งเดียวแล้วใช้ต่อ (ไม่ต้อง lock)
+    - เมื่อ invalidate() แล้ว คนถัดไปที่ get() จะ build ตัวใหม่แล้วสลับ reference ทีเดียว
+    - stamp (optional): ฟังก์ชันคืนค่าที่เปลี่ยนเมื่อข้อมูลเปลี่ยน "จาก process อื่น" (เช่น CLI import)
+      เรียกไม่เกิน 1 ครั้งต่อ check_interval วินาที ; ค่าไม่ตรงกับตอน build → build ใหม่
+    """
+
+    def __init__(self, stamp=None, check_interval: float = 2.0):
+        self._matrix = None
+        self._stale = True
+        self._version = 0
+        self._lock = threading.Lock()
+        self._stamp_fn = stamp
+        self._stamp = None
+        self._checked_at = 0.0
+        self.check_interval = check_interval
+
+    def _changed_elsewhere(self) -> bool:
+        if self._stamp_fn is None or time.monotonic() - self._checked_at < self.check_interval:
+            return False
+        self._checked_at = time.monotonic()
+        return self._stamp_fn() != self._stamp
+
+    def get(self, loader) -> CompatMatrix:
+        m = self._matrix
+        if m is not None and not self._stale and not self._changed_elsewhere():
+            return m
+
+        with self._lock:
+            if self._matrix is None or self._stale or (self._stamp_fn is not None and self._stamp_fn() != self._stamp):
+                # เคลียร์ก่อน build: ถ้ามี invalidate ระหว่าง build จะ build ใหม่รอบหน้า
+                # stamp อ่าน "ก่อน" โหลด → ข้อมูลที่เปลี่ยนระหว่าง build จะถูกเห็นในรอบตรวจถัดไป
+                self._stale = False
+                self._version += 1
+                try:
+                    if self._stamp_fn is not None:
+                        self._stamp = self._stamp_fn()
+                        self._checked_at = time.monotonic()
+                    self._matrix = loader(version=self._version)
+                except Exception:
+                    self._stale = True
+                    raise
+            return self._matrix
+
+    def invalidate(self) -> None:
+        self._stale = True
@@ -0,0 +1,281 @@
+# app_shared/compat_snapshot.py
+"""
+CompatSnapshot: CompatMatrix ที่อ่านจากไฟล์ binary แบบ mmap (read-only, ไม่ต้องมี DB)
+
+- `flask compat export-snapshot` เขียนไฟล์จาก CompatMatrix ที่ build จาก DB (write_snapshot)
+- ทุก gunicorn worker mmap ไฟล์เดียวกัน → ใช้ page cache ชุดเดียว ; เปิดไฟล์ = อ่าน header เท่านั้น
+- ตาราง id / index ชื่อ / สถานะคู่ยา เป็น memoryview บน mmap (ไม่ copy) ; ค้นด้วย bisect
+- interface เดียวกับ CompatMatrix (pair / index_of / name_of / submatrix / ids / names / by_name)
+
+รูปแบบไฟล์ (little-endian, แต่ละ section align 8 byte):
+  header  : MAGIC, FORMAT_VERSION, version, size, digest (sha256 ของข้อมูล = CompatMatrix.digest) + ตาราง (offset, length) ของทุก section
+  strings : ทุกข้อความ (ชื่อยา, status ดิบ, source, note, meta เป็น JSON) เก็บครั้งเดียว อ้างด้วยเลข
+"""
+from __future__ import annotations
+
+import json
+import mmap
+import os
+import struct
+import tempfile
+import time
+from bisect import bisect_left
+from pathlib import Path
+
+from app_shared.compat_matrix import STATUS_CODES, CompatMatrix
+
+MAGIC = b"NMCSNAP\0"
+FORMAT_VERSION = 2
+NONE = 0xFFFFFFFF  # string id ของ None
+
+# ชื่อ section ตามลำดับในไฟล์ → format ของ memoryview.cast
+SECTIONS = (
+    ("ids", "q"),           # id ยา เรียงจากน้อยไปมาก (index = ตำแหน่ง)
+    ("names", "I"),         # string id ของ generic_name
+    ("brands", "I"),        # string id ของ brand_name
+    ("by_name", "I"),       # index เรียงตามชื่อ (lower)
+    ("name_keys", "I"),     # string id ของชื่อ canonical (เรียงตามข้อความ)
+    ("name_vals", "I"),     # index ของชื่อ canonical แต่ละตัว
+    ("status", "B"),        # N×N byte (index ใน STATUS_CODES)
+    ("detail_keys", "Q"),   # k = i*N + j (i < j) ของคู่ที่มีแถวใน DB
+    ("detail_vals", "I"),   # (raw, source, note) ต่อ k
+    ("meta_keys", "Q"),
+    ("meta_vals", "I"),     # string id ของ meta (JSON)
+    ("str_offsets", "Q"),   # ตำแหน่งเริ่มของแต่ละข้อความ (+ ตัวปิดท้าย)
+    ("str_blob", "B"),      # UTF-8 ต่อกัน
+)
+
+_HEAD = struct.Struct("<8sIqI32s")
+_SECTION = struct.Struct("<QQ")
+HEADER_SIZE = _HEAD.size + _SECTION.size * len(SECTIONS)
+
+
+class SnapshotError(ValueError):
+    pass
+
+
+# ================== writer ==================
+
+
+def _pack(fmt: str, values) -> bytes:
+    values = list(values)
+    return struct.pack(f"<{len(values)}{fmt}", *values)
+
+
+def write_snapshot(matrix: CompatMatrix, path, version: int | None = None) -> dict:
+    """
+    เขียน matrix ลงไฟล์ (เขียนไฟล์ชั่วคราวแล้ว os.replace → worker ที่ mmap ไฟล์เดิมอยู่ยังอ่านได้ปกติ)
+    คืนสถิติ {"path", "version", "drugs", "pairs", "bytes"}
+    """
+    strings = []
+    string_ids = {}
+
+    def sid(s) -> int:
+        if s is None:
+            return NONE
+        i = string_ids.get(s)
+        if i is None:
+            i = string_ids[s] = len(strings)
+            strings.append(s)
+        return i
+
+    n = matrix.size
+    name_keys = sorted(matrix.name_index)
+    details = sorted(matrix.details.items())
+    meta = sorted(matrix.meta.items())
+
+    blob = bytearray()
+    body = {
+        "ids": _pack("q", matrix.ids),
+        "names": _pack("I", (sid(s) for s in matrix.names)),
+        "brands": _pack("I", (sid(s) for s in matrix.brands)),
+        "by_name": _pack("I", matrix.by_name),
+        "name_keys": _pack("I", (sid(k) for k in name_keys)),
+        "name_vals": _pack("I", (matrix.name_index[k] for k in name_keys)),
+        "status": matrix.status,
+        "detail_keys": _pack("Q", (k for k, _ in details)),
+        "detail_vals": _pack("I", (sid(v) for _, d in details for v in d)),
+        "meta_keys": _pack("Q", (k for k, _ in meta)),
+        "meta_vals": _pack("I", (sid(json.dumps(p, ensure_ascii=False, sort_keys=True)) for _, p in meta)),
+    }
+    offsets = []
+    for s in strings:
+        offsets.append(len(blob))
+        blob += str(s).encode("utf-8")
+    offsets.append(len(blob))
+    body["str_offsets"] = _pack("Q", offsets)
+    body["str_blob"] = bytes(blob)
+
+    version = int(time.time()) if version is None else int(version)
+    table = []
+    chunks = []
+    pos = HEADER_SIZE
+    for name, _fmt in SECTIONS:
+        data = body[name]
+        pad = -pos % 8
+        chunks.append(b"\0" * pad + data)
+        pos += pad
+        table.append((pos, len(data)))
+        pos += len(data)
+
+    header = _HEAD.pack(MAGIC, FORMAT_VERSION, version, n, bytes.fromhex(matrix.digest)) + b"".join(_SECTION.pack(*t) for t in table)
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=path.name + ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(header)
+            for chunk in chunks:
+                f.write(chunk)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+    return {"path": str(path), "version": version, "drugs": n, "pairs": len(details), "bytes": pos}
+
+
+# ================== reader ==================
+
+
+class _Strings:
+    """ลำดับของข้อความ (ตาม string id ในตารางหนึ่ง) ; decode ตอนเข้าถึงเท่านั้น"""
+
+    __slots__ = ("_ids", "_text")
+
+    def __init__(self, ids, text):
+        self._ids = ids
+        self._text = text
+
+    def __len__(self):
+        return len(self._ids)
+
+    def __getitem__(self, i):
+        return self._text(self._ids[i])
+
+
+class CompatSnapshot:
+    __slots__ = (
+        "path",
+        "version",
+        "size",
+        "digest",
+        "ids",
+        "names",
+        "brands",
+        "by_name",
+        "status",
+        "_mm",
+        "_view",
+        "_sections",
+        "_name_keys",
+    )
+
+    def __init__(self, path):
+        self.path = str(path)
+        with open(self.path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = view = memoryview(self._mm)
+
+        if len(view) < HEADER_SIZE:
+            self.close()
+            raise SnapshotError(f"{self.path}: ไม่ใช่ไฟล์ snapshot (สั้นเกินไป)")
+        magic, fmt, version, size, digest = _HEAD.unpack_from(view, 0)
+        if magic != MAGIC or fmt != FORMAT_VERSION:
+            self.close()
+            raise SnapshotError(f"{self.path}: ไม่ใช่ snapshot รุ่น {FORMAT_VERSION} (magic={magic!r}, format={fmt})")
+
+        self._sections = sections = {}
+        for i, (name, code) in enumerate(SECTIONS):
+            off, length = _SECTION.unpack_from(view, _HEAD.size + i * _SECTION.size)
+            if off + length > len(view):
+                self.close()
+                raise SnapshotError(f"{self.path}: section {name} เกินขนาดไฟล์ (ไฟล์ไม่ครบ?)")
+            sections[name] = view[off:off + length].cast(code)
+
+        self.version = version
+        self.size = size
+        self.digest = digest.hex()
+        self.ids = sections["ids"]
+        self.names = _Strings(sections["names"], self._text)
+        self.brands = _Strings(sections["brands"], self._text)
+        self.by_name = sections["by_name"]
+        self.status = sections["status"]
+        self._name_keys = _Strings(sections["name_keys"], self._text)
+
+    def close(self) -> None:
+        # ต้องปล่อย memoryview ทั้งหมดก่อนปิด mmap
+        for mv in getattr(self, "_sections", {}).values():
+            mv.release()
+        self._sections = {}
+        self._view.release()
+        self._mm.close()
+
+    # ---------- strings ----------
+    def _text(self, sid: int):
+        if sid == NONE:
+            return None
+        offsets = self._sections["str_offsets"]
+        return str(self._sections["str_blob"][offsets[sid]:offsets[sid + 1]], "utf-8")
+
+    @staticmethod
+    def _find(keys, key):
+        i = bisect_left(keys, key)
+        return i if i < len(keys) and keys[i] == key else None
+
+    # ---------- index helpers (เหมือน CompatMatrix) ----------
+    def _id_to_index(self, drug_id: int):
+        return self._find(self.ids, drug_id)
+
+    def index_of(self, key):
+        if isinstance(key, int):
+            return self._id_to_index(key)
+        if isinstance(key, str):
+            s = key.strip()
+            if s.isdigit():
+                return self._id_to_index(int(s))
+            pos = self._find(self._name_keys, s)
+            return None if pos is None else self._sections["name_vals"][pos]
+        return None
+
+    def name_of(self, drug_id: int):
+        i = self._id_to_index(drug_id)
+        return None if i is None else self.names[i]
+
+    def code_at(self, i: int, j: int) -> str:
+        return STATUS_CODES[self.status[i * self.size + j]]
+
+    # ---------- pair lookup ----------
+    def pair(self, drug_a_id: int, drug_b_id: int) -> dict:
+        i = self._id_to_index(drug_a_id)
+        j = self._id_to_index(drug_b_id)
+
+        out = {
+            "code": "ND",
+            "status": "ND",
+            "source": None,
+            "note": None,
+            "meta": None,
+            "drug_a_name": None if i is None else self.names[i],
+            "drug_b_name": None if j is None else self.names[j],
+        }
+        if i is None or j is None or i == j:
+            return out
+
+        k = min(i, j) * self.size + max(i, j)
+        out["code"] = STATUS_CODES[self.status[k]]
+
+        pos = self._find(self._sections["meta_keys"], k)
+        if pos is not None:
+            out["meta"] = json.loads(self._text(self._sections["meta_vals"][pos]))
+
+        pos = self._find(self._sections["detail_keys"], k)
+        if pos is not None:
+            vals = self._sections["detail_vals"]
+            out["status"], out["source"], out["note"] = (self._text(vals[pos * 3 + c]) for c in range(3))
+        return out
+
+    # status เป็น memoryview ของ byte → ใช้โค้ดเดียวกับ CompatMatrix ได้ตรง ๆ
+    submatrix = CompatMatrix.submatrix
+
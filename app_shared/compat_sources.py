@@ -0,0 +1,141 @@
+# app_shared/compat_sources.py
+"""
+ตัวอ่านไฟล์ข้อมูล compatibility แบบ streaming (ใช้ร่วมกันทุก importer / builder)
+
+- JSON: อ่าน array ทีละ object ด้วย raw_decode (ไม่โหลดทั้งไฟล์เข้าหน่วยความจำ)
+- CSV : csv.DictReader (เช่น data/compatibility.csv, compatibility_unknown.csv)
+- คืนค่าเป็น CompatRecord(drug_a, drug_b, status, source, note, raw) ที่ normalize key แล้ว
+  (raw = dict ต้นฉบับ เผื่อ builder ต้องใช้ field อื่น เช่น summary_th)
+"""
+from __future__ import annotations
+
+import csv
+import json
+from pathlib import Path
+from typing import Iterator, NamedTuple
+
+# key ที่ loader เดิมรองรับอยู่แล้ว (เรียงตามลำดับความสำคัญ)
+DRUG_A_KEYS = ("drug_a", "drug", "Drug", "A")
+DRUG_B_KEYS = ("drug_b", "co_drug", "Co_drug", "B")
+STATUS_KEYS = ("status",)
+SOURCE_KEYS = ("source", "reference")
+NOTE_KEYS = ("note", "note_th")
+
+_WS = " \t\r\n"
+
+
+class CompatRecord(NamedTuple):
+    drug_a: str
+    drug_b: str
+    status: str
+    source: str | None
+    note: str | None
+    raw: dict
+
+
+def _first(row: dict, keys) -> str | None:
+    """ดึงค่าตาม key แรกที่มีค่าใน row"""
+    for k in keys:
+        v = row.get(k)
+        if v not in (None, ""):
+            s = str(v).strip()
+            if s:
+                return s
+    return None
+
+
+def normalize_row(row: dict) -> CompatRecord:
+    return CompatRecord(
+        drug_a=_first(row, DRUG_A_KEYS) or "",
+        drug_b=_first(row, DRUG_B_KEYS) or "",
+        status=_first(row, STATUS_KEYS) or "",
+        source=_first(row, SOURCE_KEYS),
+        note=_first(row, NOTE_KEYS),
+        raw=row,
+    )
+
+
+def iter_json_array(fp, chunk_size: int = 1 << 16) -> Iterator:
+    """
+    parse JSON array ทีละ element จาก file object (text mode)
+    หน่วยความจำที่ใช้ ~ chunk_size + ขนาด element ที่ใหญ่ที่สุด
+    """
+    decoder = json.JSONDecoder()
+    buf = ""
+    pos = 0
+    eof = False
+
+    def fill() -> bool:
+        nonlocal buf, pos, eof
+        if eof:
+            return False
+        chunk = fp.read(chunk_size)
+        if not chunk:
+            eof = True
+            return False
+        buf = buf[pos:] + chunk
+        pos = 0
+        return True
+
+    def skip_ws():
+        nonlocal pos
+        while True:
+            while pos < len(buf) and buf[pos] in _WS:
+                pos += 1
+            if pos < len(buf) or not fill():
+                return
+
+    skip_ws()
+    if pos >= len(buf) or buf[pos] != "[":
+        raise ValueError("ไฟล์ JSON ต้องเป็น list ของ objects (rows)")
+    pos += 1
+
+    first = True
+    while True:
+        skip_ws()
+        if pos >= len(buf):
+            raise ValueError("JSON array ไม่สมบูรณ์ (ไม่พบ ']')")
+        if buf[pos] == "]":
+            return
+        if not first:
+            if buf[pos] != ",":
+                raise ValueError(f"JSON ผิดรูปแบบ: คาดว่าเป็น ',' แต่พบ {buf[pos]!r}")
+            pos += 1
+            skip_ws()
+
+        while True:
+            try:
+                value, end = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                # element ยังอ่านมาไม่ครบ → เติม buffer แล้วลองใหม่
+                if not fill():
+                    raise
+                continue
+            # ตัวเลขที่อยู่ท้าย buffer พอดีอาจถูกตัดกลางตัว
+            if end == len(buf) and not eof and not isinstance(value, (dict, list, str)):
+                if fill():
+                    continue
+            break
+
+        pos = end
+        first = False
+        yield value
+
+
+def iter_rows(path) -> Iterator[dict]:
+    """อ่านไฟล์ .json (array) หรือ .csv แล้วคืน dict ทีละแถว"""
+    path = Path(path)
+    if path.suffix.lower() == ".csv":
+        with path.open(newline="", encoding="utf-8-sig") as f:
+            yield from csv.DictReader(f)
+        return
+
+    with path.open(encoding="utf-8") as f:
+        for item in iter_json_array(f):
+            if isinstance(item, dict):
+                yield item
+
+
+def iter_compat_records(path) -> Iterator[CompatRecord]:
+    for row in iter_rows(path):
+        yield normalize_row(row)
@@ -0,0 +1,82 @@
+# app_shared/db_profile.py
+"""
+โปรไฟล์ฐานข้อมูล (SQLite) สำหรับ create_app
+
+- PRAGMA ถูกตั้งทุก connection ผ่าน engine event "connect" (ค่า PRAGMA ส่วนใหญ่เป็นของ connection ไม่ใช่ของไฟล์)
+  production: WAL (writer ไม่บล็อก reader — log_request เขียนขณะหน้า compat อ่านได้),
+              synchronous=NORMAL (ปลอดภัยใน WAL), busy_timeout, cache/mmap, temp_store=MEMORY
+- engine_options(): ขนาด pool ต่อ process ของ gunicorn = thread ที่รับ request + thread เขียน access log
+"""
+from __future__ import annotations
+
+import re
+
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+SQLITE_PROFILES = {
+    # SQLAlchemy/SQLite ค่าเดิม (rollback journal) — ใช้ตอน test
+    "default": {},
+    "production": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "busy_timeout": 5000,           # ms ; รอ lock แทนที่จะ "database is locked" ทันที
+        "cache_size": -32768,           # ค่าติดลบ = KiB → 32 MiB ต่อ connection
+        "mmap_size": 128 * 1024 * 1024,
+        "temp_store": "MEMORY",
+    },
+}
+
+_PRAGMA_NAMES = {"journal_mode", "synchronous", "busy_timeout", "cache_size", "mmap_size", "temp_store",
+                 "foreign_keys", "wal_autocheckpoint"}
+_PRAGMA_VALUE = re.compile(r"^-?[A-Za-z0-9_]+$")
+
+
+def sqlite_pragmas(profile: str, overrides: dict | None = None) -> dict:
+    if profile not in SQLITE_PROFILES:
+        raise ValueError(f"DB_PROFILE ต้องเป็นหนึ่งใน {sorted(SQLITE_PROFILES)} (ได้ {profile!r})")
+    pragmas = {**SQLITE_PROFILES[profile], **(overrides or {})}
+    for name, value in pragmas.items():
+        # ค่ามาจาก env/config แล้วต่อเป็น SQL ตรง ๆ → รับเฉพาะชื่อ/ค่าที่ปลอดภัย
+        if name not in _PRAGMA_NAMES or not _PRAGMA_VALUE.match(str(value)):
+            raise ValueError(f"PRAGMA ไม่รองรับ: {name}={value!r}")
+    return pragmas
+
+
+def is_sqlite(uri: str) -> bool:
+    return make_url(uri).get_backend_name() == "sqlite"
+
+
+def _is_memory(uri: str) -> bool:
+    return make_url(uri).database in (None, "", ":memory:")
+
+
+def engine_options(uri: str, threads: int = 1, pool_size: int | None = None,
+                   max_overflow: int | None = None, pool_timeout: float = 10.0) -> dict:
+    """
+    SQLALCHEMY_ENGINE_OPTIONS ; gunicorn fork แล้วแต่ละ worker มี pool ของตัวเอง
+    → pool_size = thread ที่รับ request + 1 (access log writer) ; overflow เผื่อ request ที่ซ้อนกันชั่วคราว
+    SQLite :memory: ใช้ pool พิเศษของ SQLAlchemy (ไม่มี pool_size) → ไม่ตั้งอะไร
+    """
+    if is_sqlite(uri) and _is_memory(uri):
+        return {}
+    threads = max(1, int(threads))
+    return {
+        "pool_size": pool_size if pool_size is not None else threads + 1,
+        "max_overflow": max_overflow if max_overflow is not None else threads,
+        "pool_timeout": pool_timeout,
+    }
+
+
+def install_sqlite_pragmas(engine, pragmas: dict) -> None:
+    if not pragmas or engine.dialect.name != "sqlite":
+        return
+
+    @event.listens_for(engine, "connect")
+    def _set_sqlite_pragmas(dbapi_conn, _record):
+        cur = dbapi_conn.cursor()
+        try:
+            for name, value in pragmas.items():
+                cur.execute(f"PRAGMA {name}={value}")
+        finally:
+            cur.close()
@@ -0,0 +1,202 @@
+# app_shared/dose_formulas.py
+"""
+Registry สูตรคำนวณยา (mg → mL → 3X/6X) แบบ data-driven
+
+- ข้อมูลอยู่ใน data/dose_formulas.json (stock mg/mL, ความเข้มข้นเป้าหมาย, ตัวคูณที่อนุญาต,
+  target volume, ข้อความ content_extra ของ 3X/6X)
+- โหลดครั้งเดียวตอน import แล้ว compile เป็น DoseFormula (ค่าคงที่ทุกตัวแปลงไว้ล่วงหน้า)
+- DoseFormula.evaluate() คืน dict ที่ key ตรงกับตัวแปรใน template ของยานั้น ๆ
+  (result_ml / result_ml_1 / calculated_ml / final_result / diluent_to_add ...)
+"""
+from __future__ import annotations
+
+import json
+import math
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+DEFAULT_PATH = BASE_DIR / "data" / "dose_formulas.json"
+
+# ตัวแปรที่ทุกหน้ามี (default None กัน UndefinedError)
+BASE_KEYS = ("dose", "multiplication", "error")
+# ตัวแปรที่เป็นข้อความอธิบาย (API ไม่ส่งกลับ ถ้าไม่ขอ)
+TEXT_KEYS = ("content_extra", "msg_block")
+
+
+def _to_float(val, name):
+    if val is None:
+        raise ValueError(f"missing {name}")
+    s = str(val).strip()
+    if s == "":
+        raise ValueError(f"empty {name}")
+    v = float(s)
+    if not math.isfinite(v):  # "inf" / "nan" / "1e400" → int(round()) ล้ม, JSON ไม่ถูกต้อง
+        raise ValueError(f"{name} ต้องเป็นตัวเลขจำกัด")
+    return v
+
+
+class DoseOutput:
+    """
+    ผลลัพธ์ 1 ค่า: value = (dose × num) ÷ den แล้วปัด 2 ตำแหน่ง
+    (คงลำดับ คูณก่อนหาร ให้ปัดเศษได้ตรงกับสูตรเดิมของแต่ละหน้า)
+    """
+
+    __slots__ = ("name", "num", "den", "by_concentration", "final", "as_int")
+
+    def __init__(self, spec: dict):
+        self.name = spec["name"]
+        self.final = spec.get("final")
+        self.as_int = spec.get("round") == "int"
+        self.by_concentration = False
+
+        if "stock_mg" in spec:
+            # stock X mg / Y mL → ml = mg × Y ÷ X
+            self.num, self.den = float(spec["stock_ml"]), float(spec["stock_mg"])
+        elif spec.get("mg_per_ml") == "concentration":
+            # ความเข้มข้นเลือกจากฟอร์ม (เช่น vancomycin 5/10 mg/mL)
+            self.num, self.den = 1.0, None
+            self.by_concentration = True
+        elif "mg_per_ml" in spec:
+            self.num, self.den = 1.0, float(spec["mg_per_ml"])
+        elif "factor" in spec:
+            self.num, self.den = float(spec["factor"]), 1.0
+        else:
+            raise ValueError(f"output {self.name!r}: ต้องมี stock_mg/stock_ml, mg_per_ml หรือ factor")
+
+    def value(self, dose: float, concentration=None):
+        den = float(concentration) if self.by_concentration else self.den
+        v = (dose * self.num) / den
+        if not math.isfinite(v):
+            raise ValueError(f"{self.name}: ผลคำนวณเกินช่วงตัวเลข")
+        return int(round(v)) if self.as_int else round(v, 2)
+
+
+class DoseFormula:
+    __slots__ = (
+        "key", "paths", "endpoint", "template", "outputs",
+        "multipliers", "concentrations", "target_total", "content",
+        "date_key", "context", "blank",
+    )
+
+    def __init__(self, key: str, spec: dict, content_sets: dict):
+        self.key = key
+        self.paths = tuple(spec.get("paths") or (f"/{key}",))
+        self.endpoint = spec.get("endpoint") or f"{key}_route"
+        self.template = spec.get("template") or f"{key}.html"
+        self.outputs = tuple(DoseOutput(o) for o in spec["outputs"])
+
+        # None = คำนวณรอบเดียว, "any" = ตัวคูณอิสระ (float > 0), list = เฉพาะค่าที่กำหนด (int)
+        mult = spec.get("multipliers")
+        self.multipliers = mult if mult in (None, "any") else frozenset(int(m) for m in mult)
+        self.concentrations = (
+            frozenset(int(c) for c in spec["concentrations"]) if spec.get("concentrations") else None
+        )
+        self.target_total = {int(k): float(v) for k, v in (spec.get("target_total") or {}).items()}
+
+        # ข้อความ 3X/6X: resolve ชื่อชุดข้อความเป็น dict {mult: entry} ไว้เลย
+        content = spec.get("content")
+        if content is not None and content not in content_sets:
+            raise ValueError(f"{key}: ไม่พบ content set {content!r}")
+        self.content = {int(m): e for m, e in content_sets[content].items()} if content else {}
+
+        self.date_key = spec.get("date_key")
+        self.context = dict(spec.get("context") or {})
+        self.blank = self._blank_context()
+
+    def _blank_context(self) -> dict:
+        ctx = dict.fromkeys(BASE_KEYS)
+        for out in self.outputs:
+            ctx[out.name] = None
+            if out.final and self.multipliers is not None:
+                ctx[out.final] = None
+        if self.concentrations:
+            ctx["concentration"] = None
+        if self.content:
+            ctx["content_extra"] = None
+            if any("msg_block" in e for e in self.content.values()):
+                ctx["msg_block"] = None
+        if self.target_total:
+            ctx["target_total"] = None
+            ctx["diluent_to_add"] = None
+        return ctx
+
+    def coerce_multiplication(self, raw):
+        if self.multipliers is None:
+            raise ValueError(f"{self.key} ไม่มีขั้นตอนตัวคูณ")
+        if self.multipliers == "any":
+            mult = _to_float(raw, "multiplication")
+            if mult <= 0:
+                raise ValueError("multiplication ต้องมากกว่า 0")
+            return mult
+        mult = int(_to_float(raw, "multiplication"))
+        if mult not in self.multipliers:
+            allowed = " หรือ ".join(str(m) for m in sorted(self.multipliers))
+            raise ValueError(f"multiplication ต้องเป็น {allowed}")
+        return mult
+
+    @staticmethod
+    def parse_dose(raw) -> float:
+        dose = _to_float(raw, "dose")
+        if dose <= 0:
+            raise ValueError("ขนาดยาต้องมากกว่า 0")
+        return dose
+
+    def evaluate(self, dose, multiplication=None, concentration=None) -> dict:
+        """คืน dict ตัวแปรผลลัพธ์ (ชื่อเดียวกับ template) — ValueError ถ้า input ไม่ถูกต้อง"""
+        dose = self.parse_dose(dose)
+
+        res = dict(self.blank)
+        res["dose"] = dose
+
+        if self.concentrations:
+            concentration = int(_to_float(concentration, "concentration"))
+            if concentration not in self.concentrations:
+                allowed = " หรือ ".join(f"{c} mg/mL" for c in sorted(self.concentrations))
+                raise ValueError(f"เลือกระดับความเข้มข้นได้เฉพาะ {allowed}")
+            res["concentration"] = concentration
+
+        for out in self.outputs:
+            res[out.name] = out.value(dose, concentration)
+
+        if multiplication is None or multiplication == "":
+            return res
+
+        mult = self.coerce_multiplication(multiplication)
+        res["multiplication"] = mult
+        first_final = None
+        for out in self.outputs:
+            if out.final:
+                res[out.final] = round(res[out.name] * mult, 2)
+                if first_final is None:
+                    first_final = res[out.final]
+
+        entry = self.content.get(mult)
+        if entry:
+            res["content_extra"] = entry["content_extra"]
+            if "msg_block" in entry:
+                res["msg_block"] = entry["msg_block"]
+
+        total = self.target_total.get(mult)
+        if total is not None and first_final is not None:
+            need = total - first_final
+            res["target_total"] = total
+            res["diluent_to_add"] = round(need, 2) if need > 0 else 0.0
+        return res
+
+
+def load_dose_formulas(path=DEFAULT_PATH) -> dict:
+    """อ่าน registry แล้ว compile เป็น {key: DoseFormula} (เรียงตามไฟล์)"""
+    with open(path, encoding="utf-8") as f:
+        doc = json.load(f)
+    sets = doc.get("content_sets") or {}
+    return {key: DoseFormula(key, spec, sets) for key, spec in doc["formulas"].items()}
+
+
+def build_lookup(formulas: dict) -> dict:
+    """ชื่อที่ API รับได้ → DoseFormula (key, endpoint, path; ไม่สนตัวพิมพ์ และ '-' = '_')"""
+    lookup = {}
+    for key, f in formulas.items():
+        names = [key, f.endpoint] + [p.strip("/") for p in f.paths]
+        for n in names:
+            lookup.setdefault(n.lower().replace("-", "_"), f)
+    return lookup
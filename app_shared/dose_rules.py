@@ -0,0 +1,116 @@
+# app_shared/dose_rules.py
+"""
+ตารางเลือกขนาดยา/ความถี่ตามช่วง PMA (สัปดาห์) / postnatal age (วัน) / น้ำหนัก (kg)
+
+- ต้นฉบับอยู่ที่ static/dose_rules.json (ไฟล์เดียวกับที่ static/dose_page.js โหลดไปใช้ฝั่ง client)
+- ตอนโหลด compile แต่ละตารางเป็น
+    bounds[axis] = จุดแบ่งช่วงที่เรียงแล้ว
+    cells        = grid แบน ๆ ของทุกช่องย่อย → index ของแถวที่ครอบคลุม (-1 = ไม่มี)
+  lookup = bisect 1 ครั้งต่อแกน + คำนวณ index ใน grid (ไม่ต้องไล่ if/elif)
+- แถวที่อยู่ก่อนมีสิทธิ์ก่อน (เหมือน if/elif เดิม) ถ้าช่วงทับกัน
+"""
+from __future__ import annotations
+
+import json
+import math
+from bisect import bisect_left, bisect_right
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+DEFAULT_PATH = BASE_DIR / "static" / "dose_rules.json"
+
+
+class RuleTable:
+    __slots__ = ("key", "axes", "bounds", "finders", "strides", "cells", "rows", "dose_round")
+
+    def __init__(self, key: str, spec: dict):
+        self.key = key
+        self.axes = tuple(a["name"] for a in spec["axes"])
+        closed = [a.get("closed", "left") for a in spec["axes"]]
+        for c in closed:
+            if c not in ("left", "right"):
+                raise ValueError(f"{key}: closed ต้องเป็น 'left' หรือ 'right' (ได้ {c!r})")
+        self.dose_round = spec.get("dose_round", "round2")
+
+        # ค่าผลลัพธ์ของแต่ละแถว (ตัด key ของแกนออก)
+        self.rows = tuple(
+            {k: v for k, v in row.items() if k not in self.axes} for row in spec["rows"]
+        )
+
+        bounds = []
+        for name in self.axes:
+            pts = set()
+            for row in spec["rows"]:
+                lo, hi = row.get(name) or (None, None)
+                pts.update(p for p in (lo, hi) if p is not None)
+            bounds.append(tuple(sorted(float(p) for p in pts)))
+        self.bounds = tuple(bounds)
+
+        # [lo, hi) → bisect_right ; (lo, hi] → bisect_left  (ได้ index ช่องย่อย 0..len(bounds))
+        self.finders = tuple(bisect_right if c == "left" else bisect_left for c in closed)
+
+        sizes = [len(b) + 1 for b in self.bounds]
+        strides = []
+        acc = 1
+        for n in reversed(sizes):
+            strides.append(acc)
+            acc *= n
+        self.strides = tuple(reversed(strides))
+
+        cells = [-1] * acc
+        for r, row in enumerate(spec["rows"]):
+            spans = []
+            for name, b in zip(self.axes, self.bounds):
+                lo, hi = row.get(name) or (None, None)
+                first = 0 if lo is None else b.index(float(lo)) + 1
+                last = len(b) if hi is None else b.index(float(hi))
+                spans.append(range(first, last + 1))
+            for flat in self._flat_indices(spans):
+                if cells[flat] < 0:
+                    cells[flat] = r
+        self.cells = tuple(cells)
+
+    def _flat_indices(self, spans):
+        flats = [0]
+        for span, stride in zip(spans, self.strides):
+            flats = [f + i * stride for f in flats for i in span]
+        return flats
+
+    def row_index(self, values) -> int:
+        """values เรียงตาม self.axes → index แถว หรือ -1"""
+        flat = 0
+        for v, b, find, stride in zip(values, self.bounds, self.finders, self.strides):
+            if v is None:
+                return -1
+            flat += find(b, v) * stride
+        return self.cells[flat]
+
+    def lookup(self, **values) -> dict | None:
+        """lookup(pma_weeks=30, postnatal_days=5) → dict ของแถวที่ตรง (หรือ None)"""
+        r = self.row_index([values.get(name) for name in self.axes])
+        return None if r < 0 else self.rows[r]
+
+    def lookup_many(self, columns: dict) -> list:
+        """
+        lookup ทีละคอลัมน์ (ใช้กับงาน batch): columns = {axis: [ค่าตัวเลข, ...]} ยาวเท่ากันทุกแกน
+        คืน list ของ dict แถวที่ตรง (None ถ้าไม่เข้าช่วงใด) — ค่าต้องไม่เป็น None
+        """
+        flat = None
+        for name, b, find, stride in zip(self.axes, self.bounds, self.finders, self.strides):
+            idx = [find(b, v) * stride for v in columns[name]]
+            flat = idx if flat is None else [f + i for f, i in zip(flat, idx)]
+        cells, rows = self.cells, self.rows
+        return [None if cells[f] < 0 else rows[cells[f]] for f in flat]
+
+    def dose_mg(self, per_kg, bw):
+        """mg/dose จาก mg/kg × น้ำหนัก ตามวิธีปัดของตาราง (floor = ตัดเศษลง)"""
+        if per_kg is None or bw is None:
+            return None
+        raw = per_kg * bw
+        return math.floor(raw) if self.dose_round == "floor" else round(raw, 2)
+
+
+def load_dose_rules(path=DEFAULT_PATH) -> dict:
+    with open(path, encoding="utf-8") as f:
+        doc = json.load(f)
+    return {key: RuleTable(key, spec) for key, spec in doc["tables"].items()}
@@ -0,0 +1,147 @@
+# app_shared/drug_search.py
+"""
+DrugSearchIndex: ค้นชื่อยาสำหรับ autocomplete (/api/drugs) แบบ in-memory
+
+- term = ชื่อ generic / brand (ทำให้เป็นมาตรฐานด้วย canon) + ทุกคำในชื่อ + alias (ชื่อที่สะกดผิดบ่อย)
+- prefix : list ของ term ที่เรียงไว้ → bisect แล้วไล่ต่อจนกว่าจะไม่ขึ้นต้นด้วย q
+- trigram: {trigram: term ids} → substring (ทุก trigram ของ q ต้องอยู่ใน term) + fuzzy (สะกดผิด)
+- ผลเรียงตามคะแนน (ตรงทั้งชื่อ → ขึ้นต้น → ขึ้นต้นคำ → มีอยู่ในชื่อ → ใกล้เคียง) แล้วตามชื่อยา
+
+สร้างจาก CompatMatrix / CompatSnapshot (ids, names, brands, by_name) ; ข้อมูลเปลี่ยน = สร้างใหม่ทั้งก้อน
+"""
+from __future__ import annotations
+
+import heapq
+from bisect import bisect_left
+
+# ชนิดของ term → คะแนนเมื่อ q เป็น prefix (น้อย = ดีกว่า)
+GENERIC, BRAND, WORD, ALIAS = 0, 1, 2, 3
+_PREFIX_RANK = {GENERIC: 1, BRAND: 2, ALIAS: 2, WORD: 3}
+EXACT, SUBSTRING, FUZZY = 0, 4, 5
+
+MIN_SIMILARITY = 0.3
+
+
+def _identity(s: str) -> str:
+    return s
+
+
+def trigrams(s: str, pad: bool = True) -> set[str]:
+    s = f" {s} " if pad else s
+    return {s[i:i + 3] for i in range(len(s) - 2)}
+
+
+def _similarity(a: set, b: set) -> float:
+    shared = len(a & b)
+    return shared / (len(a) + len(b) - shared) if shared else 0.0
+
+
+class DrugSearchIndex:
+    __slots__ = ("size", "by_name", "order", "terms", "term_drug", "term_kind", "grams", "canon")
+
+    def __init__(self, names, brands, by_name, aliases: dict | None = None, canon=None):
+        """
+        names / brands : ลำดับชื่อตาม index ของยา (None ได้)
+        by_name        : index เรียงตามชื่อ (ใช้เป็นลำดับรองของผล และผลตอน q ว่าง)
+        aliases        : {ชื่อที่สะกดผิด: ชื่อที่ถูก} เช่น {"meropenam": "meropenem"}
+        canon          : ฟังก์ชันเดียวกับที่ใช้กับ name_index (เช่น canonicalize_name)
+        """
+        canon = canon or _identity
+        self.canon = canon
+        self.size = len(names)
+        self.by_name = list(by_name)
+        self.order = {i: rank for rank, i in enumerate(self.by_name)}
+
+        entries = []
+
+        def add(term, i, kind):
+            if term:
+                entries.append((term, kind, i))
+
+        for i in range(self.size):
+            generic = canon(names[i] or "")
+            brand = canon(brands[i] or "")
+            add(generic, i, GENERIC)
+            add(brand, i, BRAND)
+            for name in (generic, brand):
+                words = name.split()
+                for w in range(1, len(words)):
+                    add(" ".join(words[w:]), i, WORD)
+            for wrong, right in (aliases or {}).items():
+                if right in generic:
+                    add(generic.replace(right, wrong), i, ALIAS)
+
+        # เรียง term ไว้เลย → bisect บน self.terms ได้ตรง ๆ
+        entries.sort()
+        self.terms = [e[0] for e in entries]
+        self.term_kind = [e[1] for e in entries]
+        self.term_drug = [e[2] for e in entries]
+
+        grams = {}
+        for t, term in enumerate(self.terms):
+            if self.term_kind[t] == WORD:  # คำย่อยซ้ำกับ term เต็มอยู่แล้ว
+                continue
+            for g in trigrams(term):
+                grams.setdefault(g, []).append(t)
+        self.grams = grams
+
+    # ---------- search ----------
+    def _prefix(self, q: str, best: dict) -> None:
+        terms = self.terms
+        for t in range(bisect_left(terms, q), len(terms)):
+            term = terms[t]
+            if not term.startswith(q):
+                break
+            rank = EXACT if term == q and self.term_kind[t] != WORD else _PREFIX_RANK[self.term_kind[t]]
+            i = self.term_drug[t]
+            if rank < best.get(i, FUZZY + 1):
+                best[i] = rank
+
+    def _substring(self, q: str, best: dict) -> None:
+        if len(q) < 3:
+            # q สั้นกว่า trigram → ไล่ดูทุก term (จำนวนยาหลักร้อย)
+            candidates = range(len(self.terms))
+        else:
+            postings = sorted((self.grams.get(g, ()) for g in trigrams(q, pad=False)), key=len)
+            if not postings[0]:
+                return
+            candidates = set(postings[0]).intersection(*postings[1:])
+        for t in candidates:
+            # alias ใช้เฉพาะ prefix / fuzzy (ไม่งั้น "am" จะเจอ "meropen-am")
+            if q in self.terms[t] and self.term_kind[t] != ALIAS:
+                i = self.term_drug[t]
+                if i not in best:
+                    best[i] = SUBSTRING
+
+    def _fuzzy(self, q: str, best: dict) -> None:
+        q_grams = trigrams(q)
+        candidates = set()
+        for g in q_grams:
+            candidates.update(self.grams.get(g, ()))
+        for t in candidates:
+            i = self.term_drug[t]
+            if i in best:
+                continue
+            # Jaccard ของ trigram (แบบ pg_trgm) ; เทียบกับต้นชื่อยาวเท่า q ด้วย (พิมพ์ยังไม่จบคำ)
+            term = self.terms[t]
+            sim = max(_similarity(q_grams, trigrams(term)), _similarity(q_grams, trigrams(term[:len(q)])))
+            if sim >= MIN_SIMILARITY:
+                score = FUZZY + (1.0 - sim)
+                if score < best.get(i, FUZZY + 1):
+                    best[i] = score
+
+    def search(self, q: str = "", limit: int = 50) -> list[int]:
+        """index ของยาเรียงตามความตรง (ดีสุดก่อน) ; q ว่าง = เรียงตามชื่อ"""
+        q = self.canon(q or "")
+        if not q:
+            return self.by_name[:limit]
+
+        best = {}
+        self._prefix(q, best)
+        # คะแนน substring / fuzzy แย่กว่า prefix ทุกชนิด → ได้ครบ limit แล้วไม่ต้องหาต่อ
+        if len(best) < limit:
+            self._substring(q, best)
+        if len(best) < limit and len(q) >= 3:
+            self._fuzzy(q, best)
+        return heapq.nsmallest(limit, best, key=lambda i: (best[i], self.order[i]))
+
@@ -0,0 +1,181 @@
+# app_shared/http_cache.py
+"""
+HTTP conditional GET (ETag / Last-Modified / Cache-Control) สำหรับหน้าคำนวณและ API ที่ผลลัพธ์คงที่
+
+- หน้า GET ขึ้นกับ "source" (templates, data/*.json, โค้ด) + UPDATE_DATE + query string เท่านั้น
+  → ETag = hash(version ของ source, path, args) คำนวณได้ "ก่อน" render
+- API compat ขึ้นกับ dataset เพิ่ม → endpoint ส่ง dataset(): คืน digest ของข้อมูลชุดปัจจุบัน
+- If-None-Match ตรง → ตอบ 304 ทันทีใน before_request (ไม่เรียก view ไม่ render)
+- version ของ source คิดจาก stat ของไฟล์ครั้งเดียว ; debug / TEMPLATES_AUTO_RELOAD = คิดใหม่ทุก request
+- store (ByteLRU, optional): เก็บ body ที่ render แล้วด้วย key เดียวกับ ETag → request ซ้ำ (args เดิม)
+  จาก client อื่นไม่ต้อง render ใหม่ ; แก้ template ในโหมด debug → version เปลี่ยน → key ใหม่ (ตัวเก่าหลุดออกจาก LRU เอง)
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import threading
+from pathlib import Path
+
+from flask import current_app, g, request
+
+from app_shared.byte_lru import ByteLRU
+
+CACHEABLE_METHODS = ("GET", "HEAD")
+
+
+def _iter_files(paths):
+    for p in paths:
+        p = Path(p)
+        if p.is_file():
+            yield p
+        elif p.is_dir():
+            for root, dirs, files in os.walk(p):
+                dirs[:] = sorted(d for d in dirs if d != "__pycache__")
+                for name in sorted(files):
+                    yield Path(root) / name
+
+
+class SourceVersion:
+    """fingerprint ของไฟล์ที่มีผลกับ output (path + ขนาด + mtime) + ค่าอื่น เช่น UPDATE_DATE"""
+
+    def __init__(self, paths, extra: str = ""):
+        self.paths = tuple(paths)
+        self.extra = extra
+        self._current = None
+        self._lock = threading.Lock()
+
+    def scan(self) -> tuple[str, float]:
+        h = hashlib.sha1(self.extra.encode("utf-8"))
+        newest = 0.0
+        for p in _iter_files(self.paths):
+            st = p.stat()
+            h.update(f"\0{p}\0{st.st_size}\0{st.st_mtime_ns}".encode("utf-8"))
+            newest = max(newest, st.st_mtime)
+        return h.hexdigest(), newest
+
+    def current(self, reload: bool = False) -> tuple[str, float]:
+        """(token, mtime ล่าสุด) ; reload=True = stat ใหม่ (โหมด debug แก้ template แล้วเห็นทันที)"""
+        cur = self._current
+        if cur is None or reload:
+            with self._lock:
+                cur = self._current = self.scan()
+        return cur
+
+
+class HttpCache:
+    """
+    ลงทะเบียน endpoint ที่ตอบซ้ำได้ → ETag + Cache-Control (+ Last-Modified ถ้าไม่ขึ้นกับ dataset)
+
+    max_age = 0 → "no-cache" (browser เก็บได้แต่ต้องถามก่อนใช้ทุกครั้ง → ได้ 304 ถ้าไม่เปลี่ยน)
+    store   = ByteLRU ของ response ที่ render แล้ว (None = ไม่เก็บ ; ทำแค่ ETag/304)
+    """
+
+    def __init__(self, source: SourceVersion, max_age: int = 0, store: ByteLRU | None = None):
+        self.source = source
+        self.max_age = int(max_age)
+        self.store = store
+        self.endpoints = {}
+        self.not_modified = 0
+        self.skipped = 0
+
+    def register(self, endpoint: str, dataset=None) -> None:
+        """dataset: ฟังก์ชันคืน str (digest ของข้อมูลชุดปัจจุบัน) ; None = ขึ้นกับ source อย่างเดียว"""
+        self.endpoints[endpoint] = dataset
+
+    def register_blueprint(self, app, name: str, dataset=None) -> None:
+        for rule in app.url_map.iter_rules():
+            if rule.endpoint.startswith(name + ".") and "GET" in rule.methods:
+                self.register(rule.endpoint, dataset)
+
+    def init_app(self, app) -> None:
+        app.extensions["http_cache"] = self
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+
+    # ---------- validators ----------
+    def _reload(self) -> bool:
+        app = current_app
+        return bool(app.debug or app.config.get("TEMPLATES_AUTO_RELOAD"))
+
+    def validators(self) -> tuple[str, float | None] | None:
+        """(etag, last_modified) ของ request ปัจจุบัน ; None = endpoint นี้ไม่ cache"""
+        if request.method not in CACHEABLE_METHODS or request.endpoint not in self.endpoints:
+            return None
+        version, mtime = self.source.current(reload=self._reload())
+        dataset = self.endpoints[request.endpoint]
+        h = hashlib.sha1(version.encode())
+        if dataset is not None:
+            h.update(b"\0" + str(dataset()).encode("utf-8"))
+            mtime = None  # เวลาที่ข้อมูลเปลี่ยนไม่มีใน dataset digest → ใช้ ETag อย่างเดียว
+        h.update(f"\0{request.path}".encode("utf-8"))
+        for k, v in sorted(request.args.items(multi=True)):
+            h.update(f"\0{k}={v}".encode("utf-8"))
+        return h.hexdigest()[:32], mtime
+
+    def _set_headers(self, response, etag: str, mtime: float | None):
+        response.set_etag(etag)
+        if mtime:
+            response.last_modified = int(mtime)
+        if self.max_age > 0:
+            response.cache_control.public = True
+            response.cache_control.max_age = self.max_age
+        else:
+            response.cache_control.no_cache = True
+        return response
+
+    def _not_modified(self, etag: str, mtime: float | None) -> bool:
+        if request.if_none_match:
+            return request.if_none_match.contains(etag)
+        ims = request.if_modified_since
+        return bool(mtime and ims and int(mtime) <= ims.timestamp())
+
+    # ---------- response store ----------
+    def _cached_response(self, etag: str):
+        hit = self.store.get(etag)
+        if hit is None:
+            return None
+        content_type, body = hit
+        response = current_app.response_class(body, content_type=content_type)
+        response.headers["X-Cache"] = "HIT"
+        return response
+
+    def _remember(self, etag: str, response) -> None:
+        # เก็บเฉพาะ body ธรรมดาที่ไม่ผูกกับผู้ใช้ (ไม่มี cookie / Vary)
+        if response.is_streamed or response.direct_passthrough or "Set-Cookie" in response.headers or response.vary:
+            self.skipped += 1
+            return
+        self.store.put(etag, (response.content_type, response.get_data()))
+        response.headers["X-Cache"] = "MISS"
+
+    def stats(self) -> dict:
+        version, _ = self.source.current()
+        return {
+            "pid": os.getpid(),
+            "endpoints": len(self.endpoints),
+            "source_version": version,
+            "not_modified": self.not_modified,
+            "skipped": self.skipped,
+            "store": self.store.stats() if self.store is not None else None,
+        }
+
+    # ---------- hooks ----------
+    def _before_request(self):
+        found = self.validators()
+        if found is None:
+            return None
+        g.http_cache_validators = found
+        if self._not_modified(*found):
+            self.not_modified += 1
+            return self._set_headers(current_app.response_class(status=304), *found)
+        if self.store is not None:
+            return self._cached_response(found[0])
+        return None
+
+    def _after_request(self, response):
+        found = g.pop("http_cache_validators", None)
+        if found is not None and response.status_code == 200 and "ETag" not in response.headers:
+            if self.store is not None and "X-Cache" not in response.headers:
+                self._remember(found[0], response)
+            self._set_headers(response, *found)
+        return response
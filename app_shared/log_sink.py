@@ -0,0 +1,158 @@
+# app_shared/log_sink.py
+"""
+AccessLogSink: เขียน log แบบ background (ไม่ commit ใน request path)
+
+- request แค่ put record ลง queue (bounded) แล้วไปต่อทันที
+- writer thread รวบเป็น batch แล้วเขียนทีเดียว (executemany) ทุก N records หรือทุก T ms
+- queue เต็ม: overflow="drop" ทิ้ง record / overflow="block" รอได้ไม่เกิน block_timeout วินาที
+- stop() / atexit จะ flush ของที่ค้างก่อนปิด ; stop() / flush() รอรวมไม่เกิน timeout แม้ queue เต็ม (writer ค้าง)
+"""
+from __future__ import annotations
+
+import atexit
+import logging
+import queue
+import threading
+import time
+
+log = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class AccessLogSink:
+    def __init__(
+        self,
+        write_batch,
+        max_queue: int = 10000,
+        batch_size: int = 100,
+        flush_ms: int = 500,
+        overflow: str = "drop",
+        block_timeout: float = 1.0,
+    ):
+        """write_batch(rows: list) ถูกเรียกจาก writer thread เท่านั้น"""
+        if overflow not in ("drop", "block"):
+            raise ValueError(f"overflow ต้องเป็น 'drop' หรือ 'block' (ได้ {overflow!r})")
+
+        self._write_batch = write_batch
+        self._q = queue.Queue(maxsize=max_queue)
+        self.batch_size = max(1, int(batch_size))
+        self.flush_interval = max(1, int(flush_ms)) / 1000.0
+        self.overflow = overflow
+        self.block_timeout = block_timeout
+
+        self._lock = threading.Lock()
+        self.enqueued = 0
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+
+        self._thread = None
+        self._closed = False
+
+    # ---------- lifecycle ----------
+    def start(self) -> "AccessLogSink":
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="access-log-sink", daemon=True)
+            self._thread.start()
+            atexit.register(self.stop)
+        return self
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """flush ของที่ค้างทั้งหมดแล้วหยุด writer thread"""
+        if self._closed:
+            return
+        self._closed = True
+        if self._thread is not None:
+            deadline = time.monotonic() + timeout
+            try:
+                self._q.put(_STOP, timeout=timeout)
+            except queue.Full:
+                # writer ค้าง (DB ช้า/ล่ม) → ไม่ block shutdown ; thread เป็น daemon ปล่อยไป
+                log.warning("access log sink: queue full at stop, %d rows not flushed", self._q.qsize())
+                return
+            self._thread.join(max(0.0, deadline - time.monotonic()))
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """รอจนของที่ submit ก่อนหน้านี้ถูกเขียนลง DB แล้ว"""
+        if self._thread is None or self._closed:
+            return True
+        deadline = time.monotonic() + timeout
+        done = threading.Event()
+        try:
+            self._q.put(done, timeout=timeout)
+        except queue.Full:
+            return False
+        return done.wait(max(0.0, deadline - time.monotonic()))
+
+    # ---------- producer side ----------
+    def submit(self, row) -> bool:
+        if self._closed:
+            self._count("dropped")
+            return False
+        try:
+            if self.overflow == "block":
+                self._q.put(row, timeout=self.block_timeout)
+            else:
+                self._q.put_nowait(row)
+        except queue.Full:
+            self._count("dropped")
+            return False
+        self._count("enqueued")
+        return True
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "enqueued": self.enqueued,
+                "written": self.written,
+                "dropped": self.dropped,
+                "failed": self.failed,
+                "pending": self._q.qsize(),
+            }
+
+    # ---------- writer side ----------
+    def _count(self, name: str, n: int = 1) -> None:
+        with self._lock:
+            setattr(self, name, getattr(self, name) + n)
+
+    def _write(self, batch: list) -> None:
+        if not batch:
+            return
+        try:
+            self._write_batch(batch)
+        except Exception:
+            log.exception("access log batch write failed (%d rows)", len(batch))
+            self._count("failed", len(batch))
+        else:
+            self._count("written", len(batch))
+
+    def _run(self) -> None:
+        batch = []
+        deadline = None
+        while True:
+            timeout = self.flush_interval if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                item = self._q.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+
+            if item is _STOP:
+                self._write(batch)
+                return
+
+            if isinstance(item, threading.Event):
+                # queue เป็น FIFO → ทุก record ก่อนหน้า flush() อยู่ใน batch แล้ว
+                self._write(batch)
+                batch, deadline = [], None
+                item.set()
+                continue
+
+            if item is not None:
+                batch.append(item)
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_interval
+
+            if batch and (len(batch) >= self.batch_size or time.monotonic() >= deadline):
+                self._write(batch)
+                batch, deadline = [], None
@@ -1,6 +1,17 @@
 # app_shared/med_catalog.py
+"""
+รายการยา (data/meds_catalog.json) — แหล่งเดียวของเมนูยา ทั้ง Flask และ static build
+
+- MedCatalog เก็บผลที่ parse + validate + จัดกลุ่มแล้วไว้ใน memory
+- โหลดใหม่เฉพาะเมื่อ (mtime, size) ของไฟล์เปลี่ยน
+- stat ไฟล์ไม่เกิน 1 ครั้งต่อ check_interval วินาที → steady state ไม่แตะดิสก์เลย
+"""
 from __future__ import annotations
 import json
+import os
+import threading
+import time
+from dataclasses import dataclass
 from pathlib import Path
 from string import ascii_uppercase
 
@@ -8,7 +19,7 @@ ROOT = Path(__file__).resolve().parents[1]
 CATALOG = ROOT / "data" / "meds_catalog.json"
 
 def load_meds(path: Path = CATALOG) -> list[dict]:
-    meds = json.loads(path.read_text(encoding="utf-8"))
+    meds = json.loads(Path(path).read_text(encoding="utf-8"))
 
     # ---- validation กันพังเงียบ ๆ ระยะยาว ----
     seen = set()
@@ -20,6 +31,7 @@ def load_meds(path: Path = CATALOG) -> list[dict]:
         if ep in seen:
             raise ValueError(f"[med_catalog] endpoint ซ้ำ: {ep}")
         seen.add(ep)
+        m.setdefault("danger", False)
 
     return meds
 
@@ -37,8 +49,62 @@ def group_meds_by_letter(meds: list[dict]) -> dict[str, list[dict]]:
     # เอาเฉพาะตัวอักษรที่มีข้อมูลจริง
     return {ch: groups[ch] for ch in ascii_uppercase if groups[ch]}
 
+
+@dataclass(frozen=True)
+class CatalogSnapshot:
+    meds: list
+    groups: dict
+    letters: list
+    stamp: tuple  # (st_mtime_ns, st_size) ของไฟล์ตอนโหลด
+
+    def as_context(self) -> dict:
+        return {"meds": self.meds, "groups": self.groups, "letters": self.letters}
+
+
+class MedCatalog:
+    def __init__(self, path: Path = CATALOG, check_interval: float = 1.0):
+        self.path = Path(path)
+        self.check_interval = check_interval
+        self._snap: CatalogSnapshot | None = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def _stamp(self) -> tuple:
+        st = os.stat(self.path)
+        return (st.st_mtime_ns, st.st_size)
+
+    def get(self) -> CatalogSnapshot:
+        snap = self._snap
+        if snap is not None and time.monotonic() - self._checked_at < self.check_interval:
+            return snap
+
+        with self._lock:
+            stamp = self._stamp()
+            snap = self._snap
+            if snap is None or snap.stamp != stamp:
+                # ไฟล์เสีย → raise (ไม่เก็บ snapshot ครึ่ง ๆ)
+                meds = load_meds(self.path)
+                groups = group_meds_by_letter(meds)
+                snap = CatalogSnapshot(meds, groups, list(groups), stamp)
+                self._snap = snap
+            self._checked_at = time.monotonic()
+            return snap
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._snap = None
+            self._checked_at = 0.0
+
+
+_default = MedCatalog()
+
+def get_catalog() -> CatalogSnapshot:
+    return _default.get()
+
 def build_ctx_for_admin_page() -> dict:
-    meds = load_meds()
-    groups = group_meds_by_letter(meds)
-    letters = list(groups.keys())
-    return {"meds": meds, "groups": groups, "letters": letters}
+    return get_catalog().as_context()
+
+def catalog_version() -> str:
+    """stamp ของไฟล์ที่โหลดอยู่ (เปลี่ยนเมื่อ reload) → ใช้ทำ ETag / key ของ page cache หน้าที่แสดงรายการยา"""
+    mtime_ns, size = get_catalog().stamp
+    return f"{mtime_ns}-{size}"
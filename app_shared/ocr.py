@@ -0,0 +1,481 @@
+# app_shared/ocr.py
+"""
+OCR ฝั่งเซิร์ฟเวอร์ (EasyOCR) แบบ worker pool
+
+- web process ไม่ import easyocr/torch และไม่สร้าง Reader เอง → start ทันที
+- OcrPool = process pool ที่แต่ละ worker ถือ engine (Reader) ของตัวเอง 1 ตัว สร้างครั้งเดียวตอน process เริ่ม
+- start() ส่งงาน warm-up ให้ทุก worker ล่วงหน้า (โหลด model เบื้องหลัง ไม่บล็อก request)
+- submit() คืน job id ทันที ; result() รอผลได้แบบมี timeout
+- งานค้างเกิน max_queue → OcrBusy (route ตอบ 503 ให้ client ลองใหม่)
+- batch(): หลายไฟล์ (หรือ TIFF หลายหน้า) แบ่งเป็น chunk ละ worker ; ใน worker preprocess ทุกหน้าพร้อมกัน (thread)
+  แล้วอ่านทั้ง chunk ด้วย readtext_batch ครั้งเดียว ; ผลออกมาทีละไฟล์ตามลำดับที่เสร็จ
+
+cache (content-addressed: key = sha256 ของภาพ + scale/threshold — ดู app_shared/byte_lru.py)
+- web process: ข้อความที่อ่านได้ → ภาพซ้ำ + พารามิเตอร์เดิม ตอบทันทีไม่ต้องส่งเข้า pool
+  ภาพเดียวกันที่กำลังรันอยู่ → ใช้งานเดียวกัน (ไม่รันซ้ำ)
+- worker: ภาพที่ decode + deskew แล้ว (key = sha256 อย่างเดียว) และ bitmap หลัง threshold
+  → เปลี่ยน scale/threshold ไม่ต้อง decode/deskew ใหม่ ; พารามิเตอร์เดิมข้าม preprocess ทั้งหมด
+"""
+from __future__ import annotations
+
+import atexit
+import hashlib
+import importlib.util
+import logging
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from concurrent.futures import TimeoutError as FutureTimeout
+from pathlib import Path
+
+try:
+    import cv2
+    import numpy as np
+except ImportError:
+    cv2 = None
+    np = None
+
+from app_shared.byte_lru import ByteLRU
+
+log = logging.getLogger(__name__)
+
+DEFAULT_LANGS = ("en", "th")
+
+
+class OcrBusy(RuntimeError):
+    """คิว OCR เต็ม"""
+
+
+class OcrUnavailable(RuntimeError):
+    """ไม่มี easyocr/opencv หรือสร้าง Reader ไม่สำเร็จ"""
+
+
+def easyocr_available() -> bool:
+    # เช็คโดยไม่ import จริง (import easyocr = import torch ช้าหลายวินาที)
+    return all(importlib.util.find_spec(m) is not None for m in ("easyocr", "cv2", "numpy"))
+
+
+# ---------- pipeline (ยกมาจาก api_ocr เดิม) ----------
+def _deskew(img_bgr):
+    gray = cv2.cvtColor(img_bgr, cv2.COLOR_BGR2GRAY)
+    gray = cv2.GaussianBlur(gray, (3, 3), 0)
+    edges = cv2.Canny(gray, 50, 150, 3)
+    lines = cv2.HoughLines(edges, 1, np.pi / 180, 150)
+    if lines is None:
+        return img_bgr
+    angles = []
+    for rho, theta in lines[:, 0]:
+        deg = theta * 180 / np.pi
+        if deg < 20 or deg > 160:
+            angles.append(deg if deg <= 90 else deg - 180)
+    if not angles:
+        return img_bgr
+    angle = float(np.median(angles))
+    h, w = img_bgr.shape[:2]
+    M = cv2.getRotationMatrix2D((w // 2, h // 2), angle, 1.0)
+    return cv2.warpAffine(img_bgr, M, (w, h), flags=cv2.INTER_LINEAR, borderMode=cv2.BORDER_REPLICATE)
+
+
+def decode_image(file_bytes: bytes):
+    """bytes → ภาพ BGR ที่ deskew แล้ว (ขั้นที่ไม่ขึ้นกับ scale/threshold)"""
+    if cv2 is None:
+        raise OcrUnavailable("ไม่พบ opencv-python")
+    buf = np.frombuffer(file_bytes, dtype=np.uint8)
+    img = cv2.imdecode(buf, cv2.IMREAD_COLOR)
+    if img is None:
+        raise ValueError("อ่านภาพไม่สำเร็จ")
+    return _deskew(img)
+
+
+def decode_pages(file_bytes: bytes) -> list:
+    """เหมือน decode_image แต่ไฟล์หลายหน้า (TIFF) ได้ทุกหน้า"""
+    if cv2 is None:
+        raise OcrUnavailable("ไม่พบ opencv-python")
+    buf = np.frombuffer(file_bytes, dtype=np.uint8)
+    pages = []
+    if hasattr(cv2, "imdecodemulti"):
+        ok, pages = cv2.imdecodemulti(buf, cv2.IMREAD_COLOR)
+        pages = list(pages) if ok else []
+    if not pages:
+        return [decode_image(file_bytes)]
+    return [_deskew(p) for p in pages]
+
+
+def enhance_for_ocr(img, scale: float = 3.0, thresh: int = 170):
+    if scale and scale > 1.0:
+        img = cv2.resize(img, None, fx=scale, fy=scale, interpolation=cv2.INTER_CUBIC)
+    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+    clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
+    gray = clahe.apply(gray)
+    gray = cv2.bilateralFilter(gray, 7, 75, 75)
+    sharp = cv2.addWeighted(gray, 1.2, cv2.GaussianBlur(gray, (0, 0), 3), -0.2, 0)
+    _, th = cv2.threshold(sharp, int(thresh), 255, cv2.THRESH_BINARY)
+    return th
+
+
+def preprocess_for_ocr(file_bytes: bytes, scale: float = 3.0, thresh: int = 170):
+    return enhance_for_ocr(decode_image(file_bytes), scale=scale, thresh=thresh)
+
+
+def cache_key(digest: str, scale: float, thresh: int) -> str:
+    return f"{digest}:{float(scale):g}:{int(thresh)}"
+
+
+READ_OPTS = dict(
+    detail=1,
+    paragraph=True,
+    text_threshold=0.5,
+    low_text=0.35,
+    link_threshold=0.3,
+    width_ths=0.7,
+    decoder="beamsearch",
+)
+
+
+def _text_lines(result) -> list[str]:
+    return [text.strip() for _box, text, *_ in result if text.strip()]
+
+
+class EasyOcrEngine:
+    """engine จริง: 1 ตัวต่อ worker process"""
+
+    def __init__(self, langs=DEFAULT_LANGS):
+        import easyocr  # import ใน worker เท่านั้น
+
+        self.reader = easyocr.Reader(list(langs), gpu=False, verbose=False)
+
+    def decode(self, data: bytes):
+        return decode_image(data)
+
+    def decode_pages(self, data: bytes) -> list:
+        return decode_pages(data)
+
+    def enhance(self, img, scale: float, thresh: int):
+        return enhance_for_ocr(img, scale=scale, thresh=thresh)
+
+    def readtext(self, bitmap) -> list[str]:
+        return _text_lines(self.reader.readtext(bitmap, **READ_OPTS))
+
+    def readtext_batch(self, bitmaps: list) -> list[list[str]]:
+        # readtext_batched ต้องการภาพขนาดเท่ากัน (ไม่งั้นต้อง resize = ตัวอักษรเพี้ยน) → ขนาดไม่เท่าอ่านทีละภาพ
+        if len(bitmaps) > 1 and len({b.shape for b in bitmaps}) == 1:
+            return [_text_lines(r) for r in self.reader.readtext_batched(bitmaps, **READ_OPTS)]
+        return [self.readtext(b) for b in bitmaps]
+
+
+# ---------- ฝั่ง worker process ----------
+_engine = None
+_engine_error = None
+_bitmaps = None  # ByteLRU ของ worker นี้ (ภาพ decode แล้ว + bitmap)
+_prep = None  # thread pool สำหรับ preprocess หลายหน้าพร้อมกัน (cv2 ปล่อย GIL)
+
+
+def _init_worker(engine_factory, args, cache_bytes=0, cache_dir=None, prep_threads=1, disk_max_bytes=None):
+    global _engine, _engine_error, _bitmaps, _prep
+    if cache_bytes or cache_dir:
+        _bitmaps = ByteLRU(cache_bytes, directory=cache_dir, disk_max_bytes=disk_max_bytes)
+    _prep = ThreadPoolExecutor(max_workers=max(1, prep_threads), thread_name_prefix="ocr-prep")
+    try:
+        _engine = engine_factory(*args)
+    except Exception as e:  # ไม่ให้ initializer พัง (pool จะ broken ทั้งก้อน)
+        _engine_error = f"{type(e).__name__}: {e}"
+
+
+def _require_engine():
+    if _engine is None:
+        raise OcrUnavailable(_engine_error or "OCR engine ไม่พร้อมใช้งาน")
+    return _engine
+
+
+def _warm() -> int:
+    _require_engine()
+    return os.getpid()
+
+
+def _cached(key, build):
+    if _bitmaps is None:
+        return build()
+    value = _bitmaps.get(key)
+    if value is None:
+        value = build()
+        _bitmaps.put(key, value)
+    return value
+
+
+def _ocr_job(data: bytes, digest: str, scale: float, thresh: int) -> list[str]:
+    engine = _require_engine()
+
+    def bitmap():
+        img = _cached("img:" + digest, lambda: engine.decode(data))
+        return engine.enhance(img, scale, thresh)
+
+    return engine.readtext(_cached("bm:" + cache_key(digest, scale, thresh), bitmap))
+
+
+def _ocr_batch_job(items: list, scale: float, thresh: int) -> list[dict]:
+    """items = [(file index, bytes, sha256)] → [{"file", "pages": [[lines], ...]} | {"file", "error"}]"""
+    engine = _require_engine()
+
+    def prep(item):
+        i, data, digest = item
+
+        def bitmaps():
+            pages = _cached("pages:" + digest, lambda: engine.decode_pages(data))
+            return [engine.enhance(img, scale, thresh) for img in pages]
+
+        try:
+            return i, _cached("bms:" + cache_key(digest, scale, thresh), bitmaps), None
+        except Exception as e:  # ไฟล์เสียไฟล์เดียวไม่ให้ทั้ง chunk ล้ม
+            return i, None, str(e)
+
+    prepared = list(_prep.map(prep, items))
+    flat = [bm for _, bms, _ in prepared if bms for bm in bms]
+    texts = iter(engine.readtext_batch(flat) if flat else ())
+
+    out = []
+    for i, bms, err in prepared:
+        if err is not None:
+            out.append({"file": i, "error": err})
+        else:
+            out.append({"file": i, "pages": [next(texts) for _ in bms]})
+    return out
+
+
+# ---------- ฝั่ง web process ----------
+class OcrPool:
+    def __init__(
+        self,
+        workers: int = 1,
+        max_queue: int = 8,
+        engine_factory=EasyOcrEngine,
+        engine_args: tuple = (DEFAULT_LANGS,),
+        job_ttl: float = 300.0,
+        cache_bytes: int = 0,
+        bitmap_cache_bytes: int = 0,
+        cache_dir=None,
+        prep_threads: int | None = None,
+        disk_max_bytes: int | None = None,
+    ):
+        """
+        engine_factory(*engine_args) ถูกเรียกใน worker ; ต้อง pickle ได้ (ฟังก์ชัน/คลาสระดับ module)
+        cache_bytes = ข้อความ (web process) ; bitmap_cache_bytes = ภาพ/bitmap (ต่อ worker) ; 0 = ไม่ cache
+        cache_dir = เก็บลง disk ด้วย (<dir>/text, <dir>/bitmap — worker ทุกตัวใช้ dir เดียวกัน)
+        disk_max_bytes = เพดานขนาดบน disk ต่อ dir (text / bitmap แยกกัน) ; None = ไม่จำกัด
+        prep_threads = thread ต่อ worker สำหรับ preprocess ของ batch (default: cpu / workers)
+        """
+        self.workers = max(1, int(workers))
+        self.max_queue = max(1, int(max_queue))
+        self.job_ttl = job_ttl
+        self._factory = engine_factory
+        self._args = tuple(engine_args)
+
+        cache_dir = Path(cache_dir) if cache_dir else None
+        self.cache = None
+        if cache_bytes or cache_dir:
+            self.cache = ByteLRU(cache_bytes, directory=cache_dir / "text" if cache_dir else None,
+                                 disk_max_bytes=disk_max_bytes)
+        if prep_threads is None:
+            prep_threads = max(1, (os.cpu_count() or 1) // self.workers)
+        self._worker_opts = (bitmap_cache_bytes, str(cache_dir / "bitmap") if cache_dir else None, prep_threads,
+                             disk_max_bytes)
+
+        self._lock = threading.Lock()
+        self._jobs = {}  # job id → (future, เวลาที่ submit)
+        self._inflight = {}  # cache key → future ที่กำลังรัน
+        self._pending = 0
+        self.submitted = 0
+        self.done = 0
+        self.failed = 0
+        self.rejected = 0
+
+        self._executor = None
+        self._closed = False
+
+    # ---------- lifecycle ----------
+    def start(self) -> "OcrPool":
+        with self._lock:
+            if self._executor is not None:
+                return self
+            # spawn: fork หลังจาก web process มี thread แล้วไม่ปลอดภัย (และ torch ไม่ชอบ fork)
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(self._factory, self._args, *self._worker_opts),
+            )
+            # ส่ง warm-up ให้ครบทุก worker → โหลด model เบื้องหลังก่อน request แรกมาถึง
+            self._warmups = [self._executor.submit(_warm) for _ in range(self.workers)]
+            atexit.register(self.shutdown)
+        return self
+
+    def shutdown(self, wait: bool = False) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait, cancel_futures=True)
+
+    def wait_ready(self, timeout: float | None = None) -> bool:
+        """รอ warm-up (ใช้ตอน test/healthcheck) ; False = worker สร้าง engine ไม่สำเร็จ"""
+        self.start()
+        try:
+            for f in self._warmups:
+                f.result(timeout)
+        except OcrUnavailable:
+            return False
+        return True
+
+    # ---------- jobs ----------
+    def submit(self, data: bytes, scale: float = 3.0, thresh: int = 170) -> str:
+        if self._closed:
+            raise OcrUnavailable("OCR pool ถูกปิดแล้ว")
+        digest = hashlib.sha256(data).hexdigest()
+        key = cache_key(digest, scale, thresh)
+        job_id = uuid.uuid4().hex
+
+        lines = self.cache.get(key) if self.cache is not None else None
+        if lines is not None:
+            fut = Future()
+            fut.set_result(lines)
+            with self._lock:
+                self._expire()
+                self._jobs[job_id] = (fut, time.monotonic())
+            return job_id
+
+        self.start()
+        with self._lock:
+            self._expire()
+            fut = self._inflight.get(key)
+            if fut is None:
+                if self._pending >= self.max_queue:
+                    self.rejected += 1
+                    raise OcrBusy(f"คิว OCR เต็ม ({self._pending} งาน)")
+                self._pending += 1
+                self.submitted += 1
+                fut = self._executor.submit(_ocr_job, data, digest, float(scale), int(thresh))
+                self._inflight[key] = fut
+                new = True
+            else:
+                new = False
+            self._jobs[job_id] = (fut, time.monotonic())
+        if new:
+            fut.add_done_callback(lambda f: self._on_done(key, f))
+        return job_id
+
+    def batch(self, files: list, scale: float = 3.0, thresh: int = 170,
+              chunk_size: int = 4, timeout: float | None = None):
+        """
+        หลายไฟล์ใน request เดียว → iterator ของ {"file": i, "pages": [[lines], ...]} หรือ {"file": i, "error": ...}
+        ตามลำดับที่เสร็จ (ไฟล์ที่อยู่ใน cache ออกก่อน) ; OcrBusy เกิดตอนเรียก ไม่ใช่ตอน iterate
+        """
+        if self._closed:
+            raise OcrUnavailable("OCR pool ถูกปิดแล้ว")
+        ready, todo = [], []
+        for i, data in enumerate(files):
+            digest = hashlib.sha256(data).hexdigest()
+            pages = self.cache.get("pages:" + cache_key(digest, scale, thresh)) if self.cache is not None else None
+            if pages is not None:
+                ready.append({"file": i, "pages": pages})
+            else:
+                todo.append((i, data, digest))
+
+        # กระจายให้ครบทุก worker ก่อน แต่ chunk ไม่ใหญ่เกิน chunk_size (ผลจะได้ทยอยออก)
+        size = max(1, min(chunk_size, -(-len(todo) // self.workers))) if todo else 1
+        chunks = [todo[k:k + size] for k in range(0, len(todo), size)]
+
+        futures = {}
+        if chunks:
+            self.start()
+            with self._lock:
+                self._expire()
+                if self._pending + len(chunks) > self.max_queue:
+                    self.rejected += 1
+                    raise OcrBusy(f"คิว OCR เต็ม ({self._pending} งาน)")
+                self._pending += len(chunks)
+                self.submitted += len(chunks)
+                for chunk in chunks:
+                    fut = self._executor.submit(_ocr_batch_job, chunk, float(scale), int(thresh))
+                    futures[fut] = [i for i, _, _ in chunk]
+            keys = {i: "pages:" + cache_key(d, scale, thresh) for i, _, d in todo}
+            for fut in futures:
+                fut.add_done_callback(lambda f: self._on_batch_done(keys, f))
+        return self._iter_batch(ready, futures, timeout)
+
+    def _iter_batch(self, ready, futures, timeout):
+        yield from ready
+        pending = dict(futures)
+        try:
+            for fut in as_completed(futures, timeout=timeout):
+                indexes = pending.pop(fut)
+                try:
+                    yield from fut.result()
+                except Exception as e:
+                    for i in indexes:
+                        yield {"file": i, "error": str(e)}
+        except FutureTimeout:
+            for indexes in pending.values():
+                for i in indexes:
+                    yield {"file": i, "error": "OCR timeout"}
+
+    def result(self, job_id: str, timeout: float | None = None) -> list[str]:
+        """รอผล ; timeout → concurrent.futures.TimeoutError ; ไม่รู้จัก job → KeyError"""
+        with self._lock:
+            fut, _ = self._jobs[job_id]
+        return fut.result(timeout)
+
+    def status(self, job_id: str) -> dict:
+        with self._lock:
+            fut, _ = self._jobs[job_id]
+        if not fut.done():
+            return {"status": "pending"}
+        err = fut.exception()
+        if err is not None:
+            return {"status": "error", "error": str(err)}
+        return {"status": "done", "lines": fut.result()}
+
+    def stats(self) -> dict:
+        with self._lock:
+            out = {
+                "workers": self.workers,
+                "pending": self._pending,
+                "submitted": self.submitted,
+                "done": self.done,
+                "failed": self.failed,
+                "rejected": self.rejected,
+            }
+        if self.cache is not None:
+            out["cache"] = self.cache.stats()
+        return out
+
+    def _on_batch_done(self, keys, fut) -> None:
+        if self.cache is not None and not fut.cancelled() and fut.exception() is None:
+            for res in fut.result():
+                if "pages" in res:
+                    self.cache.put(keys[res["file"]], res["pages"])
+        self._on_done(None, fut)
+
+    def _on_done(self, key, fut) -> None:
+        failed = fut.cancelled() or fut.exception() is not None
+        if failed and not fut.cancelled():
+            log.warning("OCR job failed: %s", fut.exception())
+        if key is not None and not failed and self.cache is not None:
+            self.cache.put(key, fut.result())
+        with self._lock:
+            if key is not None:
+                self._inflight.pop(key, None)
+            self._pending -= 1
+            if failed:
+                self.failed += 1
+            else:
+                self.done += 1
+
+    def _expire(self) -> None:
+        # ผลที่เสร็จแล้วเก็บไว้ job_ttl วินาทีให้ client มา poll ; เรียกตอนถือ lock
+        cutoff = time.monotonic() - self.job_ttl
+        stale = [k for k, (f, t) in self._jobs.items() if f.done() and t < cutoff]
+        for k in stale:
+            del self._jobs[k]
+
@@ -0,0 +1,148 @@
+# app_shared/order_rules.py
+"""
+ตรวจคำสั่งยาแบบ data-driven (แทน check_<drug>() ที่เขียนมือทีละตัว)
+
+- เกณฑ์อยู่ใน data/order_rules.json: route / ความถี่ที่อนุญาต + ช่วง mg/kg ต่อ dose ของแต่ละยา
+- ตอนโหลด compile แต่ละยาเป็น OrderRule: set ของ route/freq (frozenset) + ขอบ mg/kg เป็น float
+  + ข้อความที่ format ไว้ล่วงหน้า → ตรวจ 1 order = lookup ใน set 2 ครั้ง + เทียบตัวเลข 1 ครั้ง
+- OrderVerifier.verify_many() ตรวจทั้ง MAR (หลายร้อย order) ในครั้งเดียว ; order ที่ข้อมูลผิดไม่ทำให้ตัวอื่นล้ม
+"""
+from __future__ import annotations
+
+import json
+import re
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+DEFAULT_PATH = BASE_DIR / "data" / "order_rules.json"
+
+NO_WEIGHT_MSG = "ไม่ทราบน้ำหนัก: โปรดตรวจสอบ mg/kg ด้วย"
+
+
+def _key(s) -> str:
+    return " ".join(str(s or "").upper().split())
+
+
+class OrderRule:
+    __slots__ = (
+        "drug", "label", "aliases", "routes", "freqs", "lo", "hi", "calc_endpoint",
+        "route_msg", "freq_msg", "dose_msg", "pass_msg",
+    )
+
+    def __init__(self, drug: str, spec: dict):
+        self.drug = _key(drug)
+        self.label = spec.get("label") or drug.title()
+        self.aliases = tuple(_key(a) for a in spec.get("aliases", ()))
+        self.routes = frozenset(_key(r) for r in spec.get("routes", ()))
+        self.freqs = frozenset(_key(f) for f in spec.get("freqs", ()))
+        window = spec.get("mg_per_kg")
+        if window is not None and (len(window) != 2 or float(window[0]) > float(window[1])):
+            raise ValueError(f"{drug}: mg_per_kg ต้องเป็น [ต่ำสุด, สูงสุด] (ได้ {window!r})")
+        self.lo, self.hi = (float(window[0]), float(window[1])) if window else (None, None)
+        self.calc_endpoint = spec.get("calc_endpoint")
+
+        self.route_msg = spec.get("route_msg") or f"Route ต้องเป็น {'/'.join(sorted(self.routes))}"
+        self.freq_msg = spec.get("freq_msg") or f"ความถี่ควรเป็น {'/'.join(sorted(self.freqs))}"
+        target = (spec.get("target") or f"{self.lo:g}–{self.hi:g} mg/kg") if window else ""
+        self.dose_msg = "dose เป้า " + target + " (ตอนนี้ {:.1f} mg/kg)"
+        self.pass_msg = spec.get("pass_msg") or f"{self.label} ผ่านเกณฑ์เบื้องต้น"
+
+    def check(self, order: dict) -> dict:
+        """
+        {"ok", "msg", "messages"} — msg = ข้อแรกที่ไม่ผ่าน (ลำดับ route → ความถี่ → mg/kg เหมือน checker เดิม)
+        messages = ทุกข้อที่ไม่ผ่าน ; ไม่ทราบน้ำหนักแต่ข้ออื่นผ่าน = ok พร้อมข้อความเตือน
+        """
+        messages = []
+        if self.routes and _key(order.get("route")) not in self.routes:
+            messages.append(self.route_msg)
+        if self.freqs and _key(order.get("freq")) not in self.freqs:
+            messages.append(self.freq_msg)
+
+        wt = (order.get("patient") or {}).get("weight_kg")
+        if self.lo is not None and wt:
+            mg_per_kg = float(order.get("dose_mg") or 0) / float(wt)
+            if not (self.lo <= mg_per_kg <= self.hi):
+                messages.append(self.dose_msg.format(mg_per_kg))
+
+        if messages:
+            return {"ok": False, "msg": messages[0], "messages": messages}
+        if self.lo is not None and not wt:
+            return {"ok": True, "msg": NO_WEIGHT_MSG, "messages": [NO_WEIGHT_MSG]}
+        return {"ok": True, "msg": self.pass_msg, "messages": []}
+
+
+class OrderVerifier:
+    def __init__(self, rules: dict, route_aliases: dict | None = None, freq_aliases: dict | None = None):
+        self.rules = rules
+        self.route_aliases = {_key(k): _key(v) for k, v in (route_aliases or {}).items()}
+        self.freq_aliases = {_key(k): _key(v) for k, v in (freq_aliases or {}).items()}
+        self.lookup = {}
+        for rule in rules.values():
+            for name in (rule.drug, *rule.aliases):
+                self.lookup.setdefault(name, rule)
+
+    # ---------- normalize ----------
+    def rule_for(self, drug) -> OrderRule | None:
+        return self.lookup.get(_key(drug))
+
+    def normalize_route(self, route) -> str:
+        r = _key(route)
+        return self.route_aliases.get(r, r)
+
+    def normalize_freq(self, freq) -> str:
+        f = _key(freq)
+        f = self.freq_aliases.get(f, f)
+        m = re.fullmatch(r"Q\s*(\d+)\s*(?:H|HR|HRS)", f)  # "q 8 hr" → Q8H
+        return f"Q{int(m.group(1))}H" if m else f
+
+    def normalize(self, order: dict, patient: dict | None = None) -> dict:
+        """order จาก client → รูปเดียวกับที่ OrderRule ใช้ (patient ของ batch ใช้เมื่อ order ไม่มีเอง)"""
+        pt = order.get("patient") or patient or {}
+        if not isinstance(pt, dict):
+            raise ValueError(f"patient ต้องเป็น object (ได้ {type(pt).__name__})")
+        wt = order.get("weight_kg", pt.get("weight_kg"))
+        return {
+            "drug": _key(order.get("drug")),
+            "dose_mg": float(order.get("dose_mg") or 0),
+            "route": self.normalize_route(order.get("route")),
+            "freq": self.normalize_freq(order.get("freq")),
+            "patient": {**pt, "weight_kg": float(wt) if wt not in (None, "") else None},
+        }
+
+    # ---------- verify ----------
+    def verify(self, order: dict) -> dict | None:
+        """None = ยังไม่รองรับยานี้"""
+        rule = self.rule_for(order.get("drug"))
+        return rule.check(order) if rule else None
+
+    def verify_many(self, orders, patient: dict | None = None) -> list[dict]:
+        results = []
+        for i, raw in enumerate(orders):
+            if not isinstance(raw, dict):
+                results.append({"index": i, "ok": False, "error": "order ต้องเป็น object"})
+                continue
+            try:
+                order = self.normalize(raw, patient)
+            except (TypeError, ValueError) as e:
+                results.append({"index": i, "drug": raw.get("drug"), "ok": False, "error": str(e)})
+                continue
+            rule = self.lookup.get(order["drug"])
+            if rule is None:
+                msg = f"ยังไม่รองรับการตรวจ {order['drug'] or '-'}"
+                results.append({"index": i, "drug": order["drug"], "supported": False,
+                                "ok": False, "msg": msg, "messages": [msg]})
+                continue
+            res = rule.check(order)
+            res.update(index=i, drug=rule.drug, supported=True)
+            results.append(res)
+        return results
+
+
+def load_order_rules(path=DEFAULT_PATH) -> OrderVerifier:
+    with open(path, encoding="utf-8") as f:
+        doc = json.load(f)
+    rules = {}
+    for drug, spec in doc["rules"].items():
+        rule = OrderRule(drug, spec)
+        rules[rule.drug] = rule
+    return OrderVerifier(rules, doc.get("route_aliases"), doc.get("freq_aliases"))
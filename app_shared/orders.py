@@ -0,0 +1,113 @@
+# app_shared/orders.py
+"""
+คำสั่งยาจากข้อความ (เช่นผล OCR ใบสั่งยา) → order แบบมีโครงสร้าง + ตรวจเบื้องต้น
+
+order = {"drug": "CEFOTAXIME", "dose_mg": 150.0, "route": "IV", "freq": "Q8H", "patient": {"weight_kg": 3.0}}
+- parse_order_line("Cefotaxime 150 mg IV q 8 hr") → order (None = บรรทัดนี้ไม่ใช่คำสั่งยา)
+- parse_orders(lines) → orders ทั้งหน้า ; บรรทัดน้ำหนัก (BW 1.2 kg / น้ำหนัก 1200 g) ใส่ให้ทุก order ในหน้า
+- verify_order(order) = เกณฑ์จาก data/order_rules.json (app_shared/order_rules.py)
+"""
+from __future__ import annotations
+
+import re
+
+from app_shared.order_rules import load_order_rules
+
+VERIFIER = load_order_rules()
+# ชื่อยา → ฟังก์ชันตรวจ (ชื่อเดิมจาก /verify ของแอปเก่า ; ตอนนี้ compile มาจากตาราง)
+CHECKERS = {drug: rule.check for drug, rule in VERIFIER.rules.items()}
+
+# ---------- parse ----------
+_UNIT_TO_MG = {"mg": 1.0, "g": 1000.0, "gm": 1000.0, "mcg": 0.001, "ug": 0.001, "µg": 0.001}
+
+_DOSE_RE = re.compile(r"(\d+(?:[.,]\d+)?)\s*(mg|mcg|ug|µg|gm|g)\b", re.I)
+_ROUTE_RE = re.compile(r"\b(IV|IM|PO|SC|SQ|NG|OG|oral|iv\s*push)\b", re.I)
+_FREQ_RE = re.compile(
+    r"\b(?:q\s*(\d+)\s*(?:h|hr|hrs|hours?)\b|every\s+(\d+)\s*(?:h|hr|hrs|hours?)\b"
+    r"|(od|bid|tid|qid|stat|prn|once\s+daily))",
+    re.I,
+)
+_WEIGHT_RE = re.compile(
+    r"(?:\bBW\b|\bwt\b|weight|นน\.?|น้ำหนัก)\s*[:=]?\s*(\d+(?:[.,]\d+)?)\s*(kg|g|gm|กก\.?|กรัม)?",
+    re.I,
+)
+
+_DRUG_NOISE = {"INJ", "INJECTION", "RX", "GIVE"}
+
+
+def _num(s: str) -> float:
+    return float(s.replace(",", "."))
+
+
+def parse_weight(line: str) -> float | None:
+    """"BW 1.2 kg" / "น้ำหนัก 1200 g" → kg ; ไม่มีหน่วย: ค่า > 20 ถือเป็นกรัม"""
+    m = _WEIGHT_RE.search(line or "")
+    if not m:
+        return None
+    value, unit = _num(m.group(1)), (m.group(2) or "").lower()
+    if unit in ("g", "gm", "กรัม") or (not unit and value > 20):
+        value /= 1000.0
+    return round(value, 3)
+
+
+def canon_drug(text: str) -> str:
+    words = [w for w in re.sub(r"[^A-Za-z\s\-]", " ", text or "").upper().split() if w not in _DRUG_NOISE]
+    for w in words:  # มีชื่อ/ชื่อการค้าที่รู้จักอยู่ในบรรทัด (เช่น "Amikin (amikacin)") → ใช้ชื่อยาหลัก
+        rule = VERIFIER.rule_for(w)
+        if rule is not None:
+            return rule.drug
+    return " ".join(words).strip(" -")
+
+
+def parse_order_line(line: str) -> dict | None:
+    text = " ".join((line or "").split())
+    if _WEIGHT_RE.match(text):  # "Weight 3000 g" ไม่ใช่คำสั่งยา
+        return None
+    dose = _DOSE_RE.search(text)
+    if not dose:
+        return None
+
+    drug = canon_drug(text[: dose.start()])
+    if len(drug) < 3:
+        return None
+
+    order = {
+        "drug": drug,
+        "dose_mg": round(_num(dose.group(1)) * _UNIT_TO_MG[dose.group(2).lower()], 4),
+        "route": "",
+        "freq": "",
+    }
+    rest = text[dose.end():]
+    m = _ROUTE_RE.search(rest)
+    if m:
+        order["route"] = VERIFIER.normalize_route(m.group(1))
+    m = _FREQ_RE.search(rest)
+    if m:
+        hours = m.group(1) or m.group(2)
+        order["freq"] = f"Q{int(hours)}H" if hours else VERIFIER.normalize_freq(m.group(3))
+    return order
+
+
+def parse_orders(lines, weight_kg: float | None = None) -> list[dict]:
+    """ทุกบรรทัดของหน้า → orders (มี "line" = ข้อความต้นฉบับ) ; weight_kg ที่ส่งมา override ค่าในหน้า"""
+    orders = []
+    page_weight = None
+    for line in lines:
+        order = parse_order_line(line)
+        if order is None:
+            w = parse_weight(line)
+            if w is not None and page_weight is None:
+                page_weight = w
+            continue
+        order["line"] = line
+        orders.append(order)
+
+    wt = weight_kg if weight_kg is not None else page_weight
+    for order in orders:
+        order["patient"] = {"weight_kg": wt}
+    return orders
+
+
+def verify_order(order: dict) -> dict | None:
+    """{"ok", "msg", "messages"} ; None = ยังไม่รองรับยานี้"""
+    return VERIFIER.verify(order)
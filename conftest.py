@@ -3,8 +3,10 @@ from app import create_app
 from extensions import db
 
 @pytest.fixture()
-def app():
+def app(tmp_path):
     app = create_app(testing=True)
+    # version file ของ compat matrix ไม่เขียนลง instance/ ของ repo
+    app.config["COMPAT_VERSION_FILE"] = str(tmp_path / "compat.version")
     with app.app_context():
         yield app
 
@@ -0,0 +1,33 @@
+"""drug: covering index on lower(generic_name)
+
+Revision ID: 3c8e1d2b9a47
+Revises: fad29267d054
+Create Date: 2026-10-18 10:12:41.118302
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3c8e1d2b9a47'
+down_revision = 'fad29267d054'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # import-compat (ทีละแถว) / seed_drugs_only: SELECT drug.* WHERE lower(generic_name) = ?
+    # generic_name + brand_name อยู่ใน index ด้วย (ครบทุกคอลัมน์ของ Drug) → lookup อ่านจาก index อย่างเดียว
+    op.create_index(
+        'ix_drug_lower_generic_name',
+        'drug',
+        [sa.text('lower(generic_name)'), 'generic_name', 'brand_name'],
+        unique=False,
+    )
+    if op.get_bind().dialect.name == 'sqlite':
+        op.execute('ANALYZE')  # ให้ query planner มีสถิติของ index ใหม่
+
+
+def downgrade():
+    op.drop_index('ix_drug_lower_generic_name', table_name='drug')
@@ -1,4 +1,6 @@
 # models.py
+from datetime import datetime
+
 from sqlalchemy import event
 from app import db   # หรือจากที่โปรเจกต์ใช้จริง
 
@@ -6,8 +8,28 @@ class Drug(db.Model):
     __tablename__ = "drug"
     id = db.Column(db.Integer, primary_key=True)
     generic_name = db.Column(db.String(128), unique=True, nullable=False)
+    brand_name = db.Column(db.String(255), nullable=True)
     # ...
 
+
+# flask import-compat (ทีละแถว) / seed_drugs_only.py: Drug.query.filter(lower(generic_name) == ?).first()
+# → index บน expression + ทุกคอลัมน์ของ Drug (id = rowid) → covering: ไม่ต้องกลับไปอ่านตาราง
+# (/api/drugs ค้นจาก DrugSearchIndex ในหน่วยความจำแล้ว ไม่ได้ใช้ index นี้)
+db.Index("ix_drug_lower_generic_name", db.func.lower(Drug.generic_name), Drug.generic_name, Drug.brand_name)
+
+
+class AccessLog(db.Model):
+    """log การเรียกหน้า compatibility (ตาราง access_log ใน migration fad29267d054)"""
+    __tablename__ = "access_log"
+
+    id = db.Column(db.Integer, primary_key=True)
+    endpoint = db.Column(db.String(255))
+    method = db.Column(db.String(16))
+    remote_addr = db.Column(db.String(64))
+    user_agent = db.Column(db.String(255))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
 class Compatibility(db.Model):
     __tablename__ = "compatibility"
 
@@ -2,6 +2,7 @@
 from flask import Blueprint, render_template, request, flash
 from extensions import db
 from models import Drug, Compatibility
+from app_shared.med_catalog import build_ctx_for_admin_page
 
 bp = Blueprint("core", __name__)
 
@@ -99,59 +100,8 @@ def compatibility_page():
 @bp.route("/medication", endpoint="medication_administration")
 def medication_administration():
     UPDATE_DATE = globals().get("UPDATE_DATE", "N/A")
-    meds = [
-        {"label": "Acyclovir", "endpoint": "acyclovir_route"},
-        {"label": "Amikacin", "endpoint": "amikin_route"},
-        {"label": "Aminophylline", "endpoint": "aminophylline_route", "danger": True},
-        {"label": "Amoxicillin / Clavimoxy", "endpoint": "amoxicillin_clavimoxy_route"},
-        {"label": "Amphotericin B", "endpoint": "amphotericinB_route"},
-        {"label": "Ampicillin", "endpoint": "ampicillin_route"},
-        {"label": "Benzathine penicillin G", "endpoint": "benzathine_penicillin_g_route"},
-        {"label": "Cefazolin", "endpoint": "cefazolin_route"},
-        {"label": "Cefotaxime", "endpoint": "cefotaxime_route"},
-        {"label": "Ceftazidime", "endpoint": "ceftazidime_route"},
-        {"label": "Ciprofloxacin", "endpoint": "ciprofloxacin_route"},
-        {"label": "Clindamycin", "endpoint": "clindamycin_route"},
-        {"label": "Cloxacillin", "endpoint": "cloxacillin_route"},
-        {"label": "Colistin", "endpoint": "colistin_route"},
-        {"label": "Dexamethasone", "endpoint": "dexamethasone_route"},
-        {"label": "Dobutamine", "endpoint": "dobutamine_route", "danger": True},
-        {"label": "Dopamine", "endpoint": "dopamine_route", "danger": True},
-        {"label": "Fentanyl", "endpoint": "fentanyl_route", "danger": True},
-        {"label": "Furosemide", "endpoint": "furosemide_route"},
-        {"label": "Gentamicin", "endpoint": "gentamicin_route"},
-        {"label": "Hydrocortisone", "endpoint": "hydrocortisone_route"},
-        {"label": "Insulin Human Regular", "endpoint": "insulin_route"},
-        {"label": "Levofloxacin", "endpoint": "levofloxacin_route"},
-        {"label": "Meropenem", "endpoint": "meropenem_route"},
-        {"label": "Metronidazole (Flagyl)", "endpoint": "metronidazole"},
-        {"label": "Midazolam", "endpoint": "midazolam_route", "danger": True},
-        {"label": "Midazolam + Fentanyl", "endpoint": "midazolam_fentanyl_route", "danger": True},
-        {"label": "Morphine", "endpoint": "morphine_route", "danger": True},
-        {"label": "Nimbex (Cisatracurium)", "endpoint": "nimbex_route"},
-        {"label": "Omeprazole", "endpoint": "omeprazole_route"},
-        {"label": "Penicillin G sodium", "endpoint": "penicillin_g_sodium_route"},
-        {"label": "Phenobarbital", "endpoint": "phenobarbital_route"},
-        {"label": "Phenytoin (Dilantin)", "endpoint": "phenytoin_route"},
-        {"label": "Remdesivir", "endpoint": "remdesivir_route"},
-        {"label": "Sul-am®", "endpoint": "sul_am_route"},
-        {"label": "Sulbactam", "endpoint": "sulbactam_route"},
-        {"label": "Sulperazone", "endpoint": "sulperazone_route"},
-        {"label": "Tazocin", "endpoint": "tazocin_route"},
-        {"label": "Unasyn", "endpoint": "unasyn_route"},
-        {"label": "Vancomycin", "endpoint": "vancomycin_route"},
-    ]
-    from collections import defaultdict
-    groups = defaultdict(list)
-    for m in meds:
-        groups[m["label"][0].upper()].append(m)
-    for k in groups:
-        groups[k].sort(key=lambda x: x["label"].lower())
-    groups = dict(sorted(groups.items()))
-    letters = list(groups.keys())
     return render_template("Medication_administration.html",
-                           groups=groups, letters=letters, meds=meds,
-                           update_date=UPDATE_DATE)
+                           update_date=UPDATE_DATE, **build_ctx_for_admin_page())
 
 
 @bp.route("/time-management", endpoint="time_management_route")
@@ -1,13 +1,18 @@
 # routes/routes_compatibility.py
-import json
+import os
 import re
 import string
+import threading
+import time
 from collections import OrderedDict
+from itertools import chain, islice
+from datetime import datetime
 from pathlib import Path
 
 from flask import (
     Blueprint,
     current_app,
+    has_app_context,
     jsonify,
     redirect,
     render_template,
@@ -16,7 +21,14 @@ from flask import (
 )
 from flask.cli import with_appcontext
 import click
-
+from sqlalchemy import event, insert
+from sqlalchemy.orm import Session
+
+from app_shared.compat_matrix import CompatMatrix, MatrixHolder
+from app_shared.compat_snapshot import CompatSnapshot, write_snapshot
+from app_shared.drug_search import DrugSearchIndex
+from app_shared.compat_sources import iter_compat_records
+from app_shared.log_sink import AccessLogSink
 from extensions import db
 from models import Drug, Compatibility, AccessLog
 
@@ -37,12 +49,18 @@ def _norm_txt(s: str) -> str:
     return " ".join((s or "").strip().lower().split())
 
 
+# ชื่อที่สะกดผิดบ่อย → ชื่อที่ถูก (ใช้ทั้งตอน import และเป็น alias ของการค้นหา /api/drugs)
+NAME_FIXES = {"meropenam": "meropenem"}
+NAME_SUFFIXES = (" small dose", " continuous")
+
+
 def canonicalize_name(s: str) -> str:
     if not s:
         return ""
     low = re.sub(r"\s+", " ", s.strip().lower())
-    low = low.replace("meropenam", "meropenem")
-    for bad in (" small dose", " continuous"):
+    for wrong, right in NAME_FIXES.items():
+        low = low.replace(wrong, right)
+    for bad in NAME_SUFFIXES:
         if low.endswith(bad):
             low = low[: -len(bad)]
     return low
@@ -88,24 +106,23 @@ def load_pair_meta():
         return meta_map
 
     try:
-        items = json.loads(p.read_text(encoding="utf-8"))
+        for rec in iter_compat_records(p):
+            a = _norm_txt(rec.drug_a)
+            b = _norm_txt(rec.drug_b)
+            if not a or not b or a == b:
+                continue
+            # seed ใช้ drug_a/drug_b + note_th/reference (record normalize key ให้แล้ว)
+            payload = {
+                "en": rec.raw.get("note_en") or rec.raw.get("en"),
+                "th": rec.raw.get("note_th") or rec.raw.get("th"),
+                "detail": rec.raw.get("detail"),
+                "note": rec.note,
+                "reference": rec.source,
+            }
+            k = (min(a, b), max(a, b))
+            meta_map[k] = payload
     except Exception:
-        _pair_meta_cache = meta_map
-        return meta_map
-
-    for it in items:
-        a = _norm_txt(it.get("drug", ""))
-        b = _norm_txt(it.get("co_drug", ""))
-        if not a or not b or a == b:
-            continue
-        payload = {
-            "en": it.get("en"),
-            "th": it.get("th"),
-            "detail": it.get("detail"),
-            "note": it.get("note"),
-        }
-        k = (min(a, b), max(a, b))
-        meta_map[k] = payload
+        meta_map = {}
 
     _pair_meta_cache = meta_map
     return meta_map
@@ -118,33 +135,170 @@ def get_pair_meta(name_a: str, name_b: str):
     return load_pair_meta().get((min(a, b), max(a, b)))
 
 
-# ------------ Drug helpers ------------
+# ===== in-memory compatibility matrix (โหลดครั้งเดียว / สลับทั้งก้อนเมื่อข้อมูลเปลี่ยน) =====
 
 
-def get_all_drugs_for_select():
+def _load_compat_matrix(version: int = 0) -> CompatMatrix:
+    drugs = db.session.query(Drug.id, Drug.generic_name, Drug.brand_name).all()
+    rows = db.session.query(
+        Compatibility.drug_id,
+        Compatibility.co_drug_id,
+        Compatibility.status,
+        Compatibility.source,
+        Compatibility.note,
+    ).all()
+    pairs = (
+        (a_id, b_id, status_to_code(status), status, source, note)
+        for a_id, b_id, status, source, note in rows
+    )
+    return CompatMatrix(
+        drugs,
+        pairs,
+        meta_map=load_pair_meta(),
+        canon=canonicalize_name,
+        norm=_norm_txt,
+        version=version,
+    )
+
+
+def _version_file() -> Path:
+    return Path(current_app.config.get("COMPAT_VERSION_FILE") or Path(current_app.instance_path) / "compat.version")
+
+
+def _bump_compat_version() -> None:
+    """บอก process อื่น (gunicorn worker ตัวอื่น / CLI) ว่าข้อมูล compat เปลี่ยนแล้ว"""
+    path = _version_file()
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_text(f"{time.time_ns()}-{os.getpid()}", encoding="utf-8")
+        os.replace(tmp, path)
+    except OSError:
+        current_app.logger.warning("เขียน %s ไม่ได้: worker อื่นจะเห็นข้อมูลใหม่จาก stamp ของ DB เท่านั้น", path)
+
+
+def _compat_stamp() -> tuple:
     """
-    ดึงรายชื่อยาทั้งหมดจากตาราง Drug
-    ใช้ field ไหนก็ได้ที่มีค่า (generic_name > name > title > drug)
+    ค่าที่เปลี่ยนเมื่อข้อมูล compat เปลี่ยนจาก process ใดก็ได้:
+    - version file (เขียนหลัง commit / import ของแอปนี้ ; ครอบคลุมการ update แถวเดิม)
+    - count + max(id) ของทั้งสองตาราง (ครอบคลุมการเพิ่ม/ลบแถวจากเครื่องมืออื่น)
     """
-    rows = Drug.query.order_by(db.func.lower(Drug.generic_name)).all()
+    try:
+        token = _version_file().read_text(encoding="utf-8")
+    except OSError:
+        token = None
+    drugs = db.session.query(db.func.count(Drug.id), db.func.max(Drug.id)).one()
+    pairs = db.session.query(db.func.count(Compatibility.id), db.func.max(Compatibility.id)).one()
+    return token, tuple(drugs), tuple(pairs)
 
-    meds = []
-    for d in rows:
-        label = (
-            d.generic_name
-            or getattr(d, "name", None)
-            or getattr(d, "drug", None)
-            or getattr(d, "title", None)
-            or f"ID {d.id}"
-        )
-        meds.append({"id": d.id, "generic_name": label})
 
-    return meds
+def _matrix_holder() -> MatrixHolder:
+    holder = current_app.extensions.get("compat_matrix")
+    if holder is None:
+        holder = current_app.extensions.setdefault("compat_matrix", MatrixHolder(
+            stamp=_compat_stamp,
+            check_interval=current_app.config.get("COMPAT_CHECK_INTERVAL", 2.0),
+        ))
+    return holder
+
+
+_snapshot_lock = threading.Lock()
+
+
+def _compat_snapshot() -> CompatSnapshot | None:
+    """
+    COMPAT_SNAPSHOT = path ของไฟล์จาก `flask compat export-snapshot` → อ่านจากไฟล์ (mmap) แทน DB
+    ไฟล์ไม่เปลี่ยนระหว่างที่แอปทำงาน (เปลี่ยนเมื่อ deploy ใหม่)
+    """
+    path = current_app.config.get("COMPAT_SNAPSHOT")
+    if not path:
+        return None
+    snap = current_app.extensions.get("compat_snapshot")
+    if snap is not None:
+        return snap
+
+    with _snapshot_lock:
+        snap = current_app.extensions.get("compat_snapshot")
+        if snap is None:
+            snap = current_app.extensions["compat_snapshot"] = CompatSnapshot(path)
+    return snap
+
+
+def get_compat_matrix() -> CompatMatrix | CompatSnapshot:
+    return _compat_snapshot() or _matrix_holder().get(_load_compat_matrix)
+
+
+def get_drug_search() -> tuple:
+    """
+    (matrix, index) — index ค้นชื่อยาคู่กับ matrix ที่ใช้สร้าง (matrix ถูกสลับเมื่อข้อมูลเปลี่ยน → สร้าง index ใหม่ตาม)
+    ผู้เรียกต้องอ่าน ids/names จาก matrix ในคู่นี้ ไม่ใช่เรียก get_compat_matrix() ซ้ำ (อาจได้ตัวใหม่กว่า index)
+    """
+    m = get_compat_matrix()
+    cached = current_app.extensions.get("drug_search")
+    if cached is None or cached[0] is not m:
+        index = DrugSearchIndex(m.names, m.brands, m.by_name, aliases=NAME_FIXES, canon=canonicalize_name)
+        cached = current_app.extensions["drug_search"] = (m, index)
+    return cached
+
+
+def compat_dataset_version() -> str:
+    """digest ของข้อมูล compat ชุดที่ตอบอยู่ (ใช้ทำ ETag ของหน้า/API compat)"""
+    return get_compat_matrix().digest
+
+
+@compat_bp.record_once
+def _conditional_get(state):
+    # ทุกหน้า GET ของ compat ขึ้นกับข้อมูลยา → ETag รวม digest ของ dataset
+    cache = state.app.extensions.get("http_cache")
+    if cache is not None:
+        for endpoint in ("compat_index", "compat_result", "api_compatibility", "api_drugs"):
+            cache.register(f"{compat_bp.name}.{endpoint}", dataset=compat_dataset_version)
+
+
+def refresh_compat_matrix() -> None:
+    """ให้ request ถัดไป build matrix ใหม่ — ทั้ง process นี้และ process อื่น (เรียกหลัง import / แก้ข้อมูลยา)"""
+    _matrix_holder().invalidate()
+    _bump_compat_version()
+
+
+@event.listens_for(Session, "after_flush")
+def _mark_compat_change(session, flush_context):
+    # จดไว้ก่อน — ยัง invalidate ไม่ได้ (ถ้า build ตอนนี้จะเห็นแถวที่ยังไม่ commit)
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, (Drug, Compatibility)):
+            session.info["compat_changed"] = True
+            return
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_matrix_on_commit(session):
+    if session.info.pop("compat_changed", False) and has_app_context():
+        refresh_compat_matrix()
+
+
+@event.listens_for(Session, "after_rollback")
+def _invalidate_matrix_on_rollback(session):
+    # matrix อาจถูก build ระหว่าง transaction (เห็นแถวที่ถูก rollback ไปแล้ว) → build ใหม่ใน process นี้
+    if session.info.pop("compat_changed", False) and has_app_context():
+        _matrix_holder().invalidate()
+
+
+# ------------ Drug helpers ------------
+
+
+def get_all_drugs_for_select():
+    """
+    ดึงรายชื่อยาทั้งหมด (เรียงตามชื่อ) จาก CompatMatrix ที่โหลดไว้แล้ว
+    """
+    m = get_compat_matrix()
+    return [
+        {"id": m.ids[i], "generic_name": m.names[i] or f"ID {m.ids[i]}"}
+        for i in m.by_name
+    ]
 
 
 def get_drug_name(drug_id: int):
-    row = Drug.query.get(drug_id)
-    return row.generic_name if row and row.generic_name else (row.name if row else None)
+    return get_compat_matrix().name_of(drug_id)
 
 
 def group_meds_by_letter(
@@ -190,19 +344,59 @@ def group_meds_by_letter(
 
 
 # ===== Logging =====
+_sink_lock = threading.Lock()
+
+
+def _access_log_sink() -> AccessLogSink:
+    """
+    sink ของแอปนี้ (สร้างครั้งแรกที่ใช้)
+    config: ACCESS_LOG_QUEUE_SIZE / ACCESS_LOG_BATCH_SIZE / ACCESS_LOG_FLUSH_MS / ACCESS_LOG_OVERFLOW
+    """
+    sink = current_app.extensions.get("access_log_sink")
+    if sink is not None:
+        return sink
+
+    with _sink_lock:
+        sink = current_app.extensions.get("access_log_sink")
+        if sink is None:
+            cfg = current_app.config
+            engine = db.engine
+            table = AccessLog.__table__
+
+            def write_batch(rows):
+                with engine.begin() as conn:
+                    conn.execute(table.insert(), rows)
+
+            sink = AccessLogSink(
+                write_batch,
+                max_queue=cfg.get("ACCESS_LOG_QUEUE_SIZE", 10000),
+                batch_size=cfg.get("ACCESS_LOG_BATCH_SIZE", 100),
+                flush_ms=cfg.get("ACCESS_LOG_FLUSH_MS", 500),
+                overflow=cfg.get("ACCESS_LOG_OVERFLOW", "drop"),
+            ).start()
+            current_app.extensions["access_log_sink"] = sink
+    return sink
+
+
 @compat_bp.before_app_request
 def log_request():
     if request.blueprint != compat_bp.name:
         return
 
-    log = AccessLog(
-        endpoint=request.path,
-        method=request.method,
-        remote_addr=request.remote_addr,
-        user_agent=request.user_agent.string,
-    )
-    db.session.add(log)
-    db.session.commit()
+    row = {
+        "endpoint": request.path,
+        "method": request.method,
+        "remote_addr": request.remote_addr,
+        "user_agent": request.user_agent.string,
+        "created_at": datetime.utcnow(),
+    }
+
+    if not current_app.config.get("ACCESS_LOG_ASYNC", True):
+        db.session.add(AccessLog(**row))
+        db.session.commit()
+        return
+
+    _access_log_sink().submit(row)
 
 
 # ================== Views (UI) ==================
@@ -255,18 +449,17 @@ def compat_result():
     if not drug_a_id or not drug_b_id:
         return redirect(url_for("compat.compat_index"))
 
-    a_id, b_id = sorted([drug_a_id, drug_b_id])
-    compat = Compatibility.query.filter_by(drug_id=a_id, co_drug_id=b_id).first()
+    pair = get_compat_matrix().pair(drug_a_id, drug_b_id)
 
-    drug_a_name = get_drug_name(drug_a_id) or f"ID {drug_a_id}"
-    drug_b_name = get_drug_name(drug_b_id) or f"ID {drug_b_id}"
+    drug_a_name = pair["drug_a_name"] or f"ID {drug_a_id}"
+    drug_b_name = pair["drug_b_name"] or f"ID {drug_b_id}"
 
-    meta = get_pair_meta(drug_a_name, drug_b_name)
+    meta = pair["meta"]
 
-    raw_status = compat.status if compat else "ND"
-    code = status_to_code(raw_status)
+    raw_status = pair["status"]
+    code = pair["code"]
 
-    note = compat.note if compat and compat.note else ""
+    note = pair["note"] or ""
 
     return render_template(
         "compatibility_result.html",
@@ -291,47 +484,221 @@ def api_compatibility():
     if not drug_a_id or not drug_b_id:
         return jsonify({"error": "missing drug_a or drug_b"}), 400
 
-    a_id, b_id = sorted([drug_a_id, drug_b_id])
-    compat = Compatibility.query.filter_by(drug_id=a_id, co_drug_id=b_id).first()
+    pair = get_compat_matrix().pair(drug_a_id, drug_b_id)
 
-    drug_a_name = get_drug_name(drug_a_id)
-    drug_b_name = get_drug_name(drug_b_id)
+    return jsonify(
+        {
+            "drug_a": {"id": drug_a_id, "name": pair["drug_a_name"]},
+            "drug_b": {"id": drug_b_id, "name": pair["drug_b_name"]},
+            "status": pair["status"],
+            "source": pair["source"],
+            "note": pair["note"],
+            "meta": pair["meta"],
+        }
+    )
 
-    meta = get_pair_meta(drug_a_name or "", drug_b_name or "")
+
+MAX_SET_SIZE = 50
+
+
+@compat_bp.post("/api/compatibility/set")
+def api_compatibility_set():
+    """
+    ตรวจยาหลายตัวที่ให้ร่วมสายเดียวกันใน request เดียว
+
+    body (JSON): {"drugs": [1, 5, "vancomycin", ...]}  (id หรือชื่อยาก็ได้)
+    คืน sub-matrix ของทุกคู่ + สถานะที่แย่ที่สุด + meta ของแต่ละคู่
+    """
+    payload = request.get_json(silent=True) or {}
+    items = payload.get("drugs")
+    if items is None:
+        items = request.form.getlist("drugs")
+    if not isinstance(items, list) or not items:
+        return jsonify({"error": "missing drugs"}), 400
+    if len(items) > MAX_SET_SIZE:
+        return jsonify({"error": f"too many drugs (max {MAX_SET_SIZE})"}), 400
+
+    m = get_compat_matrix()
+
+    indices = []
+    unknown = []
+    for item in items:
+        key = item if isinstance(item, int) else canonicalize_name(str(item))
+        i = m.index_of(key)
+        if i is None:
+            unknown.append(item)
+        elif i not in indices:
+            indices.append(i)
+
+    if len(indices) < 2:
+        return jsonify({"error": "need at least 2 known drugs", "unknown": unknown}), 400
+
+    grid, worst = m.submatrix(indices)
+
+    pairs = []
+    for r in range(len(indices)):
+        for c in range(r + 1, len(indices)):
+            a_id, b_id = m.ids[indices[r]], m.ids[indices[c]]
+            pair = m.pair(a_id, b_id)
+            pairs.append(
+                {
+                    "drug_a": a_id,
+                    "drug_b": b_id,
+                    "code": pair["code"],
+                    "status": pair["status"],
+                    "source": pair["source"],
+                    "note": pair["note"],
+                    "meta": pair["meta"],
+                }
+            )
 
     return jsonify(
         {
-            "drug_a": {"id": drug_a_id, "name": drug_a_name},
-            "drug_b": {"id": drug_b_id, "name": drug_b_name},
-            "status": compat.status if compat else "ND",
-            "source": compat.source if compat else None,
-            "note": compat.note if compat else None,
-            "meta": meta,
+            "drugs": [{"id": m.ids[i], "name": m.names[i]} for i in indices],
+            "unknown": unknown,
+            "codes": grid,
+            "worst": worst,
+            "pairs": pairs,
         }
     )
 
 
 @compat_bp.get("/api/drugs")
 def api_drugs():
+    """autocomplete: ชื่อ generic / brand / ชื่อที่สะกดผิด เรียงจากตรงที่สุด (ดู app_shared/drug_search.py)"""
     q = request.args.get("q", "", type=str).strip()
-    query = Drug.query
-    if q:
-        like = f"%{q.lower()}%"
-        query = query.filter(db.func.lower(Drug.generic_name).like(like))
-
-    rows = query.order_by(db.func.lower(Drug.generic_name)).limit(50).all()
+    m, index = get_drug_search()
     return jsonify(
         [
             {
-                "id": d.id,
-                "generic_name": d.generic_name,
-                "brand_name": d.brand_name,
+                "id": m.ids[i],
+                "generic_name": m.names[i],
+                "brand_name": m.brands[i],
             }
-            for d in rows
+            for i in index.search(q, limit=50)
         ]
     )
 
 
+# ================== Bulk import (set-based) ==================
+
+
+def _upsert_stmt():
+    """INSERT ... ON CONFLICT(drug_id, co_drug_id) DO UPDATE ตาม dialect ที่ใช้อยู่"""
+    dialect = db.engine.dialect.name
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    elif dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    else:
+        raise RuntimeError(f"bulk import ยังไม่รองรับฐานข้อมูล {dialect}")
+
+    stmt = dialect_insert(Compatibility.__table__)
+    return stmt.on_conflict_do_update(
+        index_elements=["drug_id", "co_drug_id"],
+        set_={
+            "status": stmt.excluded.status,
+            "source": stmt.excluded.source,
+            "note": stmt.excluded.note,
+        },
+    )
+
+
+def bulk_import_compat_rows(records, chunk_size: int = 5000) -> dict:
+    """
+    import คู่ยาทั้งชุด (iterable ของ CompatRecord) ด้วย query จำนวนคงที่ต่อ chunk (ไม่ใช่ N+1):
+    1) โหลดยาทั้งหมดเป็น dict {canonical name: id} (จำนวนยาหลักร้อย — ไม่โตตามขนาดไฟล์)
+    2) อ่าน records ทีละ chunk_size แถว → insert ยาที่ยังไม่มีของ chunk นั้นในครั้งเดียว
+    3) โหลดสถานะเดิมเฉพาะคู่ที่อยู่ใน chunk แล้ว upsert ต่อ 1 transaction
+
+    หน่วยความจำ ~ chunk_size แถว (ไม่ขึ้นกับขนาดไฟล์) ; นับ created/updated/skipped แบบเดียวกับ import ทีละแถว
+    """
+    counts = {"created_drugs": 0, "created_pairs": 0, "updated_pairs": 0, "skipped_rows": 0, "rows": 0}
+
+    drug_ids = {}
+    for drug_id, name in db.session.query(Drug.id, Drug.generic_name):
+        drug_ids.setdefault(canonicalize_name(name), drug_id)
+
+    stmt = None
+    it = iter(records)
+    step = max(1, int(chunk_size))
+    while True:
+        chunk = list(islice(it, step))
+        if not chunk:
+            break
+        counts["rows"] += len(chunk)
+
+        parsed = []
+        for rec in chunk:
+            name_a = canonicalize_name(rec.drug_a)
+            name_b = canonicalize_name(rec.drug_b)
+            if not name_a or not name_b or name_a == name_b:
+                counts["skipped_rows"] += 1
+                continue
+            parsed.append((name_a, name_b, status_to_code(rec.status), rec.source, rec.note))
+
+        missing = []
+        for name_a, name_b, *_ in parsed:
+            for name in (name_a, name_b):
+                if name not in drug_ids:
+                    drug_ids[name] = None
+                    missing.append(name)
+        if missing:
+            db.session.execute(insert(Drug), [{"generic_name": n} for n in missing])
+            db.session.commit()
+            counts["created_drugs"] += len(missing)
+            for drug_id, name in db.session.query(Drug.id, Drug.generic_name).filter(
+                Drug.generic_name.in_(missing)
+            ):
+                drug_ids[name] = drug_id
+
+        keys = [tuple(sorted((drug_ids[a], drug_ids[b]))) for a, b, *_ in parsed]
+        if not keys:
+            continue
+
+        # สถานะเดิมของคู่ใน chunk นี้ (กรองด้วย id ยา → parameter ไม่เกินจำนวนยา)
+        wanted = set(keys)
+        state = {}
+        for a_id, b_id, status, source, note in db.session.query(
+            Compatibility.drug_id,
+            Compatibility.co_drug_id,
+            Compatibility.status,
+            Compatibility.source,
+            Compatibility.note,
+        ).filter(
+            Compatibility.drug_id.in_({k[0] for k in wanted}),
+            Compatibility.co_drug_id.in_({k[1] for k in wanted}),
+        ):
+            if (a_id, b_id) in wanted:
+                state[(a_id, b_id)] = (status, source, note)
+
+        pending = {}
+        for key, (_a, _b, code, source, note) in zip(keys, parsed):
+            new_state = (code, source, note)
+            old_state = state.get(key)
+            if old_state is None:
+                counts["created_pairs"] += 1
+            elif old_state != new_state:
+                counts["updated_pairs"] += 1
+            state[key] = new_state
+            if old_state != new_state:
+                pending[key] = new_state
+
+        if pending:
+            if stmt is None:
+                stmt = _upsert_stmt()
+            db.session.execute(
+                stmt,
+                [
+                    {"drug_id": a_id, "co_drug_id": b_id, "status": code, "source": source, "note": note}
+                    for (a_id, b_id), (code, source, note) in pending.items()
+                ],
+            )
+            db.session.commit()
+
+    return counts
+
+
 # ================== CLI import command ==================
 
 
@@ -343,25 +710,56 @@ def api_drugs():
     default=False,
     help="ลบข้อมูล Compatibility เดิมทั้งหมดก่อน import",
 )
+@click.option(
+    "--bulk",
+    is_flag=True,
+    default=False,
+    help="import แบบ set-based: โหลดยาทั้งหมดครั้งเดียว + upsert คู่ยาเป็นชุด",
+)
+@click.option(
+    "--chunk-size",
+    type=int,
+    default=5000,
+    show_default=True,
+    help="จำนวนคู่ยาต่อ transaction (ใช้กับ --bulk)",
+)
 @with_appcontext
-def import_compat_json(json_file: str, truncate: bool):
+def import_compat_json(json_file: str, truncate: bool, bulk: bool, chunk_size: int):
     path = Path(json_file)
     if not path.exists():
         click.echo(f"[ERROR] ไม่พบไฟล์: {path}")
         return
 
     click.echo(f"อ่านไฟล์: {path}")
-    data = json.loads(path.read_text(encoding="utf-8"))
+    records = iter_compat_records(path)
 
-    if not isinstance(data, list):
-        click.echo("[ERROR] ไฟล์ JSON ต้องเป็น list ของ objects (rows)")
+    # อ่าน record แรกก่อน เพื่อตรวจรูปแบบไฟล์ก่อนจะลบข้อมูลเดิม
+    try:
+        first = next(records, None)
+    except ValueError as e:
+        click.echo(f"[ERROR] {e}")
         return
+    data = chain([first], records) if first is not None else iter(())
 
     if truncate:
         click.echo("ลบ Compatibility เดิมทั้งหมด...")
         Compatibility.query.delete()
         db.session.commit()
 
+    if bulk:
+        started = time.perf_counter()
+        stats = bulk_import_compat_rows(data, chunk_size=chunk_size)
+        elapsed = time.perf_counter() - started
+        refresh_compat_matrix()
+        click.echo("✅ Import summary (bulk):")
+        click.echo(f"  Drugs created : {stats['created_drugs']}")
+        click.echo(f"  Pairs created : {stats['created_pairs']}")
+        click.echo(f"  Pairs updated : {stats['updated_pairs']}")
+        click.echo(f"  Rows skipped  : {stats['skipped_rows']}")
+        rows = stats["rows"]
+        click.echo(f"  Rows/second   : {rows / elapsed if elapsed > 0 else rows:,.0f}")
+        return
+
     created_drugs = 0
     created_pairs = 0
     updated_pairs = 0
@@ -370,9 +768,9 @@ def import_compat_json(json_file: str, truncate: bool):
     def _status_to_code(s: str) -> str:
         return status_to_code(s)
 
-    for row in data:
-        name_a = canonicalize_name(row.get("drug"))
-        name_b = canonicalize_name(row.get("co_drug"))
+    for rec in data:
+        name_a = canonicalize_name(rec.drug_a)
+        name_b = canonicalize_name(rec.drug_b)
         if not name_a or not name_b or name_a == name_b:
             skipped_rows += 1
             continue
@@ -396,9 +794,9 @@ def import_compat_json(json_file: str, truncate: bool):
         db.session.flush()
         a_id, b_id = sorted([drug_a.id, drug_b.id])
 
-        code = _status_to_code(row.get("status"))
-        source = row.get("source")
-        note = row.get("note")
+        code = _status_to_code(rec.status)
+        source = rec.source
+        note = rec.note
 
         compat = Compatibility.query.filter_by(drug_id=a_id, co_drug_id=b_id).first()
         if compat:
@@ -420,8 +818,25 @@ def import_compat_json(json_file: str, truncate: bool):
             created_pairs += 1
 
     db.session.commit()
+    refresh_compat_matrix()
     click.echo("✅ Import summary:")
     click.echo(f"  Drugs created : {created_drugs}")
     click.echo(f"  Pairs created : {created_pairs}")
     click.echo(f"  Pairs updated : {updated_pairs}")
     click.echo(f"  Rows skipped  : {skipped_rows}")
+
+
+@compat_bp.cli.command("export-snapshot")
+@click.argument("out_file", required=False)
+@with_appcontext
+def export_snapshot(out_file: str | None):
+    """เขียนตารางยา + คู่ยาจาก DB เป็นไฟล์ snapshot (ใช้กับ COMPAT_SNAPSHOT)"""
+    path = Path(out_file or current_app.config.get("COMPAT_SNAPSHOT") or "instance/compat.snapshot")
+    started = time.perf_counter()
+    stats = write_snapshot(_load_compat_matrix(), path)
+    elapsed = time.perf_counter() - started
+    click.echo(f"✅ Snapshot: {stats['path']}")
+    click.echo(f"  Version : {stats['version']}")
+    click.echo(f"  Drugs   : {stats['drugs']}")
+    click.echo(f"  Pairs   : {stats['pairs']}")
+    click.echo(f"  Size    : {stats['bytes']:,} bytes ({elapsed:.2f}s)")
@@ -4,14 +4,24 @@
 Blueprint รวมเส้นทางคำนวณยาสำหรับทารกแรกเกิด
 - โครงสร้าง POST 2 รอบ (action=dose / action=condition) ทำเป็นมาตรฐานเดียว
 - กัน UndefinedError ใน Jinja2 ด้วย default None เสมอ
-- รวม helper สำหรับแปลงค่า/ปัดทศนิยม/ข้อความคำอธิบาย 3X & 6X
+- รวม helper สำหรับแปลงค่า/ปัดทศนิยม
+- ยาที่คำนวณแบบ stock → mL → 3X/6X ใช้ registry (data/dose_formulas.json) + view กลาง
 - โค้ดนี้ออกแบบให้ "แทนที่" ของเดิมได้ทันที: template name เหมือนเดิมทุกหน้า
 """
 
-from flask import Blueprint, render_template, request
+from flask import Blueprint, Response, current_app, jsonify, render_template, request, stream_with_context
 from datetime import date
+from functools import partial
+import csv
+import io
 import math 
 
+import click
+
+from app_shared.census import iter_census, iter_csv_lines, iter_ndjson_lines
+from app_shared.dose_formulas import TEXT_KEYS, build_lookup, load_dose_formulas
+from app_shared.dose_rules import load_dose_rules
+
 
 meds_bp = Blueprint("meds", __name__)
 
@@ -21,6 +31,11 @@ meds_bp = Blueprint("meds", __name__)
 UPDATE_DATE = date.today().strftime("%Y-%m-%d")
 
 
+def _update_date() -> str:
+    """วันที่ของ app (create_app(update_date=...)) — ค่า module ใช้เป็น fallback นอก app context"""
+    return current_app.config.get("UPDATE_DATE") or UPDATE_DATE
+
+
 # =========================
 # ======== Helpers ========
 # =========================
@@ -47,342 +62,152 @@ def _round2(x):
     return None if x is None else round(float(x), 2)
 
 
-def _content_extra_by_mult(mult):
-    """ข้อความมาตรฐานสำหรับ 3X/6X (ใช้ร่วมกันได้หลายยา)"""
-    if mult == 3:
-        return {
-            "message": "การบริหารยาโดย Intermittent intravenous infusion pump",
-            "details": [
-                "สำหรับทารกที่มีน้ำหนักมากกว่า 1,500 กรัม",
-                "กำหนดให้ปริมาณสารละลายยา (ปริมาณยา + สารละลายเชื้อจางยา) = 8 ml.",
-                "(ความจุของ Extension Tube ประมาณ 5 ml. + Volume ที่ต้องบริหารเข้าผู้ป่วย 3 ml.)",
-                "<div style='text-align:center'>(3X + สารละลายเจือจางยา Up to 9 mL)</div>",
-                "การเตรียมยา:",
-                "1) คำนวณปริมาณยาที่ต้องการใช้เป็นมิลลิลิตร (ml.) แทนค่าในสูตร",
-                "2) ใช้ Syringe ขนาดที่เหมาะสม ดูดปริมาณยาที่ต้องการเตรียมไว้",
-                "3) ใช้ Syringe ขนาด 10 ml. หรือ 20 ml. ดูดปริมาณสารละลายเชื้อจางยาเตรียมไว้",
-                "4) ผสมยาใน Syringe ที่มีสารละลายเชื้อจางยาอยู่ Mixed ให้เข้ากัน",
-                "5) ต่อ Syringe กับ Extension Tube นำไปวางบน Syringe pump กด Start ตั้งอัตรา ~6 mL/hr.",
-                "6) Purge ยาให้ทั่วท่อโดยการดัน Syringe 3 ml. แล้วจึงบริหารผู้ป่วย",
-            ],
-        }
-    if mult == 6:
-        return {
-            "message": "การบริหารยาโดย Intermittent intravenous infusion",
-            "details": [
-                "สำหรับทารกที่มีน้ำหนักน้อยกว่า 1,500 กรัม",
-                "1) กำหนดให้สารละลายยาซึ่งบริหารเข้าสู้ผู้ป่วยปริมาณเท่ากับ = 1 mL",
-                "2) ให้ X คือ ปริมาณยาที่ต้องการเตรียม กำหนดสูตรในการเตรียมสารละลายยา ดังนี้:",
-                "<div style='text-align:center'>6X + สารละลายเจือจางยา Up to 6 mL</div>",
-                "3) จากข้อ 2 จะได้สารละลายทั้งหมด 6 ml. ซึ่งหมายถึง ความจุของ Extension Tube ประมาณ 5 ml. + Volume ที่ต้องการบริหารเข้าสู่ผู้ป่วย 1 ml.",
-                "4) บริหารโดยใช้ Syringe pump ตั้งอัตราเร็ว ~2 mL/hr",
-            ],
-        }
-    return None
-
-
-def _ml_from_stock(dose_mg, stock_mg, stock_ml):
-    """คำนวณ mL จากยาที่ละลายแล้ว: ml = dose * stock_ml / stock_mg"""
-    return _round2((dose_mg * stock_ml) / stock_mg)
-
-
-def _ml_from_conc(dose_mg, mg_per_ml):
-    """คำนวณ mL จากความเข้มข้น mg/mL: ml = dose / mg_per_ml"""
-    return _round2(dose_mg / mg_per_ml)
-
+# =========================
+# === Formula registry ====
+# =========================
+# ยาที่สูตรเป็นแบบ stock → mL (→ 3X/6X) อยู่ใน data/dose_formulas.json ทั้งหมด
+# โหลดครั้งเดียวตอน import แล้วผูกทุก URL เข้ากับ view เดียว (endpoint ชื่อเดิม)
+DOSE_FORMULAS = load_dose_formulas()
+# ตารางช่วง PMA/PNA/น้ำหนัก ของหน้า *_dose (ไฟล์เดียวกับที่ static/dose_page.js ใช้)
+DOSE_RULES = load_dose_rules()
 
-# ===================================================================
-# ============= Routes (เรียงตามตัวอักษรจากที่คุณให้มา) ==========
-# ===================================================================
 
-# routes/routes_medications.py
-# -*- coding: utf-8 -*-
-@meds_bp.route("/acyclovir", methods=["GET", "POST"])
-@meds_bp.route("/acyclovir_route", methods=["GET", "POST"])  # รองรับ URL เก่า
-def acyclovir_route():
+def dose_formula_view(drug):
     """
-    dose (mg) → result_ml_1 = (dose*5)/250   # ปริมาณตัวสาร (จาก stock 250 mg/5 ml)
-                result_ml_2 = dose/5         # ปริมาณสารละลายเป้าหมาย (5 mg/ml)
+    view กลางของทุกยาใน registry
+    - action/step = 'dose'      → คำนวณรอบแรก (mg → mL)
+    - action/step = 'condition' → รอบสอง ใช้ dose_hidden + multiplication
+    - ไม่ส่ง action มา          → คิดรอบเดียวจาก dose (+ multiplication ถ้ามี)
     """
-    dose = None
-    result_ml_1 = None
-    result_ml_2 = None
-    final_result_1 = None
-    final_result_2 = None
-    multiplication = None
-    error = None
-
-    if request.method == "POST":
-        try:
-            # รับ dose จากฟอร์ม (ทั้งฟอร์มแรกและฟอร์มคูณ ใช้ name="dose")
-            raw_dose = (request.form.get("dose") or "").strip()
-            if not raw_dose:
-                raise ValueError("ไม่พบค่าขนาดยา (dose)")
-
-            dose = float(raw_dose)
-
-            # คำนวณผลลัพธ์รอบแรก
-            result_ml_1 = round((dose * 5.0) / 250.0, 2)  # stock 250 mg / 5 ml
-            result_ml_2 = round(dose / 5.0, 2)            # target 5 mg/ml
-
-            # ถ้ามีการเลือก multiplication (ฟอร์มที่ 2)
-            mult_raw = (request.form.get("multiplication") or "").strip()
-            if mult_raw:
-                multiplication = float(mult_raw)
-                final_result_1 = round(result_ml_1 * multiplication, 2)
-                final_result_2 = round(result_ml_2 * multiplication, 2)
-
-        except Exception as e:
-            error = f"กรุณาใส่ข้อมูลที่ถูกต้อง: {e}"
-
-    # Flask mode → static_build = False
-    return render_template(
-        "acyclovir.html",
-        static_build=False,
-        dose=dose,
-        result_ml_1=result_ml_1,
-        result_ml_2=result_ml_2,
-        final_result_1=final_result_1,
-        final_result_2=final_result_2,
-        multiplication=multiplication,
-        error=error,
-    )
-
-
-@meds_bp.route('/amikin', methods=['GET', 'POST'])
-def amikin_route():
-    dose = result_ml = multiplication = final_result = None
-    target_total = diluent_to_add = None
-    msg_block = content_extra = error = None
-
-    try:
-        if request.method == 'POST':
-            action = (request.form.get('action') or '').strip().lower()
-
-            # -------------------------------
-            # ขั้นที่ 1: รับ dose (mg) -> คำนวณ mL
-            # -------------------------------
-            if action == 'dose':
-                raw = (request.form.get('dose') or '').strip()
-                if not raw:
-                    raise ValueError("กรุณาระบุ dose (mg)")
-                dose = float(raw)
-                if dose < 0:
-                    raise ValueError("dose ต้องเป็นตัวเลข ≥ 0")
-
-                # stock 500 mg / 2 mL  ⇒ mL = mg * 2 / 500
-                result_ml = round((dose * 2.0) / 500.0, 2)
-
-            # -------------------------------
-            # ขั้นที่ 2: รับเงื่อนไขการคูณ (3 หรือ 6)
-            # -------------------------------
-            elif action == 'condition':
-                dose_raw = (request.form.get('dose_hidden') or '').strip()
-                result_raw = (request.form.get('result_ml_hidden') or '').strip()
-                mult_raw = (request.form.get('multiplication') or '').strip()
-
-                if not dose_raw or not result_raw:
-                    raise ValueError("ข้อมูลคำนวณเดิมไม่ครบ โปรดคำนวณขั้นแรกก่อน")
-
-                dose = float(dose_raw)
-                result_ml = float(result_raw)
-                multiplication = int(mult_raw)
-
-                if multiplication not in (3, 6):
-                    raise ValueError("multiplication ต้องเป็น 3 หรือ 6")
-
-                # ปริมาณยาหลังคูณ (mL)
-                final_result = round(result_ml * multiplication, 2)
-
-                # กำหนดเป้าปริมาณรวม และข้อความกำกับ
-                if multiplication == 3:
-                    target_total = 9.0
-                    msg_block = "ปริมาณที่บริหารเข้าทารก ≈ 3 mL → ตั้งอัตรา 6 mL/hr"
-                    content_extra = {
-                        "message": "การบริหารยาโดย Intermittent intravenous infusion pump",
-                        "details": [
-                            "สำหรับทารกที่มีน้ำหนักมากกว่า 1,500 กรัม",
-                            "กำหนดให้ปริมาณสารละลายยา (ปริมาณยา + สารละลายเชื้อจางยา) = 8 ml.",
-                            "(ความจุของ Extension Tube ประมาณ 5 ml. + Volume ที่ต้องบริหารเข้าผู้ป่วย 3 ml.)",
-                            "<div style='text-align:center'>(3X + สารละลายเจือจาง Up to 9 ml.)</div>",
-                            "การเตรียมยา:",
-                            "1. คำนวณปริมาณยาที่ต้องการใช้เป็นมิลลิลิตร (ml.) แทนค่าในสูตร",
-                            "2. ใช้ Syringe ขนาดที่เหมาะสม ดูดปริมาณยาที่ต้องการเตรียมไว้",
-                            "3. ใช้ Syringe ขนาด 10 ml. หรือ 20 ml. ดูดปริมาณสารละลายเชื้อจางยาเตรียมไว้",
-                            "4. ผสมยาใน Syringe ที่มีสารละลายเชื้อจางยาอยู่ Mixed ให้เข้ากัน",
-                            "5. ต่อ Syringe กับ Extension Tube นำไปวางบน Syringe pump กด Start ตั้งอัตราเร็ว 6 ml/hr.",
-                            "6. Purge ยาให้ทั่วท่อโดยการดัน Syringe 3 ml. แล้วจึงบริหารผู้ป่วย",
-                        ],
-                    }
-                else:  # multiplication == 6
-                    target_total = 6.0
-                    msg_block = "ปริมาณที่บริหารเข้าทารก ≈ 1 mL → ตั้งอัตรา 2 mL/hr"
-                    content_extra = {
-                        "message": "การบริหารยาโดย Intermittent intravenous infusion",
-                        "details": [
-                            "สำหรับทารกที่มีน้ำหนักน้อยกว่า 1,500 กรัม",
-                            "1. กำหนดให้สารละลายยาซึ่งบริหารเข้าสู่ผู้ป่วยปริมาณเท่ากับ 1 ml.",
-                            "2. ให้ X คือ ปริมาณยาที่ต้องการเตรียม กำหนดสูตรในการเตรียมสารละลายยา ดังนี้:",
-                            "<div style='text-align:center'>(6X + สารละลายเจือจาง Up to 6 ml.)</div>",
-                            "3. จากข้อ 2 จะได้สารละลายทั้งหมด 6 ml. ซึ่งหมายถึง ความจุของ Extension Tube ประมาณ 5 ml. + Volume ที่ต้องการบริหารเข้าสู่ผู้ป่วย 1 ml.",
-                            "4. บริหารยาโดยใช้ Syringe pump ตั้งอัตราเร็ว 2 ml/hr.",
-                        ],
-                    }
-
-                # ปริมาณ diluent ที่ต้องเติม
-                if target_total is not None and final_result is not None:
-                    need = target_total - final_result
-                    diluent_to_add = round(need, 2) if need > 0 else 0.0
-
-    except Exception as e:
-        error = f"ข้อมูลไม่ถูกต้อง: {e}"
-
-    return render_template(
-        'amikin.html',
-        dose=dose,
-        result_ml=result_ml,
-        multiplication=multiplication,
-        final_result=final_result,
-        target_total=target_total,
-        diluent_to_add=diluent_to_add,
-        msg_block=msg_block,
-        content_extra=content_extra,
-        error=error,
-        UPDATE_DATE=UPDATE_DATE,
-    )
-
-@meds_bp.route('/aminophylline', methods=['GET', 'POST'])
-def aminophylline_route():
-    dose = result_ml = None
-    error = None
+    formula = DOSE_FORMULAS[drug]
+    ctx = dict(formula.blank)
 
     if request.method == 'POST':
+        form = request.form
+        action = (form.get('action') or form.get('step') or '').strip().lower()
+        raw_dose = form.get('dose_hidden') or form.get('dose')
+        conc = form.get('concentration_hidden') or form.get('concentration')
         try:
-            # รับค่าจากฟอร์ม
-            raw = (request.form.get('dose') or '').strip()
-            if not raw:
-                raise ValueError("กรุณากรอกขนาดยา (mg)")
+            # เก็บ dose + ผลรอบแรกไว้ใน ctx ก่อน → ขั้น condition ผิดแล้วฟอร์มยังมีค่าที่ผู้ใช้กรอก
+            ctx['dose'] = formula.parse_dose(raw_dose)
+            ctx.update(formula.evaluate(raw_dose, concentration=conc))
+            mult = None
+            if formula.multipliers is not None and action != 'dose':
+                mult = (form.get('multiplication') or '').strip() or None
+                if mult is None and action == 'condition':
+                    raise ValueError("กรุณาเลือกเงื่อนไขการคูณ")
+            if mult is not None:
+                ctx.update(formula.evaluate(raw_dose, multiplication=mult, concentration=conc))
+        except (ValueError, TypeError, ArithmeticError) as e:
+            ctx['error'] = f"กรุณาใส่ข้อมูลที่ถูกต้อง: {e}"
+
+    ctx.update(formula.context)
+    if formula.date_key:
+        ctx[formula.date_key] = _update_date()
+    return render_template(formula.template, **ctx)
+
+
+# ผูก drug ด้วย partial (ไม่ใช้ defaults=): rule ที่มี defaults เดียวกันใน endpoint เดียวกัน
+# werkzeug จะ 308 redirect URL รองไปหา URL แรก → /acyclovir_route ต้องตอบหน้าเองเหมือนเดิม
+for _key, _formula in DOSE_FORMULAS.items():
+    _view = partial(dose_formula_view, _key)
+    for _path in _formula.paths:
+        meds_bp.add_url_rule(
+            _path,
+            endpoint=_formula.endpoint,
+            view_func=_view,
+            methods=['GET', 'POST'],
+        )
 
-            dose = float(raw)
-            if dose < 0:
-                raise ValueError("ขนาดยาต้องมากกว่าหรือเท่ากับ 0")
 
-            # สูตรในหน้า: u = mg × 10  → ให้คิดเป็นจำนวนหน่วย u
-            # ถ้าอยากให้เป็นจำนวนเต็ม ให้ใช้ int(round(...))
-            result_ml = int(round(dose * 10))
+# =========================
+# ===== JSON dose API =====
+# =========================
+# ใช้ registry เดียวกับหน้าเว็บ → ตัวเลขตรงกับที่ template แสดง (ไม่ render template)
+DOSE_LOOKUP = build_lookup(DOSE_FORMULAS)
+MAX_DOSE_BATCH = 10000
 
-        except Exception as e:
-            error = f"กรุณากรอกขนาดยาที่ถูกต้อง: {e}"
 
-    return render_template(
-        'aminophylline.html',
-        dose=dose,
-        result_ml=result_ml,
-        error=error,
-        UPDATE_DATE=UPDATE_DATE,  # ให้ตรงกับชื่อที่ใช้ใน template
+def _dose_api_result(formula, item, include_text=False):
+    res = formula.evaluate(
+        item.get('dose'),
+        multiplication=item.get('multiplication'),
+        concentration=item.get('concentration'),
     )
+    res.pop('error', None)
+    if not include_text:
+        for k in TEXT_KEYS:
+            res.pop(k, None)
+    res['drug'] = formula.key
+    return res
 
 
-@meds_bp.route('/amoxicillin_clavimoxy', methods=['GET', 'POST'])
-def amoxicillin_clavimoxy_route():
+@meds_bp.post('/api/dose/<drug>')
+def api_dose(drug):
     """
-    ขั้นตอนเตรียม: Sterile water 10 mL → ดูดยาทั้งหมด 10 mL + NSS 100 mL = รวม 110 mL = 1,200 mg
-    ดังนั้น mg -> mL จากสารละลายสุดท้าย:  ml = mg * 110 / 1200
+    คำนวณยา 1 รายการ
+    body (JSON หรือ form): {"dose": 120, "multiplication": 3, "concentration": 5, "include_text": false}
     """
-    dose = None
-    result_ml_1 = None
-    multiplication = None
-    final_result_1 = None
-    error = None
+    formula = DOSE_LOOKUP.get(drug.lower().replace('-', '_'))
+    if formula is None:
+        return jsonify({'error': f'unknown drug: {drug}'}), 404
 
+    item = request.get_json(silent=True)
+    if not isinstance(item, dict):
+        item = request.form.to_dict()
     try:
-        if request.method == 'POST':
-            action = (request.form.get('action') or '').strip()
-
-            if action == 'dose':
-                # รอบที่ 1: รับ mg มาคิดเป็น mL
-                raw = request.form.get('dose')
-                dose = float(raw.strip()) if raw is not None else None
-                if dose is None or dose <= 0:
-                    raise ValueError("กรุณากรอกขนาดยา (mg) มากกว่า 0")
-                result_ml_1 = round(dose * 110.0 / 1200.0, 2)
+        return jsonify(_dose_api_result(formula, item, bool(item.get('include_text'))))
+    except (ValueError, TypeError, ArithmeticError) as e:
+        return jsonify({'drug': formula.key, 'error': str(e)}), 400
 
-            elif action == 'condition':
-                # รอบที่ 2: คูณเงื่อนไข 1.5–5 เท่า
-                dose_hidden = request.form.get('dose_hidden')
-                rmh = request.form.get('result_ml_1_hidden')
-                mult_raw = request.form.get('multiplication')
-
-                dose = float(dose_hidden) if dose_hidden not in (None, '') else None
-                # คำนวณซ้ำให้แน่ใจ/หรือดึงค่าที่ซ่อนมาก็ได้
-                if rmh not in (None, ''):
-                    result_ml_1 = float(rmh)
-                elif dose is not None:
-                    result_ml_1 = round(dose * 110.0 / 1200.0, 2)
-                else:
-                    raise ValueError("ไม่พบค่าตั้งต้น (dose/result_ml_1)")
-
-                multiplication = float(mult_raw) if mult_raw not in (None, '') else None
-                final_result_1 = round(result_ml_1 * multiplication, 2)
-
-            else:
-                # fallback: หากไม่ส่ง action มา แต่ส่ง dose มา → คิดรอบแรก
-                if request.form.get('dose'):
-                    dose = float(request.form.get('dose'))
-                    if dose <= 0:
-                        raise ValueError("กรุณากรอกขนาดยา (mg) มากกว่า 0")
-                    result_ml_1 = round(dose * 110.0 / 1200.0, 2)
 
-    except Exception as e:
-        error = f"กรุณากรอกข้อมูลให้ถูกต้อง: {e}"
-
-    return render_template('amoxicillin_clavimoxy.html',
-                           dose=dose,
-                           result_ml_1=result_ml_1,
-                           multiplication=multiplication,
-                           final_result_1=final_result_1,
-                           error=error,
-                           UPDATE_DATE=UPDATE_DATE)
-
-@meds_bp.route('/amphotericinB', methods=['GET', 'POST'])
-def amphotericinB_route():
-    dose = result_ml_1 = result_ml_2 = final_result_1 = final_result_2 = multiplication = None
-    error = None
-    if request.method == 'POST':
+@meds_bp.post('/api/dose/batch')
+def api_dose_batch():
+    """
+    คำนวณหลายรายการใน request เดียว
+    body (JSON): {"items": [{"drug": "amikin", "dose": 120, "multiplication": 3}, ...]}
+    error ของแต่ละรายการคืนใน results[i]["error"] (รายการอื่นยังคำนวณต่อ)
+    """
+    payload = request.get_json(silent=True)
+    items = payload.get('items') if isinstance(payload, dict) else payload
+    if not isinstance(items, list):
+        return jsonify({'error': 'missing items'}), 400
+    if len(items) > MAX_DOSE_BATCH:
+        return jsonify({'error': f'too many items (max {MAX_DOSE_BATCH})'}), 400
+    include_text = isinstance(payload, dict) and bool(payload.get('include_text'))
+
+    results = []
+    errors = 0
+    lookup = DOSE_LOOKUP
+    for i, item in enumerate(items):
+        if not isinstance(item, dict):
+            results.append({'index': i, 'error': 'item ต้องเป็น object'})
+            errors += 1
+            continue
+        drug = str(item.get('drug') or '')
+        formula = lookup.get(drug.lower().replace('-', '_'))
+        if formula is None:
+            results.append({'index': i, 'drug': drug, 'error': f'unknown drug: {drug}'})
+            errors += 1
+            continue
         try:
-            dose = _as_float(request.form.get('dose'), 'dose')
-            result_ml_1 = _round2((dose * 10) / 50)  # stock 50 mg / 10 mL
-            result_ml_2 = _round2(dose / 0.1)        # เป้าหมาย 0.1 mg/mL
-            if request.form.get('multiplication'):
-                multiplication = _as_float(request.form.get('multiplication'), 'multiplication')
-                final_result_1 = _round2(result_ml_1 * multiplication)
-                final_result_2 = _round2(result_ml_2 * multiplication)
-        except Exception as e:
-            error = f"กรุณาใส่ข้อมูลที่ถูกต้อง: {e}"
-    return render_template('amphotericinB.html',
-                           dose=dose,
-                           result_ml_1=result_ml_1,
-                           result_ml_2=result_ml_2,
-                           final_result_1=final_result_1,
-                           final_result_2=final_result_2,
-                           multiplication=multiplication,
-                           error=error,
-                           update_date=UPDATE_DATE)
+            res = _dose_api_result(formula, item, include_text)
+        except (ValueError, TypeError, ArithmeticError) as e:
+            results.append({'index': i, 'drug': formula.key, 'error': str(e)})
+            errors += 1
+            continue
+        res['index'] = i
+        results.append(res)
 
+    return jsonify({'count': len(results), 'errors': errors, 'results': results})
 
-@meds_bp.route('/ampicillin', methods=['GET', 'POST'])
-def ampicillin_route():
-    dose = result_ml = None
-    error = None
-    if request.method == 'POST':
-        try:
-            dose = _as_float(request.form.get('dose'), 'dose')
-            result_ml = _round2((dose * 5) / 1000)  # ตัวอย่าง
-        except Exception:
-            error = "กรุณากรอกขนาดยาที่ถูกต้อง"
-    return render_template('ampicillin.html', dose=dose, result_ml=result_ml, error=error, update_date=UPDATE_DATE)
 
+# ===================================================================
+# ============= Routes (เรียงตามตัวอักษรจากที่คุณให้มา) ==========
+# ===================================================================
 
+# routes/routes_medications.py
+# -*- coding: utf-8 -*-
 @meds_bp.route('/benzathine-penicillin-g', methods=['GET', 'POST'])
 def benzathine_penicillin_g_route():
     dose = calculated_ml = None
@@ -403,421 +228,8 @@ def benzathine_penicillin_g_route():
             error = "กรุณากรอกข้อมูลที่ถูกต้อง (ตัวเลขเท่านั้น)"
     return render_template('benzathine_penicillin_g.html',
                            dose=dose, calculated_ml=calculated_ml, error=error,
-                           scheme=scheme, update_date=UPDATE_DATE)
-
-
-@meds_bp.route('/cefazolin', methods=['GET', 'POST'])
-def cefazolin_route():
-    dose = result_ml = None
-    error = None
-    if request.method == 'POST':
-        try:
-            dose = _as_float(request.form.get('dose'), 'dose')
-            if dose <= 0:
-                raise ValueError("ขนาดยาต้องมากกว่า 0")
-            # stock 1000 mg/10 mL -> 100 mg/mL
-            result_ml = _round2(dose / 100.0)
-        except Exception as e:
-            error = f"กรุณากรอกข้อมูลให้ถูกต้อง: {e}"
-    return render_template('cefazolin.html',
-                           dose=dose, result_ml=result_ml, error=error,
-                           update_date=UPDATE_DATE)
-
-
-@meds_bp.route('/cefotaxime', methods=['GET', 'POST'])
-def cefotaxime_route():
-    dose = None
-    result_ml = None
-    multiplication = None
-    content_extra = None
-    error = None
-
-    if request.method == 'POST':
-        try:
-            # รองรับทั้งชื่อ field step (ใหม่) และ action (เก่า)
-            step = (request.form.get('step') or request.form.get('action') or '').strip().lower()
-
-            # -------- STEP 1: dose (mg) → mL --------
-            if step == 'dose':
-                raw = (request.form.get('dose') or '').strip()
-                if not raw:
-                    raise ValueError("กรุณากรอกขนาดยา (mg)")
-                dose = float(raw)
-                if dose < 0:
-                    raise ValueError("ขนาดยาต้องมากกว่าหรือเท่ากับ 0")
-
-                # stock 1000 mg / 10 mL → ความเข้มข้น 100 mg/mL → mL = mg / 100
-                result_ml = round(dose / 100.0, 2)
-
-            # -------- STEP 2: condition (3X / 6X) --------
-            elif step == 'condition':
-                dose_raw = (request.form.get('dose') or '').strip()
-                if not dose_raw:
-                    raise ValueError("ไม่พบข้อมูล dose เดิม โปรดคำนวณรอบแรกก่อน")
-                dose = float(dose_raw)
-
-                result_raw = (request.form.get('result_ml') or '').strip()
-                if result_raw:
-                    result_ml = float(result_raw)
-                else:
-                    result_ml = round(dose / 100.0, 2)
-
-                mult_raw = (request.form.get('multiplication') or '').strip()
-                if not mult_raw:
-                    raise ValueError("กรุณาเลือกเงื่อนไขการคูณ")
-
-                multiplication = int(mult_raw)
-
-                # ✅ เช็คให้ชัดเจน 3 หรือ 6 เท่านั้น
-                if multiplication not in (3, 6):
-                    raise ValueError("multiplication ต้องเป็น 3 หรือ 6 เท่า")
-
-                # กำหนด content_extra สำหรับแสดงวิธีบริหาร (ส่วนหลักจะ render ใน template)
-                if multiplication == 3:
-                    content_extra = {
-                        "message": "การบริหารยาโดย Intermittent intravenous infusion pump",
-                        "details": [
-                            "สำหรับทารกที่มีน้ำหนักมากกว่า 1,500 กรัม",
-                            "กำหนดให้ปริมาณสารละลายยา (ปริมาณยา + สารละลายเชื้อจางยา) = 8 ml.",
-                            "(ความจุของ Extension Tube ประมาณ 5 ml. + Volume ที่ต้องบริหารเข้าผู้ป่วย 3 ml.)",
-                            "<div style='text-align:center'>(3X + สารละลายเจือจางยา Up to 9 mL)</div>",
-                            "การเตรียมยา:",
-                            "1) คำนวณปริมาณยาที่ต้องการใช้เป็นมิลลิลิตร (ml.) แทนค่าในสูตร",
-                            "2) ใช้ Syringe ขนาดที่เหมาะสม ดูดปริมาณยาที่ต้องการเตรียมไว้",
-                            "3) ใช้ Syringe ขนาด 10 ml. หรือ 20 ml. ดูดปริมาณสารละลายเชื้อจางยาเตรียมไว้",
-                            "4) ผสมยาใน Syringe ที่มีสารละลายเชื้อจางยาอยู่ Mixed ให้เข้ากัน",
-                            "5) ต่อ Syringe กับ Extension Tube นำไปวางบน Syringe pump กด Start ตั้งอัตรา ~6 mL/hr.",
-                            "6) Purge ยาให้ทั่วท่อโดยการดัน Syringe 3 ml. แล้วจึงบริหารผู้ป่วย",
-                        ],
-                    }
-                else:  # multiplication == 6
-                    content_extra = {
-                        "message": "การบริหารยาโดย Intermittent intravenous infusion",
-                        "details": [
-                            "สำหรับทารกที่มีน้ำหนักน้อยกว่า 1,500 กรัม",
-                            "1) กำหนดให้สารละลายยาซึ่งบริหารเข้าสู้ผู้ป่วยปริมาณเท่ากับ = 1 mL",
-                            "2) ให้ X คือ ปริมาณยาที่ต้องการเตรียม กำหนดสูตรในการเตรียมสารละลายยา ดังนี้:",
-                            "<div style='text-align:center'>6X + สารละลายเจือจางยา Up to 6 mL</div>",
-                            "3) จากข้อ 2 จะได้สารละลายทั้งหมด 6 ml. ซึ่งหมายถึง ความจุของ Extension Tube ประมาณ 5 ml. + Volume ที่ต้องการบริหารเข้าสู่ผู้ป่วย 1 ml.",
-                            "4) บริหารโดยใช้ Syringe pump ตั้งอัตราเร็ว ~2 mL/hr",
-                        ],
-                    }
-
-            else:
-                # fallback ฟอร์มเก่า
-                if 'dose' in request.form:
-                    dose = float(request.form['dose'])
-                    result_ml = round(dose / 100.0, 2)
-                if 'multiplication' in request.form:
-                    multiplication = int(request.form['multiplication'])
-
-        except (ValueError, TypeError) as e:
-            error = f"กรุณากรอกข้อมูลให้ถูกต้อง: {e}"
-
-    return render_template(
-        'cefotaxime.html',
-        dose=dose,
-        result_ml=result_ml,
-        multiplication=multiplication,
-        content_extra=content_extra,
-        error=error,
-        UPDATE_DATE=UPDATE_DATE,
-    )
-
-
-@meds_bp.route('/ceftazidime', methods=['GET', 'POST'])
-def ceftazidime_route():
-    dose = None
-    result_ml = None
-    multiplication = None
-    content_extra = None
-    error = None
-
-    if request.method == 'POST':
-        try:
-            # ใช้ชื่อ field ที่ template ส่งมา: step = 'dose' หรือ 'condition'
-            step = (request.form.get('step') or '').strip().lower()
-
-            # ---------- รอบที่ 1: คำนวณ mg → mL ----------
-            if step == 'dose':
-                raw = (request.form.get('dose') or '').strip()
-                if not raw:
-                    raise ValueError("กรุณากรอกขนาดยา (mg)")
-
-                dose = float(raw)
-                if dose < 0:
-                    raise ValueError("ขนาดยาต้องมากกว่าหรือเท่ากับ 0")
-
-                # stock 1000 mg/10 mL → mL = (mg × 10) / 1000
-                result_ml = round((dose * 10.0) / 1000.0, 2)
-
-            # ---------- รอบที่ 2: ใช้ผลคำนวณ + เงื่อนไข ----------
-            elif step == 'condition':
-                dose_raw = (request.form.get('dose') or '').strip()
-                if not dose_raw:
-                    raise ValueError("ไม่พบข้อมูล dose เดิม โปรดคำนวณรอบแรกก่อน")
-
-                dose = float(dose_raw)
-
-                result_raw = (request.form.get('result_ml') or '').strip()
-                if result_raw:
-                    result_ml = float(result_raw)
-                else:
-                    result_ml = round((dose * 10.0) / 1000.0, 2)
-
-                mult_raw = (request.form.get('multiplication') or '').strip()
-                if not mult_raw:
-                    raise ValueError("กรุณาเลือกเงื่อนไขการคูณ")
-
-                multiplication = int(mult_raw)
-
-                # กล่องคำอธิบายเพิ่มเติม
-                if multiplication == 3:
-                    content_extra = {
-                        "message": "การบริหารยาโดย Intermittent intravenous infusion pump",
-                        "details": [
-                            "สำหรับทารกที่มีน้ำหนักมากกว่า 1,500 กรัม",
-                            "กำหนดให้ปริมาณสารละลายยา (ปริมาณยา + สารละลายเชื้อจางยา) = 8 ml.",
-                            "(ความจุของ Extension Tube ประมาณ 5 ml. + Volume ที่ต้องบริหารเข้าผู้ป่วย 3 ml.)",
-                            "<div style='text-align:center'>(3X + สารละลายเจือจางยา Up to 9 mL)</div>",
-                            "การเตรียมยา:",
-                            "1) คำนวณปริมาณยาที่ต้องการใช้เป็นมิลลิลิตร (ml.) แทนค่าในสูตร",
-                            "2) ใช้ Syringe ขนาดที่เหมาะสม ดูดปริมาณยาที่ต้องการเตรียมไว้",
-                            "3) ใช้ Syringe ขนาด 10 ml. หรือ 20 ml. ดูดปริมาณสารละลายเชื้อจางยาเตรียมไว้",
-                            "4) ผสมยาใน Syringe ที่มีสารละลายเชื้อจางยาอยู่ Mixed ให้เข้ากัน",
-                            "5) ต่อ Syringe กับ Extension Tube นำไปวางบน Syringe pump กด Start ตั้งอัตรา ~6 mL/hr.",
-                            "6) Purge ยาให้ทั่วท่อโดยการดัน Syringe 3 ml. แล้วจึงบริหารผู้ป่วย",
-                        ],
-                    }
-                elif multiplication == 6:
-                    content_extra = {
-                        "message": "การบริหารยาโดย Intermittent intravenous infusion",
-                        "details": [
-                            "สำหรับทารกที่มีน้ำหนักน้อยกว่า 1,500 กรัม",
-                            "1) กำหนดให้สารละลายยาซึ่งบริหารเข้าสู้ผู้ป่วยปริมาณเท่ากับ = 1 mL",
-                            "2) ให้ X คือ ปริมาณยาที่ต้องการเตรียม กำหนดสูตรในการเตรียมสารละลายยา ดังนี้:",
-                            "<div style='text-align:center'>6X + สารละลายเจือจางยา Up to 6 mL</div>",
-                            "3) จากข้อ 2 จะได้สารละลายทั้งหมด 6 ml. ซึ่งหมายถึง ความจุของ Extension Tube ประมาณ 5 ml. + Volume ที่ต้องการบริหารเข้าสู่ผู้ป่วย 1 ml.",
-                            "4) บริหารโดยใช้ Syringe pump ตั้งอัตราเร็ว ~2 mL/hr",
-                        ],
-                    }
-
-            # fallback เผื่อ form เก่า (ไม่ส่ง step)
-            else:
-                if 'dose' in request.form:
-                    dose = float(request.form['dose'])
-                    result_ml = round((dose * 10.0) / 1000.0, 2)
-                if 'multiplication' in request.form:
-                    multiplication = int(request.form['multiplication'])
-
-        except (ValueError, TypeError) as e:
-            error = f"กรุณากรอกข้อมูลให้ถูกต้อง: {e}"
-
-    return render_template(
-        'ceftazidime.html',
-        dose=dose,
-        result_ml=result_ml,
-        multiplication=multiplication,
-        content_extra=content_extra,
-        error=error,
-        UPDATE_DATE=UPDATE_DATE,   # ให้ key ตรงกับ {{ UPDATE_DATE }}
-    )
-
-@meds_bp.route('/ciprofloxacin', methods=['GET', 'POST'])
-def ciprofloxacin_route():
-    dose = None
-    result_ml = None
-    error = None
-
-    if request.method == 'POST':
-        try:
-            raw = (request.form.get('dose') or '').strip()
-            if not raw:
-                raise ValueError("กรุณากรอกขนาดยา (mg)")
-
-            dose = float(raw)
-            if dose < 0:
-                raise ValueError("ขนาดยาต้องมากกว่าหรือเท่ากับ 0")
-
-            # ความแรง 2 mg/mL → mL = mg ÷ 2
-            result_ml = round(dose / 2.0, 2)
-
-        except (ValueError, TypeError) as e:
-            error = f"กรุณากรอกข้อมูลให้ถูกต้อง: {e}"
-            dose = None
-            result_ml = None
-
-    return render_template(
-        'ciprofloxacin.html',
-        dose=dose,
-        result_ml=result_ml,
-        error=error,
-        UPDATE_DATE=UPDATE_DATE,   # ชื่อ key ตรงกับใน template
-    )
-
-@meds_bp.route('/clindamycin', methods=['GET', 'POST'])
-def clindamycin_route():
-    dose = result_ml_1 = result_ml_2 = None
-    multiplication = final_result_1 = final_result_2 = None
-    error = None
-
-    if request.method == 'POST':
-        action = (request.form.get('action') or '').strip().lower()
-
-        try:
-            if action == 'dose':
-                # รอบที่ 1: คำนวณจาก dose
-                dose = _as_float(request.form.get('dose'), 'dose')
-                # 600 mg / 4 ml
-                result_ml_1 = _round2(dose * 4.0 / 600.0)
-                # เป้าหมาย 6 mg/ml
-                result_ml_2 = _round2(dose / 6.0)
-
-            elif action == 'condition':
-                # รอบที่ 2: ใช้ค่าที่ได้จากรอบแรก + ตัวคูณ
-                dose = _as_float(request.form.get('dose_hidden'), 'dose_hidden')
-                result_ml_1 = _as_float(request.form.get('result_ml_1_hidden'), 'result_ml_1_hidden')
-                result_ml_2 = _as_float(request.form.get('result_ml_2_hidden'), 'result_ml_2_hidden')
-                multiplication = _as_float(request.form.get('multiplication'), 'multiplication')
-
-                final_result_1 = _round2(result_ml_1 * multiplication)
-                final_result_2 = _round2(result_ml_2 * multiplication)
-
-            else:
-                error = 'ส่งข้อมูลไม่ครบ (action หาย)'
-
-        except ValueError:
-            error = 'กรุณากรอกตัวเลขให้ถูกต้อง'
-        except Exception as e:
-            error = f'เกิดข้อผิดพลาด: {e}'
-
-    return render_template(
-        'clindamycin.html',
-        dose=dose,
-        result_ml_1=result_ml_1,
-        result_ml_2=result_ml_2,
-        multiplication=multiplication,
-        final_result_1=final_result_1,
-        final_result_2=final_result_2,
-        error=error,
-        update_date=UPDATE_DATE,   # ตรงกับ {{ update_date }}
-    )
-
-@meds_bp.route('/cloxacillin', methods=['GET', 'POST'])
-def cloxacillin_route():
-    dose = None
-    result_ml = None
-    multiplication = None
-    content_extra = None
-    error = None
-
-    if request.method == "POST":
-        action = (request.form.get("action") or "").strip().lower()
-        try:
-            if action == "dose":
-                # รอบที่ 1: คำนวณจากสต็อก 1000 mg / 5 mL
-                dose = _as_float(request.form.get("dose"), "dose")
-                # 1000 mg / 5 mL → 200 mg/mL
-                result_ml = _ml_from_stock(dose, 1000, 5)
-
-            elif action == "condition":
-                # รอบที่ 2: ใช้ค่าจากรอบแรก + คูณ 3 หรือ 6 เท่า
-                dose = _as_float(request.form.get("dose_hidden"), "dose_hidden")
-                result_ml = _as_float(request.form.get("result_ml_hidden"), "result_ml_hidden")
-                multiplication = _as_int(request.form.get("multiplication"), "multiplication")
-
-                # กล่องคำอธิบาย (ข้อความวิธีเตรียม/ให้ยา)
-                content_extra = _content_extra_by_mult(multiplication)
-
-            else:
-                error = "คำขอไม่ถูกต้อง"
-
-        except ValueError as e:
-            error = f"กรุณาใส่ข้อมูลที่ถูกต้อง: {e}"
-        except Exception as e:
-            error = f"เกิดข้อผิดพลาด: {e}"
-
-    return render_template(
-        "cloxacillin.html",
-        dose=dose,
-        result_ml=result_ml,
-        multiplication=multiplication,
-        content_extra=content_extra,
-        error=error,
-        update_date=UPDATE_DATE,
-    )
-
-@meds_bp.route('/colistin', methods=['GET', 'POST'])
-def colistin_route():
-    dose = None
-    result_ml = None
-    multiplication = None
-    error = None
-    content_extra = None
-
-    if request.method == "POST":
-        action = (request.form.get("action") or "dose").strip().lower()
-        try:
-            if action == "dose":
-                # รอบที่ 1: 150 mg / 2 mL → ml = (mg × 2) / 150
-                dose = _as_float(request.form.get("dose"), "dose")
-                result_ml = _round2((dose * 2) / 150.0)
-
-            elif action == "condition":
-                # รอบที่ 2: ใช้ค่าเดิม + คูณ 3 หรือ 6 เท่า
-                dose = _as_float(request.form.get("dose_hidden"), "dose_hidden")
-                result_ml = _as_float(
-                    request.form.get("result_ml_hidden"),
-                    "result_ml_hidden",
-                )
-                multiplication = _as_int(
-                    request.form.get("multiplication"),
-                    "multiplication",
-                )
-
-                # เอาไว้สร้างกล่องคำอธิบายเพิ่มเติม
-                content_extra = _content_extra_by_mult(multiplication)
-
-            else:
-                error = "คำสั่งไม่ถูกต้อง"
-
-        except ValueError as e:
-            error = f"กรุณาใส่ข้อมูลที่ถูกต้อง: {e}"
-        except Exception as e:
-            error = f"เกิดข้อผิดพลาด: {e}"
-
-    return render_template(
-        "colistin.html",
-        dose=dose,
-        result_ml=result_ml,
-        multiplication=multiplication,
-        content_extra=content_extra,
-        error=error,
-        update_date=UPDATE_DATE,
-    )
-
-@meds_bp.route('/dexamethasone', methods=['GET', 'POST'])
-def dexamethasone_route():
-    dose = None
-    result_ml = None   # ที่จริงคือ "หน่วย u" = mg × 100
-    error = None
-
-    if request.method == 'POST':
-        try:
-            # ใช้ helper เดิมในโปรเจกต์
-            dose = _as_float(request.form.get('dose'), 'dose')
-            # 1 mg = 100 u (small dose: 0.2 ml drug + 0.8 ml D5W = 1 mg/1 ml = 100 u)
-            result_ml = _round2(dose * 100.0)
-        except Exception as e:
-            error = f"กรุณากรอกขนาดยาที่ถูกต้อง: {e}"
+                           scheme=scheme, update_date=_update_date())
 
-    return render_template(
-        'dexamethasone.html',
-        dose=dose,
-        result_ml=result_ml,
-        error=error,
-        update_date=UPDATE_DATE,
-    )
 
 @meds_bp.route('/dobutamine', methods=['GET', 'POST'])
 def dobutamine_route():
@@ -875,7 +287,7 @@ def dobutamine_route():
         totalVol_mult=totalVol_mult,
         diluent_mult=diluent_mult,
         error=error,
-        update_date=UPDATE_DATE,
+        update_date=_update_date(),
     )
 
 @meds_bp.route('/dopamine', methods=['GET', 'POST'])
@@ -933,166 +345,14 @@ def dopamine_route():
         totalVol_mult=totalVol_mult,
         diluent_mult=diluent_mult,
         error=error,
-        update_date=UPDATE_DATE,
+        update_date=_update_date(),
     )
 
 @meds_bp.route('/fentanyl', methods=['GET'])
 def fentanyl_route():
-    return render_template('fentanyl.html', update_date=UPDATE_DATE)
-
-
-@meds_bp.route('/fentanyl_continuous', methods=['GET', 'POST'])
-def fentanyl_continuous_route():
-    dose = result = error = None
-    if request.method == 'POST':
-        try:
-            dose = _as_float(request.form.get('dose'), 'dose')
-            # ตัวอย่าง: rate = dose × 0.1
-            result = _round2(dose * 0.1)
-        except Exception as e:
-            error = f"กรุณากรอกข้อมูลที่ถูกต้อง: {e}"
-    return render_template(
-        'fentanyl_continuous.html',
-        dose=dose,
-        result=result,
-        error=error,
-        update_date=UPDATE_DATE
-    )
+    return render_template('fentanyl.html', update_date=_update_date())
 
 
-@meds_bp.route('/fentanyl_small_dose', methods=['GET', 'POST'])
-def fentanyl_small_dose_route():
-    dose = result = error = None
-    if request.method == 'POST':
-        try:
-            dose = _as_float(request.form.get('dose'), 'dose')
-            # ปริมาตรที่ควรดูดจาก stock 50 mcg/ml
-            result = _round2(dose / 50.0)
-        except Exception as e:
-            error = f"กรุณากรอกข้อมูลที่ถูกต้อง: {e}"
-    return render_template(
-        'fentanyl_small_dose.html',
-        dose=dose,
-        result=result,
-        error=error,
-        update_date=UPDATE_DATE
-    )
-
-@meds_bp.route('/furosemide', methods=['GET', 'POST'])
-def furosemide_route():
-    dose = result_ml = None
-    error = None
-    if request.method == 'POST':
-        try:
-            dose = _as_float(request.form.get('dose'), 'dose')
-            # stock: 20 mg / 2 ml → 10 mg/ml  ⇒ ml = mg / 10
-            result_ml = _round2(dose / 10.0)
-        except Exception as e:
-            error = f"กรุณากรอกขนาดยาที่ถูกต้อง: {e}"
-            dose = None
-            result_ml = None
-
-    return render_template(
-        'furosemide.html',
-        dose=dose,
-        result_ml=result_ml,
-        error=error,
-        update_date=UPDATE_DATE,
-    )
-
-@meds_bp.route('/gentamicin', methods=['GET', 'POST'])
-def gentamicin_route():
-    dose = result_ml = final_result = multiplication = None
-    error = None
-    content_extra = None
-    formula_display = "ml = mg ÷ 40  (เพราะ 80 mg / 2 ml ⇒ 40 mg/ml)"
-
-    if request.method == 'POST':
-        try:
-            action = (request.form.get('action') or '').strip()
-
-            # รอบที่ 1: คำนวณ mg → ml
-            if action in ('dose', ''):
-                dose = _as_float(request.form.get('dose'), "ขนาดยา (mg)")
-                if dose <= 0:
-                    raise ValueError("ขนาดยาต้องมากกว่า 0")
-                result_ml = _round2(dose / 40.0)
-
-            # รอบที่ 2: เลือกเงื่อนไขตัวคูณ 3× หรือ 6×
-            elif action == 'condition':
-                dose = _as_float(
-                    request.form.get('dose_hidden') or request.form.get('dose'),
-                    "ขนาดยา (mg)",
-                )
-                if dose <= 0:
-                    raise ValueError("ขนาดยาต้องมากกว่า 0")
-
-                # ถ้ามี result_ml_hidden ก็ใช้เลย ไม่งั้นคำนวณใหม่
-                result_ml_hidden = request.form.get('result_ml_hidden')
-                if result_ml_hidden not in (None, ""):
-                    result_ml = float(result_ml_hidden)
-                else:
-                    result_ml = _round2(dose / 40.0)
-
-                multiplication = _as_int(
-                    request.form.get('multiplication'),
-                    "เงื่อนไขตัวคูณ (3×/6×)",
-                )
-                if multiplication not in (3, 6):
-                    raise ValueError("เงื่อนไขตัวคูณต้องเป็น 3 หรือ 6")
-
-                final_result = _round2(float(result_ml) * multiplication)
-                content_extra = _content_extra_by_mult(multiplication)
-
-            else:
-                error = "รูปแบบคำขอไม่ถูกต้อง (action ไม่รองรับ)"
-
-        except Exception as e:
-            error = f"กรุณาใส่ข้อมูลที่ถูกต้อง: {e}"
-
-    return render_template(
-        'gentamicin.html',
-        dose=dose,
-        result_ml=result_ml,
-        final_result=final_result,
-        multiplication=multiplication,
-        content_extra=content_extra,
-        formula_display=formula_display,
-        error=error,
-        update_date=UPDATE_DATE,
-    )
-
-@meds_bp.route('/hydrocortisone', methods=['GET', 'POST'])
-def hydrocortisone_route():
-    dose = result_ml = units = None
-    error = None
-
-    MG_PER_ML = 50.0   # 100 mg / 2 ml → 50 mg/ml
-    U_PER_MG = 4.0     # 25 mg = 100 u → 1 mg = 4 u
-
-    if request.method == 'POST':
-        try:
-            dose = _as_float(request.form.get('dose'), 'dose')
-            if dose <= 0:
-                raise ValueError("ขนาดยาต้องมากกว่า 0")
-
-            # คำนวณไว้ให้ template ใช้ (แต่ template ก็มี fallback เผื่อ None)
-            result_ml = _round2(dose / MG_PER_ML)
-            units = _round2(dose * U_PER_MG)
-
-        except Exception as e:
-            error = f"กรุณากรอกตัวเลขที่ถูกต้อง: {e}"
-            dose = result_ml = units = None
-
-    return render_template(
-        'hydrocortisone.html',
-        dose=dose,
-        result_ml=result_ml,
-        units=units,
-        error=error,
-        update_date=UPDATE_DATE,
-    )
-
 @meds_bp.route('/insulin', methods=['GET', 'POST'])
 def insulin_route():
     dose = None
@@ -1111,7 +371,7 @@ def insulin_route():
         'insulin.html',
         dose=dose,
         error=error,
-        update_date=UPDATE_DATE,
+        update_date=_update_date(),
     )
 
 @meds_bp.route('/levofloxacin', methods=['GET', 'POST'])
@@ -1146,111 +406,9 @@ def levofloxacin_route():
         dose=dose,
         concentration=concentration,
         multiplication=multiplication,
-        result_ml=result_ml,
-        final_result=final_result,
-        update_date=UPDATE_DATE,
-    )
-
-@meds_bp.route('/meropenem', methods=['GET', 'POST'])
-def meropenem_route():
-    dose = result_ml = final_result = multiplication = None
-    error = formula_display = None
-    content_extra = None
-
-    def ml_from_dose(d):  # 50 mg/mL
-        return _round2(float(d) / 50.0)
-
-    try:
-        if request.method == 'POST':
-            action = (request.form.get('action') or 'dose').strip().lower()
-
-            # รอบที่ 1: คำนวณ mg → ml
-            if action == 'dose':
-                dose = _as_float(request.form.get('dose'), 'dose')
-                if dose <= 0:
-                    raise ValueError("ขนาดยาต้องมากกว่า 0 mg")
-                result_ml = ml_from_dose(dose)
-
-            # รอบที่ 2: ใช้ dose_hidden / result_ml_hidden + multiplication
-            elif action == 'condition':
-                multiplication = _as_int(
-                    request.form.get('multiplication'), 'multiplication'
-                )
-
-                dose_hidden = (request.form.get('dose_hidden') or '').strip()
-                result_hidden = (request.form.get('result_ml_hidden') or '').strip()
-
-                if dose_hidden:
-                    dose = _as_float(dose_hidden, 'dose_hidden')
-                    if dose <= 0:
-                        raise ValueError("ขนาดยาต้องมากกว่า 0 mg")
-                    result_ml = ml_from_dose(dose)
-                elif result_hidden:
-                    result_ml = _round2(float(result_hidden))
-                    dose = _round2(result_ml * 50.0)
-                else:
-                    raise ValueError("ไม่พบค่าตั้งต้น (dose/result_ml)")
-
-                if multiplication not in (3, 6):
-                    raise ValueError("multiplication ต้องเป็น 3 หรือ 6")
-
-                final_result = _round2(result_ml * multiplication)
-                content_extra = _content_extra_by_mult(multiplication)
-
-            # fallback: โพสต์ครั้งเดียวแล้วส่งทั้ง dose + multiplication
-            else:
-                raw_dose = request.form.get('dose')
-                raw_mult = request.form.get('multiplication')
-
-                if raw_dose:
-                    dose = _as_float(raw_dose, 'dose')
-                    if dose <= 0:
-                        raise ValueError("ขนาดยาต้องมากกว่า 0 mg")
-                    result_ml = ml_from_dose(dose)
-
-                if raw_mult:
-                    multiplication = _as_int(raw_mult, 'multiplication')
-                    if multiplication not in (3, 6):
-                        raise ValueError("multiplication ต้องเป็น 3 หรือ 6")
-                    if result_ml is None:
-                        raise ValueError("ไม่พบผลรอบแรก")
-                    final_result = _round2(result_ml * multiplication)
-                    content_extra = _content_extra_by_mult(multiplication)
-
-    except Exception as e:
-        error = f"กรุณาใส่ข้อมูลที่ถูกต้อง: {e}"
-
-    return render_template(
-        'meropenem.html',
-        dose=dose,
-        result_ml=result_ml,
-        final_result=final_result,
-        multiplication=multiplication,
-        content_extra=content_extra,
-        formula_display=formula_display,
-        error=error,
-        update_date=UPDATE_DATE,
-    )
-
-@meds_bp.route('/metronidazole', methods=['GET', 'POST'])
-def metronidazole():
-    dose = calculated_ml = None
-    error = None
-    if request.method == 'POST':
-        try:
-            dose = _as_float(request.form.get('dose'), 'dose')
-            calculated_ml = _round2((dose * 100) / 500)  # = dose / 5
-        except Exception as e:
-            error = f"กรุณากรอกข้อมูลที่ถูกต้อง: {e}"
-            dose = None
-            calculated_ml = None
-
-    return render_template(
-        'metronidazole.html',
-        dose=dose,
-        calculated_ml=calculated_ml,
-        error=error,
-        update_date=UPDATE_DATE,
+        result_ml=result_ml,
+        final_result=final_result,
+        update_date=_update_date(),
     )
 
 @meds_bp.route('/midazolam_fentanyl', methods=['GET', 'POST'])
@@ -1275,43 +433,17 @@ def midazolam_fentanyl_route():
                            fentanyl_volume=fentanyl_volume,
                            final_volume=final_volume,
                            error=error,
-                           update_date=UPDATE_DATE)
+                           update_date=_update_date())
 
 
 @meds_bp.route('/midazolam', methods=['GET'])
 def midazolam_route():
-    return render_template('midazolam.html', update_date=UPDATE_DATE)
-
-
-@meds_bp.route('/midazolam_continuous', methods=['GET', 'POST'])
-def midazolam_continuous_route():
-    dose = result = error = None
-    if request.method == 'POST':
-        try:
-            dose = _as_float(request.form.get('dose'), 'dose')
-            result = _round2(dose * 0.1)
-        except Exception as e:
-            error = f"กรุณากรอกข้อมูลที่ถูกต้อง: {e}"
-    return render_template('midazolam_continuous.html',
-                           dose=dose, result=result, error=error, update_date=UPDATE_DATE)
-
-
-@meds_bp.route('/midazolam_small_dose', methods=['GET', 'POST'])
-def midazolam_small_dose_route():
-    dose = result = error = None
-    if request.method == 'POST':
-        try:
-            dose = _as_float(request.form.get('dose'), 'dose')
-            result = _round2(dose * 0.1)   # จะใช้หรือไม่ใช้ก็ได้
-        except Exception as e:
-            error = f"กรุณากรอกข้อมูลที่ถูกต้อง: {e}"
-    return render_template('midazolam_small_dose.html',
-                           dose=dose, result=result, error=error, update_date=UPDATE_DATE)
+    return render_template('midazolam.html', update_date=_update_date())
 
 
 @meds_bp.route('/morphine', methods=['GET'])
 def morphine_route():
-    return render_template('morphine.html', update_date=UPDATE_DATE)
+    return render_template('morphine.html', update_date=_update_date())
 
 
 @meds_bp.route('/morphine_continuous', methods=['GET', 'POST'])
@@ -1354,7 +486,7 @@ def morphine_continuous_route():
         morphine_vol=morphine_vol,
         diluent=diluent,
         error=error,
-        update_date=UPDATE_DATE,
+        update_date=_update_date(),
     )
 
 
@@ -1379,7 +511,7 @@ def morphine_small_dose_route():
         dose=dose,
         units=units,
         error=error,
-        update_date=UPDATE_DATE,
+        update_date=_update_date(),
     )
 
 
@@ -1410,95 +542,9 @@ def nimbex_route():
         result_ml=result_ml,
         final_ml=final_ml,   # เผื่ออยากใช้ใน template ภายหลัง
         error=error,
-        update_date=UPDATE_DATE,
-    )
-
-
-@meds_bp.route('/omeprazole', methods=['GET', 'POST'])
-def omeprazole_route():
-    dose = result_ml = final_result = multiplication = error = None
-    content_extra = None
-
-    def ml_from_dose(d):  # 4 mg/mL
-        return _round2(float(d) / 4.0)
-
-    try:
-        if request.method == 'POST':
-            action = (request.form.get('action') or 'dose').strip()
-            if action == 'dose':
-                dose = _as_float(request.form.get('dose'), 'dose')
-                if dose <= 0:
-                    raise ValueError("dose ต้องมากกว่า 0")
-                result_ml = ml_from_dose(dose)
-
-            elif action == 'condition':
-                multiplication = _as_int(request.form.get('multiplication'), 'multiplication')
-                dose_hidden = request.form.get('dose_hidden') or ''
-                result_ml_hidden = request.form.get('result_ml_hidden') or ''
-
-                if dose_hidden:
-                    dose = _as_float(dose_hidden, 'dose_hidden')
-                    if dose <= 0:
-                        raise ValueError("dose ต้องมากกว่า 0")
-                    result_ml = ml_from_dose(dose)
-                elif result_ml_hidden:
-                    result_ml = _round2(float(result_ml_hidden))
-                    dose = _round2(result_ml * 4.0)
-                else:
-                    raise ValueError("ไม่พบค่าตั้งต้น (dose/result_ml)")
-
-                final_result = _round2(result_ml * multiplication)
-                content_extra = _content_extra_by_mult(multiplication)
-
-            else:
-                # โหมดโพสต์เดียว (ถ้าเผลอส่ง action อื่นมา)
-                dose = _as_float(request.form.get('dose'), 'dose')
-                multiplication = _as_int(request.form.get('multiplication'), 'multiplication')
-                if dose <= 0:
-                    raise ValueError("dose ต้องมากกว่า 0")
-                result_ml = ml_from_dose(dose)
-                final_result = _round2(result_ml * multiplication)
-                content_extra = _content_extra_by_mult(multiplication)
-
-    except Exception as e:
-        error = f"กรุณาใส่ข้อมูลที่ถูกต้อง: {e}"
-
-    return render_template(
-        'omeprazole.html',
-        dose=dose,
-        result_ml=result_ml,
-        final_result=final_result,
-        multiplication=multiplication,
-        content_extra=content_extra,
-        formula_display=None,
-        error=error,
-        update_date=UPDATE_DATE,
+        update_date=_update_date(),
     )
 
-@meds_bp.route('/penicillin', methods=['GET', 'POST'])
-def penicillin_g_sodium_route():
-    dose = calculated_ml = None
-    error = None
-    try:
-        if request.method == 'POST':
-            raw_dose = request.form.get('dose')
-            if raw_dose:
-                dose = _as_float(raw_dose, 'dose')
-                if dose <= 0:
-                    raise ValueError("ขนาดยาต้องมากกว่า 0 unit")
-                # 5 MU / vial = 5,000,000 unit → เติมตัวทำละลายให้ครบ 10 ml
-                # สูตรโชว์หน้าเว็บ: ml = (unit × 10) ÷ 5,000,000
-                calculated_ml = _round2((dose * 10.0) / 5_000_000.0)
-    except Exception as e:
-        error = f"กรุณากรอกข้อมูลที่ถูกต้อง: {e}"
-
-    return render_template(
-        'penicillin_g_sodium.html',
-        dose=dose,
-        calculated_ml=calculated_ml,
-        error=error,
-        update_date=UPDATE_DATE,
-    )
 
 @meds_bp.route('/phenobarbital', methods=['GET', 'POST'])
 def phenobarbital_route():
@@ -1516,529 +562,21 @@ def phenobarbital_route():
                            target_conc=TARGET_CONC, dose=dose, vol_ml=vol_ml, error=error)
 
 
-@meds_bp.route('/phenytoin', methods=['GET', 'POST'])
-def phenytoin_route():
-    dose = result_ml = error = None
-    if request.method == 'POST':
-        try:
-            dose = _as_float(request.form.get('dose'), 'dose')
-            result_ml = _round2(dose * 4)  # placeholder
-        except Exception:
-            error = "กรุณากรอกขนาดยาที่ถูกต้อง"
-    return render_template('phenytoin.html',
-                           dose=dose, result_ml=result_ml, error=error, update_date=UPDATE_DATE)
-
-
-@meds_bp.route('/remdesivir', methods=['GET', 'POST'])
-def remdesivir_route():
-    dose = result_ml_1 = result_ml_2 = None
-    final_result_1 = final_result_2 = None
-    multiplication = None
-    error = None
-
-    def ml1_from_dose(d):
-        # หลังละลาย 100 mg → 20 ml = 5 mg/ml
-        return _round2(float(d) * 20.0 / 100.0)
-
-    def ml2_from_dose(d):
-        # จำกัดความเข้ม ≤ 1.25 mg/ml
-        return _round2(float(d) / 1.25)
-
-    try:
-        if request.method == 'POST':
-            action = (request.form.get('action') or 'dose').strip().lower()
-
-            # รอบที่ 1: คำนวณจาก dose ครั้งแรก
-            if action == 'dose':
-                dose = _as_float(request.form.get('dose'), 'dose')
-                if dose <= 0:
-                    raise ValueError("ขนาดยาต้องมากกว่า 0 mg")
-                result_ml_1 = ml1_from_dose(dose)
-                result_ml_2 = ml2_from_dose(dose)
-
-            # รอบที่ 2: ใช้ค่าที่ซ่อนอยู่ + multiplication
-            elif action == 'condition':
-                dose_hidden = (request.form.get('dose_hidden') or '').strip()
-                res1_hidden = (request.form.get('result_ml_1_hidden') or '').strip()
-                res2_hidden = (request.form.get('result_ml_2_hidden') or '').strip()
-
-                if dose_hidden:
-                    dose = _as_float(dose_hidden, 'dose_hidden')
-                    if dose <= 0:
-                        raise ValueError("ขนาดยาต้องมากกว่า 0 mg")
-                    result_ml_1 = ml1_from_dose(dose)
-                    result_ml_2 = ml2_from_dose(dose)
-                elif res1_hidden and res2_hidden:
-                    result_ml_1 = _round2(float(res1_hidden))
-                    result_ml_2 = _round2(float(res2_hidden))
-                    # ถ้าต้องการย้อนกลับหาขนาดยา สามารถคำนวณได้จากสูตร แต่ไม่จำเป็นต่อการแสดงผล
-                else:
-                    raise ValueError("ไม่พบค่าตั้งต้น (dose/result_ml)")
-
-                multiplication = _as_float(
-                    request.form.get('multiplication'), 'multiplication'
-                )
-                if multiplication <= 0:
-                    raise ValueError("multiplication ต้องมากกว่า 0")
-
-                final_result_1 = _round2(result_ml_1 * multiplication)
-                final_result_2 = _round2(result_ml_2 * multiplication)
-
-            # fallback: เผื่อส่ง dose + multiplication มาทีเดียว
-            else:
-                raw_dose = request.form.get('dose')
-                raw_mult = request.form.get('multiplication')
-
-                if raw_dose:
-                    dose = _as_float(raw_dose, 'dose')
-                    if dose <= 0:
-                        raise ValueError("ขนาดยาต้องมากกว่า 0 mg")
-                    result_ml_1 = ml1_from_dose(dose)
-                    result_ml_2 = ml2_from_dose(dose)
-
-                if raw_mult:
-                    multiplication = _as_float(raw_mult, 'multiplication')
-                    if multiplication <= 0:
-                        raise ValueError("multiplication ต้องมากกว่า 0")
-                    if result_ml_1 is None or result_ml_2 is None:
-                        raise ValueError("ไม่พบผลรอบแรก")
-                    final_result_1 = _round2(result_ml_1 * multiplication)
-                    final_result_2 = _round2(result_ml_2 * multiplication)
-
-    except Exception as e:
-        error = f"กรุณาใส่ข้อมูลที่ถูกต้อง: {e}"
-
-    return render_template(
-        'remdesivir.html',
-        dose=dose,
-        result_ml_1=result_ml_1,
-        result_ml_2=result_ml_2,
-        final_result_1=final_result_1,
-        final_result_2=final_result_2,
-        multiplication=multiplication,
-        error=error,
-        update_date=UPDATE_DATE,
-    )
-
-
-@meds_bp.route('/sul-am', methods=['GET', 'POST'])
-def sul_am_route():
-    dose = result_ml = multiplication = final_result = None
-    content_extra = error = None
-
-    try:
-        if request.method == 'POST':
-            action = (request.form.get('action') or 'dose').strip()
-
-            # รอบที่ 1: คำนวณ mg → ml
-            if action == 'dose':
-                dose = _as_float(request.form.get('dose'), 'dose')
-                if dose <= 0:
-                    raise ValueError('dose must be > 0')
-
-                # 3 g / vial → เติมรวม 8 mL  ⇒ 375 mg/mL
-                # สูตร: ml = (dose * 8) / 3000
-                result_ml = _round2((dose * 8.0) / 3000.0)
-
-            # รอบที่ 2: เลือกตัวคูณ 3X หรือ 6X
-            elif action == 'condition':
-                dose = _as_float(request.form.get('dose_hidden'), 'dose_hidden')
-                result_ml = _as_float(request.form.get('result_ml_hidden'), 'result_ml_hidden')
-                multiplication = _as_int(request.form.get('multiplication'), 'multiplication')
-
-                if multiplication not in (3, 6):
-                    raise ValueError("multiplication must be 3 or 6")
-
-                final_result = _round2(result_ml * multiplication)
-                # ใช้ข้อความอธิบายจาก helper เดิม
-                content_extra = _content_extra_by_mult(multiplication)
-
-            else:
-                raise ValueError("unknown action")
-
-    except Exception as e:
-        # ถ้าอยาก debug รายละเอียด เพิ่ม f" ({e})" ชั่วคราวได้
-        error = "กรุณากรอกข้อมูลที่ถูกต้อง"
-
-    return render_template(
-        'sul_am.html',
-        dose=dose,
-        result_ml=result_ml,
-        multiplication=multiplication,
-        final_result=final_result,
-        content_extra=content_extra,
-        error=error,
-        update_date=UPDATE_DATE
-    )
-
-@meds_bp.route('/sulbactam', methods=['GET', 'POST'])
-def sulbactam_route():
-    dose = None
-    result_ml = None
-    multiplication = None
-    msg_block = None
-    content_extra = None
-    error = None
-
-    if request.method == 'POST':
-        action = request.form.get('action', 'dose')
-        try:
-            if action == 'dose':
-                dose = _as_float(request.form.get('dose'), 'dose')
-                if dose <= 0:
-                    raise ValueError("ขนาดยาต้องมากกว่า 0")
-                # 2 g / 8 mL = 250 mg/mL → ml = mg × 8 / 2000
-                result_ml = _round2(dose * 8.0 / 2000.0)
-
-            elif action == 'condition':
-                dose = _as_float(request.form.get('dose_hidden'), 'dose_hidden')
-                result_ml = _as_float(
-                    request.form.get('result_ml_hidden'),
-                    'result_ml_hidden'
-                )
-                multiplication = _as_int(
-                    request.form.get('multiplication'),
-                    'multiplication'
-                )
-                if multiplication not in (3, 6):
-                    raise ValueError("multiplication ต้องเป็น 3 หรือ 6 เท่า")
-
-                # กำหนด message และ content_extra ตามที่ต้องการ
-                if multiplication == 3:
-                    target_total = 9.0
-                    msg_block = "ปริมาณที่บริหารเข้าทารก ≈ 3 mL → ตั้งอัตรา 3 mL/hr (> 1 hr)"
-                    content_extra = {
-                        "message": "การบริหารยาโดย Intermittent intravenous infusion pump",
-                        "details": [
-                            "สำหรับทารกที่มีน้ำหนักมากกว่า 1,500 กรัม",
-                            "กำหนดให้ปริมาณสารละลายยา (ปริมาณยา + สารละลายเจือจางยา) = 8 ml.",
-                            "(ความจุของ Extension Tube ประมาณ 5 ml. + Volume ที่ต้องบริหารเข้าผู้ป่วย 3 ml.)",
-                            "<div style='text-align:center'>(3X + สารละลายเจือจาง Up to 9 ml.)</div>",
-                            "การเตรียมยา:",
-                            "1. คำนวณปริมาณยาที่ต้องการใช้เป็นมิลลิลิตร (ml.) แทนค่าในสูตร",
-                            "2. ใช้ Syringe ขนาดที่เหมาะสม ดูดปริมาณยาที่ต้องการเตรียมไว้",
-                            "3. ใช้ Syringe ขนาด 10 ml. หรือ 20 ml. ดูดปริมาณสารละลายเจือจางยาเตรียมไว้",
-                            "4. ผสมยาใน Syringe ที่มีสารละลายเจือจางยาอยู่ Mixed ให้เข้ากัน",
-                            "5. ต่อ Syringe กับ Extension Tube นำไปวางบน Syringe pump กด Start ตั้งอัตราเร็ว 3 ml/hr.",
-                            "6. Purge ยาให้ทั่วท่อโดยการดัน Syringe 3 ml. แล้วจึงบริหารผู้ป่วย",
-                        ],
-                    }
-                else:  # multiplication == 6
-                    target_total = 6.0
-                    msg_block = "ปริมาณที่บริหารเข้าทารก ≈ 1 mL → ตั้งอัตรา 1 mL/hr (> 1 hr)"
-                    content_extra = {
-                        "message": "การบริหารยาโดย Intermittent intravenous infusion",
-                        "details": [
-                            "สำหรับทารกที่มีน้ำหนักน้อยกว่า 1,500 กรัม",
-                            "1. กำหนดให้สารละลายยาซึ่งบริหารเข้าสู่ผู้ป่วยปริมาณเท่ากับ 1 ml.",
-                            "2. ให้ X คือ ปริมาณยาที่ต้องการเตรียม กำหนดสูตรในการเตรียมสารละลายยา ดังนี้:",
-                            "<div style='text-align:center'>(6X + สารละลายเจือจาง Up to 6 ml.)</div>",
-                            "3. จากข้อ 2 จะได้สารละลายทั้งหมด 6 ml. ซึ่งหมายถึง ความจุของ Extension Tube ประมาณ 5 ml. + Volume ที่ต้องการบริหารเข้าสู่ผู้ป่วย 1 ml.",
-                            "4. บริหารยาโดยใช้ Syringe pump ตั้งอัตราเร็ว 1 ml/hr.",
-                        ],
-                    }
-
-        except Exception as e:
-            error = str(e)
-
-    return render_template(
-        'sulbactam.html',
-        dose=dose,
-        result_ml=result_ml,
-        multiplication=multiplication,
-        msg_block=msg_block,
-        content_extra=content_extra,
-        error=error,
-        update_date=UPDATE_DATE,
-    )
-
-
-@meds_bp.route('/sulperazone', methods=['GET', 'POST'])
-def sulperazone_route():
-    dose = None
-    result_ml = None
-    final_result = None
-    multiplication = None
-    msg_block = None
-    content_extra = None
-    error = None
-
-    try:
-        if request.method == 'POST':
-            action = (request.form.get('action') or 'dose').strip()
-
-            # รอบที่ 1: mg → ml
-            if action == 'dose':
-                dose = _as_float(request.form.get('dose'), 'dose')
-                if dose <= 0:
-                    raise ValueError("dose ต้องเป็นค่ามากกว่า 0")
-
-                # Sulperazone: 1 g / 10 mL = 100 mg/mL
-                # คุณกำหนดสูตรไว้เป็น: ml = mg × 10 ÷ 500 (ตามส่วน Sulbactam 500 mg)
-                result_ml = _round2((dose * 10.0) / 500.0)
-
-            # รอบที่ 2: เลือกเงื่อนไข 3X หรือ 6X
-            elif action == 'condition':
-                # hidden ค่าที่คำนวณจากรอบแรก
-                dose = _as_float(
-                    request.form.get('dose_hidden') or request.form.get('dose'),
-                    'dose_hidden'
-                )
-
-                res_h = request.form.get('result_ml_hidden')
-                if res_h:
-                    result_ml = _as_float(res_h, 'result_ml_hidden')
-                else:
-                    # คิดใหม่กรณีไม่มี hidden
-                    result_ml = _round2((dose * 10.0) / 500.0)
-
-                multiplication = _as_int(
-                    request.form.get('multiplication') or '0',
-                    'multiplication'
-                )
-                if multiplication not in (3, 6):
-                    raise ValueError("multiplication ต้องเป็น 3 หรือ 6 เท่า")
-
-                final_result = _round2(result_ml * multiplication)
-
-                # กำหนด message และ content_extra ตามที่ต้องการ
-                if multiplication == 3:
-                    target_total = 9.0
-                    msg_block = "ปริมาณที่บริหารเข้าทารก ≈ 3 mL → ตั้งอัตรา 3 mL/hr (> 1 hr)"
-                    content_extra = {
-                        "message": "การบริหารยาโดย Intermittent intravenous infusion pump",
-                        "details": [
-                            "สำหรับทารกที่มีน้ำหนักมากกว่า 1,500 กรัม",
-                            "กำหนดให้ปริมาณสารละลายยา (ปริมาณยา + สารละลายเจือจางยา) = 8 ml.",
-                            "(ความจุของ Extension Tube ประมาณ 5 ml. + Volume ที่ต้องบริหารเข้าผู้ป่วย 3 ml.)",
-                            "<div style='text-align:center'>(3X + สารละลายเจือจาง Up to 9 ml.)</div>",
-                            "การเตรียมยา:",
-                            "1. คำนวณปริมาณยาที่ต้องการใช้เป็นมิลลิลิตร (ml.) แทนค่าในสูตร",
-                            "2. ใช้ Syringe ขนาดที่เหมาะสม ดูดปริมาณยาที่ต้องการเตรียมไว้",
-                            "3. ใช้ Syringe ขนาด 10 ml. หรือ 20 ml. ดูดปริมาณสารละลายเจือจางยาเตรียมไว้",
-                            "4. ผสมยาใน Syringe ที่มีสารละลายเจือจางยาอยู่ Mixed ให้เข้ากัน",
-                            "5. ต่อ Syringe กับ Extension Tube นำไปวางบน Syringe pump กด Start ตั้งอัตราเร็ว 3 ml/hr.",
-                            "6. Purge ยาให้ทั่วท่อโดยการดัน Syringe 3 ml. แล้วจึงบริหารผู้ป่วย",
-                        ],
-                    }
-                else:  # multiplication == 6
-                    target_total = 6.0
-                    msg_block = "ปริมาณที่บริหารเข้าทารก ≈ 1 mL → ตั้งอัตรา 1 mL/hr (> 1 hr)"
-                    content_extra = {
-                        "message": "การบริหารยาโดย Intermittent intravenous infusion",
-                        "details": [
-                            "สำหรับทารกที่มีน้ำหนักน้อยกว่า 1,500 กรัม",
-                            "1. กำหนดให้สารละลายยาซึ่งบริหารเข้าสู่ผู้ป่วยปริมาณเท่ากับ 1 ml.",
-                            "2. ให้ X คือ ปริมาณยาที่ต้องการเตรียม กำหนดสูตรในการเตรียมสารละลายยา ดังนี้:",
-                            "<div style='text-align:center'>(6X + สารละลายเจือจาง Up to 6 ml.)</div>",
-                            "3. จากข้อ 2 จะได้สารละลายทั้งหมด 6 ml. ซึ่งหมายถึง ความจุของ Extension Tube ประมาณ 5 ml. + Volume ที่ต้องการบริหารเข้าสู่ผู้ป่วย 1 ml.",
-                            "4. บริหารยาโดยใช้ Syringe pump ตั้งอัตราเร็ว 1 ml/hr.",
-                        ],
-                    }
-
-            else:
-                raise ValueError("unknown action")
-
-    except Exception as e:
-        error = f"กรุณากรอกข้อมูลที่ถูกต้อง: {e}"
-
-    return render_template(
-        'sulperazone.html',
-        dose=dose,
-        result_ml=result_ml,
-        final_result=final_result,
-        multiplication=multiplication,
-        msg_block=msg_block,
-        content_extra=content_extra,
-        error=error,
-        update_date=UPDATE_DATE
-    )
-
-@meds_bp.route('/tazocin', methods=['GET', 'POST'])
-def tazocin_route():
-    dose = result_ml = final_result = multiplication = None
-    error = None
-    content_extra = None
-
-    def ml_from_dose(d):  # Piperacillin 200 mg/mL
-        # dose (mg) * 20 mL / 4000 mg = dose / 200
-        return _round2(float(d) * 20.0 / 4000.0)
-
-    try:
-        if request.method == 'POST':
-            action = (request.form.get('action') or 'dose').strip().lower()
-
-            # รอบที่ 1: คำนวณ mg → ml
-            if action == 'dose':
-                dose = _as_float(request.form.get('dose'), 'dose')
-                if dose <= 0:
-                    raise ValueError("ขนาดยาต้องมากกว่า 0 mg")
-                result_ml = ml_from_dose(dose)
-
-            # รอบที่ 2: ใช้ dose_hidden / result_ml_hidden + multiplication
-            elif action == 'condition':
-                multiplication = _as_int(
-                    request.form.get('multiplication'), 'multiplication'
-                )
-
-                dose_hidden = (request.form.get('dose_hidden') or '').strip()
-                result_hidden = (request.form.get('result_ml_hidden') or '').strip()
-
-                if dose_hidden:
-                    dose = _as_float(dose_hidden, 'dose_hidden')
-                    if dose <= 0:
-                        raise ValueError("ขนาดยาต้องมากกว่า 0 mg")
-                    result_ml = ml_from_dose(dose)
-                elif result_hidden:
-                    result_ml = _round2(float(result_hidden))
-                    # ถ้าต้องการย้อนกลับไปหา dose:
-                    dose = _round2(result_ml * 200.0)
-                else:
-                    raise ValueError("ไม่พบค่าตั้งต้น (dose/result_ml)")
-
-                if multiplication not in (3, 6):
-                    raise ValueError("multiplication ต้องเป็น 3 หรือ 6")
-
-                final_result = _round2(result_ml * multiplication)
-                content_extra = _content_extra_by_mult(multiplication)
-
-            # fallback: ส่ง dose + multiplication มารอบเดียว
-            else:
-                raw_dose = request.form.get('dose')
-                raw_mult = request.form.get('multiplication')
-
-                if raw_dose:
-                    dose = _as_float(raw_dose, 'dose')
-                    if dose <= 0:
-                        raise ValueError("ขนาดยาต้องมากกว่า 0 mg")
-                    result_ml = ml_from_dose(dose)
-
-                if raw_mult:
-                    multiplication = _as_int(raw_mult, 'multiplication')
-                    if multiplication not in (3, 6):
-                        raise ValueError("multiplication ต้องเป็น 3 หรือ 6")
-                    if result_ml is None:
-                        raise ValueError("ไม่พบผลรอบแรก")
-                    final_result = _round2(result_ml * multiplication)
-                    content_extra = _content_extra_by_mult(multiplication)
-
-    except Exception as e:
-        error = f"กรุณากรอกข้อมูลที่ถูกต้อง: {e}"
-
-    return render_template(
-        'tazocin.html',
-        dose=dose,
-        result_ml=result_ml,
-        final_result=final_result,
-        multiplication=multiplication,
-        content_extra=content_extra,
-        error=error,
-        update_date=UPDATE_DATE,
-    )
-
-@meds_bp.route('/unasyn', methods=['GET', 'POST'])
-def unasyn_route():
-    # ค่าเริ่มต้น
-    dose = result_ml = final_result = None
-    multiplication = None
-    content_extra = error = None
-
-    try:
-        if request.method == 'POST':
-            action = (request.form.get('action') or 'dose').strip()
-
-            # รอบที่ 1: คำนวณ mg → ml
-            if action == 'dose':
-                dose = _as_float(request.form.get('dose'), 'dose')
-                # 375 mg/ml → ml = mg × 8 ÷ 3000
-                result_ml = _round2((dose * 8.0) / 3000.0)
-
-            # รอบที่ 2: ใช้ค่าที่ซ่อน + ตัวคูณ 3 หรือ 6
-            elif action == 'condition':
-                dose = _as_float(request.form.get('dose_hidden'), 'dose_hidden')
-                result_ml = _as_float(request.form.get('result_ml_hidden'), 'result_ml_hidden')
-                multiplication = _as_int(request.form.get('multiplication'), 'multiplication')
-
-                if multiplication not in (3, 6):
-                    raise ValueError("กรุณาเลือก 3 หรือ 6 เท่า")
-
-                final_result = _round2(result_ml * multiplication)
-                content_extra = _content_extra_by_mult(multiplication)
-
-    except Exception as e:
-        error = f"กรุณาใส่ข้อมูลที่ถูกต้อง: {e}"
-
-    return render_template(
-        'unasyn.html',
-        dose=dose,
-        result_ml=result_ml,
-        final_result=final_result,
-        multiplication=multiplication,
-        content_extra=content_extra,
-        error=error,
-        update_date=UPDATE_DATE,
-    )
-
-@meds_bp.route('/vancomycin', methods=['GET', 'POST'])
-def vancomycin_route():
-    dose = concentration = result_ml_1 = result_ml_2 = None
-    multiplication = final_result_1 = final_result_2 = None
-    error = None
-    if request.method == 'POST':
-        try:
-            action = (request.form.get('action') or '').strip()
-            if action == 'dose':
-                dose = _as_float(request.form.get('dose'), 'dose')
-                concentration = _as_int(request.form.get('concentration'), 'concentration')
-                if concentration not in (5, 10):
-                    raise ValueError("เลือกระดับความเข้มข้นได้เฉพาะ 5 mg/mL หรือ 10 mg/mL")
-                # รอบแรก:
-                result_ml_1 = _round2((dose * 10.0) / 500.0)  # 500 mg/10 mL → 50 mg/mL
-                result_ml_2 = _round2(dose / float(concentration))
-            elif action == 'condition':
-                dose = _as_float(request.form.get('dose_hidden'), 'dose_hidden')
-                concentration = _as_int(request.form.get('concentration_hidden'), 'concentration_hidden')
-                result_ml_1 = _as_float(request.form.get('result_ml_1_hidden'), 'result_ml_1_hidden')
-                result_ml_2 = _as_float(request.form.get('result_ml_2_hidden'), 'result_ml_2_hidden')
-                multiplication = _as_float(request.form.get('multiplication'), 'multiplication')
-                if concentration not in (5, 10):
-                    raise ValueError("เลือกระดับความเข้มข้นได้เฉพาะ 5 mg/mL หรือ 10 mg/mL")
-                final_result_1 = _round2(result_ml_1 * multiplication)
-                final_result_2 = _round2(result_ml_2 * multiplication)
-            else:
-                # fallback ฟอร์มเก่า
-                if request.form.get('dose'):
-                    dose = _as_float(request.form.get('dose'), 'dose')
-                if request.form.get('concentration'):
-                    concentration = _as_int(request.form.get('concentration'), 'concentration')
-                if dose is not None and concentration in (5, 10):
-                    result_ml_1 = _round2((dose * 10.0) / 500.0)
-                    result_ml_2 = _round2(dose / float(concentration))
-        except Exception as e:
-            error = f"กรุณากรอกข้อมูลที่ถูกต้อง: {e}"
-
-    return render_template('vancomycin.html',
-                           dose=dose, concentration=concentration,
-                           result_ml_1=result_ml_1, result_ml_2=result_ml_2,
-                           multiplication=multiplication, final_result_1=final_result_1,
-                           final_result_2=final_result_2, error=error, update_date=UPDATE_DATE)
-
-
 # routes/routes_medications.py
 
 @meds_bp.route("/time_management")
 def time_management_route():
-    return render_template("time_management.html", update_date=UPDATE_DATE)
+    return render_template("time_management.html", update_date=_update_date())
 
 
 @meds_bp.route("/run_time")
 def run_time():
-    return render_template("run_time.html", update_date=UPDATE_DATE)
+    return render_template("run_time.html", update_date=_update_date())
 
 
 @meds_bp.route("/run_time_stop")
 def run_time_stop():
-    return render_template("run_time_stop.html", update_date=UPDATE_DATE)
+    return render_template("run_time_stop.html", update_date=_update_date())
 
 # ฟังก์ชันช่วยคำนวณ PMA (ใช้ต่อ)
 def _pma_helper(gestational_age_weeks, gestational_age_days, postnatal_age_days):
@@ -2049,6 +587,44 @@ def _pma_helper(gestational_age_weeks, gestational_age_days, postnatal_age_days)
     return pma_weeks, pma_days, calc
 
 
+# ---------- Census batch dosing (ทั้ง ward ใน request เดียว) ----------
+def _census_lines(text_stream, fmt):
+    results = iter_census(csv.DictReader(text_stream), DOSE_RULES, _pma_helper)
+    return iter_ndjson_lines(results) if fmt == "ndjson" else iter_csv_lines(results)
+
+
+@meds_bp.post("/api/census")
+def api_census():
+    """
+    body: CSV (ga_weeks, ga_days, pna_days, bw, drugs) เป็น request body ตรง ๆ หรือ multipart field "file"
+    ?format=csv (default) | ndjson — ผลลัพธ์ stream กลับระหว่างคำนวณ
+    """
+    fmt = (request.args.get("format") or "").lower()
+    if not fmt:
+        fmt = "ndjson" if "ndjson" in (request.headers.get("Accept") or "") else "csv"
+    if fmt not in ("csv", "ndjson"):
+        return jsonify({"error": "format ต้องเป็น csv หรือ ndjson"}), 400
+
+    upload = request.files.get("file")
+    raw = upload.stream if upload is not None else request.stream
+    text = io.TextIOWrapper(raw, encoding="utf-8-sig", newline="")
+
+    mimetype = "application/x-ndjson" if fmt == "ndjson" else "text/csv"
+    return Response(stream_with_context(_census_lines(text, fmt)), mimetype=mimetype)
+
+
+@meds_bp.cli.command("census")
+@click.argument("census_csv", type=click.File("r", encoding="utf-8-sig"))
+@click.option("-o", "--output", type=click.File("w", encoding="utf-8"), default="-",
+              help="ไฟล์ผลลัพธ์ (default: stdout)")
+@click.option("--format", "fmt", type=click.Choice(["csv", "ndjson"]), default="csv", show_default=True)
+def census_command(census_csv, output, fmt):
+    """คำนวณขนาดยาทั้ง ward จาก census CSV (1 แถวต่อทารก)"""
+    for line in _census_lines(census_csv, fmt):
+        output.write(line)
+    output.flush()
+
+
 @meds_bp.route("/calculate_pma", methods=["GET", "POST"])
 def calculate_pma_route():
     # ค่าตั้งต้น (ให้ template ใช้เติมช่อง input กลับ)
@@ -2084,7 +660,7 @@ def calculate_pma_route():
         calc_unit=calc_unit,        # ใช้ชื่อ calc_unit ใน template
         postnatal_days=postnatal_days,
         error=error,
-        update_date=UPDATE_DATE,
+        update_date=_update_date(),
     )
 
 
@@ -2180,32 +756,15 @@ def amikin_dose():
     except (ValueError, TypeError):
         return "Invalid input parameters", 400
 
-    # ===== Logic คำนวณ dose ตามน้ำหนัก + postnatal age (เหมือนที่คุณเขียน) =====
-    if postnatal_days < 14:
-        if bw <= 0.8:
-            dose_per_kg = 16
-        elif 0.8 < bw <= 1.2:
-            dose_per_kg = 16
-        elif 1.2 < bw <= 2.0:
-            dose_per_kg = 15
-        elif 2.0 < bw <= 2.8:
-            dose_per_kg = 15
-        else:
-            dose_per_kg = 15
-    else:  # postnatal_days >= 14
-        if bw <= 0.8:
-            dose_per_kg = 20
-        elif 0.8 < bw <= 1.2:
-            dose_per_kg = 20
-        elif 1.2 < bw <= 2.0:
-            dose_per_kg = 18
-        elif 2.0 < bw <= 2.8:
-            dose_per_kg = 18
-        else:
-            dose_per_kg = 18
+    # ===== dose ตามน้ำหนัก + postnatal age (ตาราง amikin ใน static/dose_rules.json) =====
+    table = DOSE_RULES["amikin"]
+    rule = table.lookup(postnatal_days=postnatal_days, bw=bw)
+    dose_per_kg = rule["dose_per_kg"]
+    active_row = rule["active_row"]
+    pma_row = DOSE_RULES["amikin_pma"].lookup(pma_weeks=pma_weeks, postnatal_days=postnatal_days)
 
     # คำนวณปริมาณยา (mg/dose)
-    calculated_dose = round(dose_per_kg * bw, 2)
+    calculated_dose = table.dose_mg(dose_per_kg, bw)
 
     return render_template(
         "amikin_dose.html",
@@ -2216,6 +775,9 @@ def amikin_dose():
         bw=bw,
         dose_per_kg=dose_per_kg,          # ส่งไปให้ template ใช้แสดงสูตร
         calculated_dose=calculated_dose,  # mg/dose
+        interval_hours=rule["interval_hours"],
+        active_row=active_row,
+        pma_row=pma_row["active_row"] if pma_row else None,
         update_date=current_app.config.get("UPDATE_DATE"),
     )
 
@@ -2257,7 +819,7 @@ def aminophylline_dose():
         loading_dose=loading_dose,
         maintenance_dose_min=maintenance_dose_min,
         maintenance_dose_max=maintenance_dose_max,
-        update_date=UPDATE_DATE,
+        update_date=_update_date(),
     )
 
 @meds_bp.route('/amoxicillin_clavimoxy_dose')
@@ -2338,7 +900,7 @@ def amoxicillin_clavimoxy_dose():
         actual_dose=actual_dose,
         scenario=scenario,
         explanation=explanation,
-        update_date=UPDATE_DATE,
+        update_date=_update_date(),
     )
 
 @meds_bp.route('/amphotericinB_dose')
@@ -2378,7 +940,7 @@ def amphotericinB_dose():
         bw=bw,
         maintenance_dose_min=maintenance_dose_min,
         maintenance_dose_max=maintenance_dose_max,
-        update_date=UPDATE_DATE,
+        update_date=_update_date(),
     )
 
 @meds_bp.route('/ampicillin_dose')
@@ -2434,7 +996,7 @@ def ampicillin_dose():
         bw=bw,
         calculated_dose=calculated_dose,
         active_row=active_row,
-        update_date=UPDATE_DATE
+        update_date=_update_date()
     )
 
 
@@ -2532,7 +1094,7 @@ def cefazolin_dose():
         interval=interval,
         # ถ้าอยากใช้ใน text เพิ่มเติม ก็ส่ง dose_per_kg ด้วยได้
         dose_per_kg=dose_per_kg,
-        update_date=UPDATE_DATE
+        update_date=_update_date()
     )
 
 @meds_bp.route('/cefotaxime_dose')
@@ -2575,7 +1137,7 @@ def cefotaxime_dose():
         postnatal_days=postnatal_days,
         bw=bw,
         calculated_dose=calculated_dose,
-        update_date=UPDATE_DATE
+        update_date=_update_date()
     )
 
 @meds_bp.route('/cloxacillin_dose')
@@ -2633,7 +1195,7 @@ def cloxacillin_dose():
         bw=bw,
         calculated_dose=calculated_dose,
         active_row=active_row,
-        update_date=UPDATE_DATE
+        update_date=_update_date()
     )
 
 @meds_bp.route('/colistin_dose')
@@ -2706,7 +1268,7 @@ def colistin_dose():
         min_dose=calculated_min_dose,
         max_dose=calculated_max_dose,
         interval=interval,
-        update_date=UPDATE_DATE,
+        update_date=_update_date(),
     )
 
 
@@ -2733,25 +1295,14 @@ def gentamicin_dose():
     except ValueError:
         return "Invalid data received - value error", 400
 
-    # กำหนด dose per kg ตามช่วงอายุ (ให้ตรงกับตารางด้านบน)
-    if pma_weeks <= 29 and postnatal_days <= 7:
-        dose_per_kg = 5.0          # q 48h
-    elif pma_weeks <= 29 and 8 <= postnatal_days <= 28:
-        dose_per_kg = 4.0          # q 36h
-    elif pma_weeks <= 29 and postnatal_days > 28:
-        dose_per_kg = 4.0          # q 24h
-    elif 30 <= pma_weeks <= 34 and postnatal_days <= 7:
-        dose_per_kg = 4.5          # q 36h
-    elif 30 <= pma_weeks <= 34 and postnatal_days > 7:
-        dose_per_kg = 4.0          # q 24h
-    elif pma_weeks >= 35:
-        dose_per_kg = 4.0          # q 24h
-    else:
+    # กำหนด dose per kg ตามช่วงอายุ (ตาราง gentamicin ใน static/dose_rules.json)
+    table = DOSE_RULES["gentamicin"]
+    rule = table.lookup(pma_weeks=pma_weeks, postnatal_days=postnatal_days)
+    if rule is None:
         return "No suitable dose found", 400
 
     # คำนวณปริมาณยา แล้ว “ตัดเศษลง”
-    raw_dose        = dose_per_kg * bw
-    calculated_dose = math.floor(raw_dose)
+    calculated_dose = table.dose_mg(rule["dose_per_kg"], bw)
 
     # ส่งไปแสดงผล
     return render_template(
@@ -2762,7 +1313,10 @@ def gentamicin_dose():
         postnatal_days=postnatal_days,
         bw=bw,
         calculated_dose=calculated_dose,
-        update_date=UPDATE_DATE,
+        dose_per_kg=rule["dose_per_kg"],
+        interval_hours=rule["interval_hours"],
+        active_row=rule["active_row"],
+        update_date=_update_date(),
     )
 
 @meds_bp.route('/meropenem_dose')
@@ -2796,44 +1350,23 @@ def meropenem_dose():
         return "Invalid input: Parameters must be numeric.", 400
 
     # 4) เลือก scenario + dose ตาม Intra-abdominal and non-CNS infections
-    scenario    = None   # ใช้ไป highlight ใน template
-    dose_per_kg = None   # mg/kg/dose
-    interval    = None   # text เช่น "every 8 hours"
-
-    # - Less than 32 weeks GA and less than 14 days PNA => 20 mg/kg q12h
-    if pma_weeks < 32 and postnatal_days < 14:
-        scenario    = 'intra1'
-        dose_per_kg = 20
-        interval    = "every 12 hours"
-
-    # - Less than 32 weeks GA and 14 days PNA and older => 20 mg/kg q8h
-    elif pma_weeks < 32 and postnatal_days >= 14:
-        scenario    = 'intra2'
-        dose_per_kg = 20
-        interval    = "every 8 hours"
-
-    # - 32 weeks GA and older, and less than 14 days PNA => 20 mg/kg q8h
-    elif pma_weeks >= 32 and postnatal_days < 14:
-        scenario    = 'intra3'
-        dose_per_kg = 20
-        interval    = "every 8 hours"
-
-    # - 32 weeks GA and older, and 14 days PNA and older => 30 mg/kg q8h
-    elif pma_weeks >= 32 and postnatal_days >= 14:
-        scenario    = 'intra4'
-        dose_per_kg = 30
-        interval    = "every 8 hours"
+    #    (ตาราง meropenem ใน static/dose_rules.json: GA < / ≥ 32 wk × PNA < / ≥ 14 d)
+    table = DOSE_RULES["meropenem"]
+    rule = table.lookup(pma_weeks=pma_weeks, postnatal_days=postnatal_days)
 
     # ถ้าไม่เข้าเคสใดเลย
-    if scenario is None or dose_per_kg is None or interval is None:
+    if rule is None:
         return (
             "No suitable dose found for the given PMA and postnatal age "
             "(Intra-abdominal scenario).",
             400,
         )
+    scenario    = rule["scenario"]      # ใช้ไป highlight ใน template
+    dose_per_kg = rule["dose_per_kg"]   # mg/kg/dose
+    interval    = rule["interval"]      # text เช่น "every 8 hours"
 
     # 5) คำนวณขนาดยาเป็น mg/dose ตามน้ำหนักจริง
-    total_dose = round(dose_per_kg * bw, 2)   # mg/dose
+    total_dose = table.dose_mg(dose_per_kg, bw)   # mg/dose
 
     # 6) ส่งค่าไปที่ template
     return render_template(
@@ -2847,7 +1380,7 @@ def meropenem_dose():
         total_dose=total_dose,     # mg/dose สำหรับเด็กคนนี้
         interval=interval,
         scenario=scenario,
-        update_date=UPDATE_DATE,
+        update_date=_update_date(),
     )
 
 @meds_bp.route('/vancomycin_dose')
@@ -2881,42 +1414,20 @@ def vancomycin_dose():
         print("Value error occurred, returning 400")
         return "Invalid data received - value error", 400
 
-    # ---- Dose per kg (guideline 10–15 mg/kg/dose) ----
-    dose_min_per_kg = 10.0
-    dose_max_per_kg = 15.0
-
-    # คำนวณเป็น mg/dose จริงจากน้ำหนัก
-    dose_min_mg = math.floor(bw * dose_min_per_kg)
-    dose_max_mg = math.floor(bw * dose_max_per_kg)
-
-    # ---- เลือก interval ตาม PMA / postnatal age (ตามตาราง) ----
-    interval   = None
-    active_row = None
+    # ---- เลือก interval ตาม PMA / postnatal age (ตาราง vancomycin ใน static/dose_rules.json) ----
+    table = DOSE_RULES["vancomycin"]
+    rule = table.lookup(pma_weeks=pma_weeks, postnatal_days=postnatal_days)
+    if rule is None:
+        return "No suitable dosing interval found for the given PMA and postnatal age", 400
 
-    if pma_weeks <= 29 and postnatal_days <= 14:
-        interval   = "every 18 hours"
-        active_row = "29_0_14"
-    elif pma_weeks <= 29 and postnatal_days > 14:
-        interval   = "every 12 hours"
-        active_row = "29_15plus"
-    elif 30 <= pma_weeks <= 36 and postnatal_days <= 14:
-        interval   = "every 12 hours"
-        active_row = "30_36_0_14"
-    elif 30 <= pma_weeks <= 36 and postnatal_days > 14:
-        interval   = "every 8 hours"
-        active_row = "30_36_15plus"
-    elif 37 <= pma_weeks <= 44 and postnatal_days <= 7:
-        interval   = "every 12 hours"
-        active_row = "37_44_0_7"
-    elif 37 <= pma_weeks <= 44 and postnatal_days > 7:
-        interval   = "every 8 hours"
-        active_row = "37_44_8plus"
-    elif pma_weeks >= 45:
-        interval   = "every 6 hours"
-        active_row = "45plus_all"
+    interval   = rule["interval"]
+    active_row = rule["active_row"]
 
-    if interval is None or active_row is None:
-        return "No suitable dosing interval found for the given PMA and postnatal age", 400
+    # ---- Dose per kg (guideline 10–15 mg/kg/dose) → mg/dose จริงจากน้ำหนัก ----
+    dose_min_per_kg = rule["dose_min_per_kg"]
+    dose_max_per_kg = rule["dose_max_per_kg"]
+    dose_min_mg = table.dose_mg(dose_min_per_kg, bw)
+    dose_max_mg = table.dose_mg(dose_max_per_kg, bw)
 
     # Render template
     return render_template(
@@ -2932,5 +1443,5 @@ def vancomycin_dose():
         dose_max_per_kg=dose_max_per_kg,
         interval=interval,
         active_row=active_row,
-        update_date=UPDATE_DATE,
+        update_date=_update_date(),
     )
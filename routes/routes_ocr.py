@@ -0,0 +1,185 @@
+# routes/routes_ocr.py
+"""
+OCR ใบสั่งยา (หน้า scan_server + /api/ocr + /api/ocr/batch)
+
+งาน OCR ทำใน app_shared.ocr.OcrPool (process แยก) — request แค่ส่งงานแล้วรอผลแบบมี timeout
+config: OCR_WORKERS / OCR_QUEUE_SIZE / OCR_TIMEOUT / OCR_LANGS / OCR_PREWARM
+        OCR_CACHE_BYTES / OCR_BITMAP_CACHE_BYTES / OCR_CACHE_DIR / OCR_CACHE_DISK_BYTES
+"""
+import json
+import threading
+
+from flask import Blueprint, Response, current_app, jsonify, render_template, request, stream_with_context, url_for
+
+from app_shared.ocr import OcrBusy, OcrPool, OcrUnavailable, easyocr_available
+from app_shared.orders import parse_orders, verify_order
+
+ocr_bp = Blueprint("ocr", __name__)
+
+MAX_OCR_BATCH = 20
+
+_pool_lock = threading.Lock()
+
+
+def _ocr_pool() -> OcrPool | None:
+    """pool ของแอปนี้ (สร้างครั้งแรกที่ใช้) ; None = เครื่องนี้ไม่มี easyocr"""
+    ext = current_app.extensions
+    if "ocr_pool" in ext:
+        return ext["ocr_pool"]
+
+    with _pool_lock:
+        if "ocr_pool" not in ext:
+            pool = None
+            if easyocr_available():
+                cfg = current_app.config
+                pool = OcrPool(
+                    workers=cfg.get("OCR_WORKERS", 1),
+                    max_queue=cfg.get("OCR_QUEUE_SIZE", 8),
+                    engine_args=(tuple(cfg.get("OCR_LANGS", ("en", "th"))),),
+                    cache_bytes=cfg.get("OCR_CACHE_BYTES", 0),
+                    bitmap_cache_bytes=cfg.get("OCR_BITMAP_CACHE_BYTES", 0),
+                    cache_dir=cfg.get("OCR_CACHE_DIR"),
+                    disk_max_bytes=cfg.get("OCR_CACHE_DISK_BYTES"),
+                ).start()
+            ext["ocr_pool"] = pool
+    return ext["ocr_pool"]
+
+
+def _error(msg, status):
+    return jsonify({"ok": False, "error": msg}), status
+
+
+def _busy(e):
+    resp, status = _error(str(e), 503)
+    resp.headers["Retry-After"] = "2"
+    return resp, status
+
+
+def _ocr_params():
+    return float(request.form.get("scale", 3.0)), int(request.form.get("threshold", 170))
+
+
+def _job_response(job_id, st):
+    body = {"ok": st["status"] != "error", "job_id": job_id, "status": st["status"]}
+    if st["status"] == "done":
+        body["text"] = "\n".join(st["lines"])
+        return jsonify(body), 200
+    if st["status"] == "error":
+        body["error"] = st["error"]
+        return jsonify(body), 500
+    body["poll_url"] = url_for("ocr.api_ocr_job", job_id=job_id)
+    return jsonify(body), 202
+
+
+@ocr_bp.record_once
+def _prewarm(state):
+    # OCR_PREWARM=True → สร้าง pool (และโหลด model ใน worker) ตั้งแต่ start แทนที่จะรอ request แรก
+    app = state.app
+    if app.config.get("OCR_PREWARM"):
+        with app.app_context():
+            _ocr_pool()
+
+
+@ocr_bp.route("/scan-server", methods=["GET"])
+def scan_server():
+    return render_template("scan_server.html")
+
+
+@ocr_bp.route("/api/ocr", methods=["POST"])
+def api_ocr():
+    """
+    form: image, scale (3.0), threshold (170), wait (1)
+    wait=0 → ตอบ 202 + job_id ทันที ; wait=1 → รอไม่เกิน OCR_TIMEOUT วินาที (เกิน = 202 ให้ไป poll ต่อ)
+    """
+    pool = _ocr_pool()
+    if pool is None:
+        return _error("EasyOCR ไม่พร้อมใช้งาน", 503)
+    if "image" not in request.files:
+        return _error("ไม่พบไฟล์ image", 400)
+
+    try:
+        scale, thresh = _ocr_params()
+    except ValueError:
+        return _error("scale/threshold ต้องเป็นตัวเลข", 400)
+
+    try:
+        job_id = pool.submit(request.files["image"].read(), scale=scale, thresh=thresh)
+    except OcrBusy as e:
+        return _busy(e)
+    except OcrUnavailable as e:
+        return _error(str(e), 503)
+
+    if request.form.get("wait", "1") != "0":
+        try:
+            pool.result(job_id, timeout=current_app.config.get("OCR_TIMEOUT", 30))
+        except Exception:
+            pass  # timeout → 202 ให้ poll ต่อ ; error → ส่งกลับผ่าน status ด้านล่าง
+    return _job_response(job_id, pool.status(job_id))
+
+
+@ocr_bp.route("/api/ocr/jobs/<job_id>", methods=["GET"])
+def api_ocr_job(job_id):
+    pool = _ocr_pool()
+    if pool is None:
+        return _error("EasyOCR ไม่พร้อมใช้งาน", 503)
+    try:
+        st = pool.status(job_id)
+    except KeyError:
+        return _error("ไม่พบงานนี้ (หมดอายุหรือไม่เคยมี)", 404)
+    return _job_response(job_id, st)
+
+
+def _batch_lines(results, names, weight_kg):
+    """ผลรายไฟล์จาก pool → NDJSON 1 บรรทัดต่อหน้า (+ orders ที่ parse/ตรวจแล้ว) แล้วปิดท้ายด้วยสรุป"""
+    pages = orders = errors = 0
+    for res in results:
+        i = res["file"]
+        if "error" in res:
+            errors += 1
+            yield json.dumps({"file": i, "name": names[i], "ok": False, "error": res["error"]},
+                             ensure_ascii=False) + "\n"
+            continue
+        for p, lines in enumerate(res["pages"]):
+            parsed = parse_orders(lines, weight_kg=weight_kg)
+            for order in parsed:
+                order["check"] = verify_order(order)
+            pages += 1
+            orders += len(parsed)
+            yield json.dumps({"file": i, "name": names[i], "page": p, "ok": True,
+                              "text": "\n".join(lines), "orders": parsed}, ensure_ascii=False) + "\n"
+    yield json.dumps({"done": True, "files": len(names), "pages": pages, "orders": orders,
+                      "errors": errors}) + "\n"
+
+
+@ocr_bp.post("/api/ocr/batch")
+def api_ocr_batch():
+    """
+    multipart: images (หลายไฟล์ หรือ TIFF หลายหน้า), scale, threshold, weight_kg (optional)
+    ตอบเป็น NDJSON stream: 1 บรรทัดต่อหน้า {file, name, page, text, orders: [{drug, dose_mg, route, freq, check}]}
+    ทยอยออกตามที่แต่ละ chunk อ่านเสร็จ ; บรรทัดสุดท้าย {"done": true, ...}
+    """
+    pool = _ocr_pool()
+    if pool is None:
+        return _error("EasyOCR ไม่พร้อมใช้งาน", 503)
+    uploads = request.files.getlist("images") + request.files.getlist("image")
+    if not uploads:
+        return _error("ไม่พบไฟล์ images", 400)
+    if len(uploads) > MAX_OCR_BATCH:
+        return _error(f"ไฟล์มากเกินไป (สูงสุด {MAX_OCR_BATCH})", 400)
+    try:
+        scale, thresh = _ocr_params()
+        weight_kg = request.form.get("weight_kg", type=float)
+    except ValueError:
+        return _error("scale/threshold ต้องเป็นตัวเลข", 400)
+
+    names = [f.filename or f"image{i + 1}" for i, f in enumerate(uploads)]
+    try:
+        results = pool.batch([f.read() for f in uploads], scale=scale, thresh=thresh,
+                             timeout=current_app.config.get("OCR_TIMEOUT", 30) * len(uploads))
+    except OcrBusy as e:
+        return _busy(e)
+    except OcrUnavailable as e:
+        return _error(str(e), 503)
+
+    return Response(stream_with_context(_batch_lines(results, names, weight_kg)),
+                    mimetype="application/x-ndjson")
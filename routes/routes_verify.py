@@ -0,0 +1,81 @@
+# routes/routes_verify.py
+"""
+ตรวจคำสั่งยา (เกณฑ์จาก data/order_rules.json)
+- /verify             : ทีละ order (query string หรือ JSON) → หน้า verify_result.html
+- /api/verify/batch   : ทั้ง MAR ใน request เดียว → ผลราย order (JSON)
+"""
+from flask import Blueprint, current_app, jsonify, render_template, request, url_for
+
+from app_shared.orders import VERIFIER
+
+verify_bp = Blueprint("verify", __name__)
+
+MAX_VERIFY_BATCH = 10000
+
+
+def _calc_url(rule) -> str:
+    # endpoint ของหน้าคำนวณอยู่ใน meds blueprint → ใช้ u() ของ app (หา endpoint ข้าม blueprint)
+    url = current_app.jinja_env.globals["u"](rule.calc_endpoint) if rule and rule.calc_endpoint else "#"
+    return url if url != "#" else url_for("index")
+
+
+@verify_bp.route("/verify", methods=["GET", "POST"])
+def verify():
+    if request.method == "POST" and request.is_json:
+        raw = request.get_json(force=True)
+    else:
+        raw = {
+            "drug": request.args.get("drug", ""),
+            "dose_mg": request.args.get("dose_mg", type=float, default=0.0),
+            "route": request.args.get("route", ""),
+            "freq": request.args.get("freq", ""),
+            "patient": {"weight_kg": request.args.get("wt", type=float)},
+        }
+
+    try:
+        order = VERIFIER.normalize(raw if isinstance(raw, dict) else {})
+    except (TypeError, ValueError) as e:
+        return render_template("verify_result.html", ok=False, msg=f"ข้อมูลไม่ถูกต้อง: {e}", order=raw)
+
+    rule = VERIFIER.rule_for(order["drug"])
+    if rule is None:
+        return render_template("verify_result.html",
+                               ok=False,
+                               msg=f"ยังไม่รองรับการตรวจ {order['drug'] or '-'}",
+                               order=order)
+
+    result = rule.check(order)
+    return render_template("verify_result.html",
+                           ok=result["ok"], msg=result["msg"],
+                           order=order, calc_url=_calc_url(rule))
+
+
+@verify_bp.post("/api/verify/batch")
+def api_verify_batch():
+    """
+    body (JSON): {"patient": {"weight_kg": 2.5}, "orders": [{"drug", "dose_mg", "route", "freq"}, ...]}
+    (หรือ list ของ order ตรง ๆ) ; patient ของ batch ใช้กับ order ที่ไม่มี patient/weight_kg ของตัวเอง
+    error ของแต่ละ order คืนใน results[i]["error"] (order อื่นยังตรวจต่อ)
+    """
+    payload = request.get_json(silent=True)
+    orders = payload.get("orders") if isinstance(payload, dict) else payload
+    if not isinstance(orders, list):
+        return jsonify({"error": "missing orders"}), 400
+    if len(orders) > MAX_VERIFY_BATCH:
+        return jsonify({"error": f"too many orders (max {MAX_VERIFY_BATCH})"}), 400
+    patient = payload.get("patient") if isinstance(payload, dict) else None
+    if patient is not None and not isinstance(patient, dict):
+        return jsonify({"error": "patient ต้องเป็น object"}), 400
+
+    results = VERIFIER.verify_many(orders, patient)
+    errors = sum(1 for r in results if "error" in r)
+    unsupported = sum(1 for r in results if r.get("supported") is False)
+    passed = sum(1 for r in results if r["ok"])
+    return jsonify({
+        "count": len(results),
+        "passed": passed,
+        "failed": len(results) - passed - unsupported - errors,
+        "unsupported": unsupported,
+        "errors": errors,
+        "results": results,
+    })
@@ -1,6 +1,7 @@
-import json
 from pathlib import Path
 
+from app_shared.compat_sources import iter_compat_records
+
 
 def seed_compat_from_json(db, Drug, Compatibility, truncate: bool = False) -> None:
     """
@@ -19,9 +20,6 @@ def seed_compat_from_json(db, Drug, Compatibility, truncate: bool = False) -> No
         print("❌ ไม่พบไฟล์ seed_compatibility.json")
         return
 
-    with path.open(encoding="utf-8") as f:
-        rows = json.load(f)
-
     if truncate:
         print("⚠️ ลบข้อมูลเดิมใน Compatibility ทั้งหมด ...")
         db.session.query(Compatibility).delete()
@@ -32,13 +30,6 @@ def seed_compat_from_json(db, Drug, Compatibility, truncate: bool = False) -> No
     updated_pairs = 0
     skipped_rows = 0
 
-    def _get(row, *keys):
-        """ดึงค่าตาม key แรกที่มีใน row"""
-        for k in keys:
-            if k in row and row[k]:
-                return str(row[k]).strip()
-        return None
-
     # map status เป็นโค้ดสั้น
     STATUS_MAP = {
         "C": "C",
@@ -51,15 +42,16 @@ def seed_compat_from_json(db, Drug, Compatibility, truncate: bool = False) -> No
         "NO": "ND",        # สำหรับข้อความขึ้นต้นว่า "No data ..."
     }
 
-    for idx, row in enumerate(rows, start=1):
-        name_a = _get(row, "drug_a", "drug", "Drug", "A")
-        name_b = _get(row, "drug_b", "co_drug", "Co_drug", "B")
-        raw_status = _get(row, "status")
-        source = _get(row, "source")
-        note = _get(row, "note")
+    # อ่านแบบ streaming: key ต่าง ๆ (drug_a/drug/A, drug_b/co_drug/B) normalize ไว้แล้ว
+    for idx, rec in enumerate(iter_compat_records(path), start=1):
+        name_a = rec.drug_a
+        name_b = rec.drug_b
+        raw_status = rec.status
+        source = rec.source
+        note = rec.note
 
         if not name_a or not name_b or not raw_status:
-            print(f"⏭️  skip แถวที่ {idx}: ข้อมูลไม่ครบ (drug/status missing) -> {row}")
+            print(f"⏭️  skip แถวที่ {idx}: ข้อมูลไม่ครบ (drug/status missing) -> {rec.raw}")
             skipped_rows += 1
             continue
 
@@ -1,3 +1,82 @@
+/* =========================
+ * Compat lookup (Pages + Flask)
+ *   static/compat/index.json        : รายชื่อยา + สถานะทุกคู่ (2 bit/คู่) — โหลดครั้งเดียว อยู่ใน HTTP cache
+ *   static/compat/notes/<slug>.json : notes/reference ของยาแต่ละตัว — โหลดเมื่อจะแสดงเท่านั้น
+ * (สร้างโดย tools/build_compat_lookup.py)
+ * ========================= */
+window.NMCCompat = (function () {
+  let indexPromise = null;
+  const shardPromises = {};
+
+  // ต้องตรงกับ canon() ใน tools/build_compat_lookup.py
+  function canon(x) {
+    return String(x || "")
+      .trim()
+      .toLowerCase()
+      .replace(/&/g, " and ")
+      .replace(/\s+/g, " ");
+  }
+
+  async function fetchJson(url) {
+    // ไม่ใช้ no-store: URL มี hash/version อยู่แล้ว → ให้ HTTP cache ทำงาน
+    const res = await fetch(url);
+    if (!res.ok) throw new Error(`fetch failed: ${res.status}`);
+    return await res.json();
+  }
+
+  function loadIndex() {
+    if (!indexPromise) {
+      const u = window.__URLS || {};
+      const url = new URL(u.compat || "./static/compat/index.json", window.location.href);
+      indexPromise = fetchJson(url.toString()).then((idx) => {
+        const bin = atob(idx.triangle || "");
+        const tri = new Uint8Array(bin.length);
+        for (let k = 0; k < bin.length; k++) tri[k] = bin.charCodeAt(k);
+        const pos = new Map(idx.drugs.map((d, i) => [d, i]));
+        return Object.assign(idx, { url, tri, pos, n: idx.drugs.length });
+      });
+      indexPromise.catch(() => { indexPromise = null; });  // โหลดพัง → ครั้งหน้าลองใหม่
+    }
+    return indexPromise;
+  }
+
+  function loadShard(idx, i) {
+    const v = idx.shards[String(i)];
+    if (!v) return Promise.resolve({});
+    if (!shardPromises[i]) {
+      const url = new URL(`notes/${idx.slugs[i]}.json?v=${v}`, idx.url);
+      shardPromises[i] = fetchJson(url.toString()).catch(() => {
+        delete shardPromises[i];
+        return {};
+      });
+    }
+    return shardPromises[i];
+  }
+
+  function statusOf(idx, i, j) {
+    if (i === j) return "ND";
+    if (i > j) [i, j] = [j, i];
+    const k = i * idx.n - (i * (i + 1)) / 2 + (j - i - 1);
+    return idx.codes[(idx.tri[k >> 2] >> ((k & 3) * 2)) & 3];
+  }
+
+  // null = ไม่รู้จักยาตัวใดตัวหนึ่ง ; ไม่งั้น {drug_a, drug_b, status, reference?, note_th?, ...}
+  async function lookup(a, b, opts) {
+    const idx = await loadIndex();
+    const i = idx.pos.get(canon(a));
+    const j = idx.pos.get(canon(b));
+    if (i === undefined || j === undefined) return null;
+
+    const rec = { drug_a: idx.labels[i], drug_b: idx.labels[j], status: statusOf(idx, i, j) };
+    if (opts && opts.notes === false) return rec;
+
+    const shard = await loadShard(idx, Math.min(i, j));
+    return Object.assign(rec, shard[String(Math.max(i, j))] || {});
+  }
+
+  return { canon, lookup };
+})();
+
 /* =========================
  * Compat Result Page (Pages + Flask)
  * ========================= */
@@ -29,13 +108,6 @@
     ND:{ cls: "st-nd", text: "No data (ไม่มีข้อมูล)",    fallbackNote: "ไม่พบข้อมูลความเข้ากันได้ของคู่นี้" }
   };
 
-  function normalizeName(x) {
-    return String(x || "")
-      .trim()
-      .replace(/\s+/g, " ")
-      .toLowerCase();
-  }
-
   function getQueryParam(name) {
     const u = new URL(window.location.href);
     return u.searchParams.get(name) || "";
@@ -54,12 +126,6 @@
     if (statusText) statusText.textContent = s.text;
   }
 
-  async function loadJson(url) {
-    const res = await fetch(url, { cache: "no-store" });
-    if (!res.ok) throw new Error(`fetch failed: ${res.status}`);
-    return await res.json();
-  }
-
   // --- robust nav (Pages + Flask) ---
   function isPages() {
     return (
@@ -77,7 +143,6 @@
     // 2) fallback
     if (kind === "newCheck") return isPages() ? "./compatibility.html" : "/compat";
     if (kind === "home") return isPages() ? "./index.html" : "/";
-    if (kind === "lookup") return "./static/compat_lookup.json";
     return "";
   }
 
@@ -111,9 +176,6 @@
       const aRaw = getQueryParam("drug_a");
       const bRaw = getQueryParam("drug_b");
 
-      const aKey = normalizeName(aRaw);
-      const bKey = normalizeName(bRaw);
-
       // แสดงชื่อจาก query ก่อน
       if (elDrugA) elDrugA.textContent = aRaw || "—";
       if (elDrugB) elDrugB.textContent = bRaw || "—";
@@ -121,16 +183,11 @@
       // ให้ tooltip ตอนชื่อโดน ...
       if (pairPill) pairPill.title = `${aRaw || "—"} × ${bRaw || "—"}`;
 
-      const lookupUrl = resolveHref("lookup");
-      const db = await loadJson(lookupUrl);
-
-      const key1 = `${aKey}||${bKey}`;
-      const key2 = `${bKey}||${aKey}`;
-      const rec = db[key1] || db[key2] || null;
+      const rec = await window.NMCCompat.lookup(aRaw, bRaw);
 
       if (debugLine) {
         debugLine.hidden = false;
-        debugLine.textContent = `lookup key = ${rec ? (db[key1] ? key1 : key2) : key1}`;
+        debugLine.textContent = `lookup key = ${NMCCompat.canon(aRaw)}||${NMCCompat.canon(bRaw)}`;
       }
 
       if (!rec) {
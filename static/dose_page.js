@@ -42,6 +42,74 @@
   if (pnd !== null) setText("#postText", `${pnd} days`);
   if (bw !== null) setText("#bwText", `${fmtKg(bw)} kg`);
 
+  // ---- Rule tables (static/dose_rules.json — ไฟล์เดียวกับที่ server ใช้) ----
+  // static build: data-rules ชี้ไฟล์ที่มี hash ; ไม่มี → dose_rules.json ข้าง ๆ dose_page.js
+  const script = document.currentScript;
+  const scriptSrc = script ? script.src : window.location.href;
+  const rulesUrl = (script && script.dataset.rules)
+    ? new URL(script.dataset.rules, window.location.href).toString()
+    : new URL("dose_rules.json", scriptSrc).toString();
+
+  // compile เหมือน app_shared/dose_rules.py: จุดแบ่งที่เรียงแล้วต่อแกน + grid ของช่องย่อย
+  const compile = (spec) => {
+    const axes = spec.axes.map((a) => a.name);
+    const bounds = axes.map((name) => {
+      const pts = new Set();
+      spec.rows.forEach((row) => (row[name] || []).forEach((p) => p !== null && pts.add(Number(p))));
+      return Array.from(pts).sort((a, b) => a - b);
+    });
+    const rightClosed = spec.axes.map((a) => a.closed === "right");
+    const strides = [];
+    let size = 1;
+    for (let i = axes.length - 1; i >= 0; i--) {
+      strides[i] = size;
+      size *= bounds[i].length + 1;
+    }
+    const cells = new Array(size).fill(-1);
+    spec.rows.forEach((row, r) => {
+      let flats = [0];
+      axes.forEach((name, i) => {
+        const [lo, hi] = row[name] || [null, null];
+        const first = lo === null ? 0 : bounds[i].indexOf(Number(lo)) + 1;
+        const last = hi === null ? bounds[i].length : bounds[i].indexOf(Number(hi));
+        const next = [];
+        flats.forEach((f) => {
+          for (let k = first; k <= last; k++) next.push(f + k * strides[i]);
+        });
+        flats = next;
+      });
+      flats.forEach((f) => { if (cells[f] < 0) cells[f] = r; });
+    });
+    return { axes, bounds, rightClosed, strides, cells, rows: spec.rows };
+  };
+
+  // bisect_left (closed=right) / bisect_right (closed=left)
+  const bisect = (arr, x, left) => {
+    let lo = 0, hi = arr.length;
+    while (lo < hi) {
+      const mid = (lo + hi) >> 1;
+      if (left ? arr[mid] < x : arr[mid] <= x) lo = mid + 1;
+      else hi = mid;
+    }
+    return lo;
+  };
+
+  const lookup = (table, values) => {
+    let flat = 0;
+    for (let i = 0; i < table.axes.length; i++) {
+      const v = values[table.axes[i]];
+      if (v === null || v === undefined) return null;
+      flat += bisect(table.bounds[i], v, table.rightClosed[i]) * table.strides[i];
+    }
+    const r = table.cells[flat];
+    return r < 0 ? null : table.rows[r];
+  };
+
+  const highlight = (id) => {
+    const tr = id ? document.getElementById(id) : null;
+    if (tr) tr.classList.add("highlight");
+  };
+
   // ---- Determine page drug (fallback: from title/h1) ----
   const h1 = document.querySelector("h1")?.textContent?.toLowerCase() || "";
   const title = document.title.toLowerCase();
@@ -49,39 +117,26 @@
 
   // ---- Drug-specific compute ----
   if (isAmikacin) {
-    // Use Weight + Postnatal age (<14 vs >=14) table
-    // If pnd missing, assume <14? better: don't compute interval, still compute dose if possible
-    const ageGroup = (pnd !== null && pnd >= 14) ? "ge14" : (pnd !== null ? "lt14" : null);
+    fetch(rulesUrl)
+      .then((r) => r.json())
+      .then((doc) => {
+        const values = { pma_weeks: pmaWeeks, postnatal_days: pnd, bw };
+        document.querySelectorAll("tr.highlight").forEach((tr) => tr.classList.remove("highlight"));
 
-    const pick = (bwKg, group) => {
-      if (bwKg === null || group === null) return null;
+        // ตารางน้ำหนัก × postnatal age (<14 / ≥14 วัน) ; ไม่มี postnatal_days → ใช้คอลัมน์ <14 วัน (เหมือนเดิม)
+        const rule = lookup(compile(doc.tables.amikin), { ...values, postnatal_days: pnd === null ? 0 : pnd });
+        if (rule && bw !== null) {
+          highlight(rule.active_row);
+          setText("#doseText, #doseText2", `${fmtInt(bw * rule.dose_per_kg)} mg/dose`);
+          setText("#intervalText, #intervalText2", `every ${rule.interval_hours} hours`);
+        }
 
-      // return { mgkg, intervalHours }
-      if (bwKg <= 0.8) {
-        return group === "lt14" ? { mgkg: 16, ih: 48 } : { mgkg: 20, ih: 42 };
-      }
-      if (bwKg > 0.8 && bwKg <= 1.2) {
-        return group === "lt14" ? { mgkg: 16, ih: 42 } : { mgkg: 20, ih: 36 };
-      }
-      if (bwKg > 1.2 && bwKg <= 2.0) {
-        return group === "lt14" ? { mgkg: 15, ih: 36 } : { mgkg: 18, ih: 30 };
-      }
-      if (bwKg > 2.0 && bwKg <= 2.8) {
-        return group === "lt14" ? { mgkg: 15, ih: 36 } : { mgkg: 18, ih: 24 };
-      }
-      // >2.8
-      return group === "lt14" ? { mgkg: 15, ih: 30 } : { mgkg: 18, ih: 20 };
-    };
-
-    const rule = pick(bw, ageGroup);
-
-    if (rule && bw !== null) {
-      const doseMg = bw * rule.mgkg;
-      setText("#doseText, #doseText2", `${fmtInt(doseMg)} mg/dose`);
-      setText("#intervalText", `every ${rule.ih} hours`);
-    } else {
-      // if BW present but PND missing, at least show BW (already) and leave dose/interval as "-"
-      // you can choose to compute dose after user provides pnd
-    }
+        // ตาราง PMA × postnatal age (highlight อย่างเดียว)
+        const pmaRule = lookup(compile(doc.tables.amikin_pma), values);
+        if (pmaRule) highlight(pmaRule.active_row);
+      })
+      .catch(() => {
+        // โหลดตารางไม่ได้ (เช่นเปิดไฟล์ตรง ๆ แบบ file://) → คงค่าที่ server render ไว้
+      });
   }
 })();
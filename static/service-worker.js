@@ -1,19 +1,93 @@
 // static/service-worker.js
-const DISABLE_SW = true;
+// static build คัดลอกไฟล์นี้ไปไว้ที่ docs/service-worker.js (scope = ทั้งเว็บ) และแทน PRECACHE_VERSION
+// ด้วย version ของ docs/precache-manifest.json → ไฟล์ SW เปลี่ยนทุกครั้งที่หน้า/asset เปลี่ยน = browser ติดตั้งรุ่นใหม่เอง
+const PRECACHE_VERSION = "dev";
+const CACHE_PREFIX = "nmc-";
+const CACHE_NAME = CACHE_PREFIX + PRECACHE_VERSION;
+const MANIFEST_URL = "./precache-manifest.json";
+
+// asset ที่มี hash ในชื่อ (name.<10 hex>.ext) ไม่มีวันเปลี่ยนเนื้อหา → cache-first ไม่ต้อง revalidate
+const HASHED = /\.[0-9a-f]{10}\.[a-z0-9]+$/i;
+
+// รุ่นเก่าเคยลงทะเบียนที่ ./static/ (scope แคบ คุมหน้าไม่ได้) → ถอนตัวเอง
+const LEGACY_SCOPE = /\/static\/$/.test(self.registration.scope);
 
 self.addEventListener("install", (event) => {
-  self.skipWaiting();
+  event.waitUntil((async () => {
+    if (!LEGACY_SCOPE && PRECACHE_VERSION !== "dev") {
+      const res = await fetch(MANIFEST_URL, { cache: "no-store" });
+      const manifest = await res.json();
+      const cache = await caches.open(CACHE_NAME);
+      const urls = [].concat(manifest.pages || [], manifest.assets || []);
+      await cache.addAll(urls.map((u) => new Request(u, { cache: "reload" })));
+    }
+    await self.skipWaiting();
+  })());
 });
 
 self.addEventListener("activate", (event) => {
   event.waitUntil((async () => {
-    if (DISABLE_SW) {
+    if (LEGACY_SCOPE) {
       try { await self.registration.unregister(); } catch (e) {}
-      try {
-        const keys = await caches.keys();
-        await Promise.all(keys.map((k) => caches.delete(k)));
-      } catch (e) {}
       return;
     }
+    // ลบเฉพาะ cache รุ่นเก่าของแอปนี้ (GitHub Pages: แอปอื่นใน user.github.io ใช้ origin เดียวกัน)
+    const keys = await caches.keys();
+    await Promise.all(
+      keys.filter((k) => k.startsWith(CACHE_PREFIX) && k !== CACHE_NAME).map((k) => caches.delete(k))
+    );
+    await self.clients.claim();
+  })());
+});
+
+// key ของ "หน้า" ใน cache ไม่รวม query (หน้า *_dose รับค่าผ่าน ?pma_weeks=... แต่ HTML เหมือนกัน)
+// ไฟล์อื่นเก็บตาม URL เต็ม: query เป็นส่วนหนึ่งของ version (เช่น compat/notes/*.json?v=<hash>)
+function isPage(req, url) {
+  return req.mode === "navigate" || url.pathname.endsWith(".html") || url.pathname.endsWith("/");
+}
+
+function cacheKey(url) {
+  return url.origin + url.pathname;
+}
+
+async function revalidate(cache, key) {
+  try {
+    const res = await fetch(key, { cache: "no-cache" });
+    if (res.ok) await cache.put(key, res.clone());
+    return res;
+  } catch (e) {
+    return null;
+  }
+}
+
+self.addEventListener("fetch", (event) => {
+  const req = event.request;
+  if (LEGACY_SCOPE || req.method !== "GET") return;
+
+  const url = new URL(req.url);
+  if (url.origin !== self.location.origin) return;
+
+  event.respondWith((async () => {
+    const cache = await caches.open(CACHE_NAME);
+    const hashed = HASHED.test(url.pathname);
+    const page = !hashed && isPage(req, url);
+    const key = page ? cacheKey(url) : req.url;
+    const cached = await cache.match(key, { ignoreSearch: page });
+
+    if (cached) {
+      // asset ที่มี hash: cache-first ล้วน ; หน้า/ไฟล์อื่น: cache-first แล้วอัปเดตเบื้องหลัง (stale-while-revalidate)
+      if (!hashed) event.waitUntil(revalidate(cache, key));
+      return cached;
+    }
+
+    const fresh = await revalidate(cache, key);
+    if (fresh) return fresh;
+
+    // offline และไม่เคย cache หน้านี้ → อย่างน้อยกลับหน้าแรก
+    if (req.mode === "navigate") {
+      const home = await cache.match("./index.html");
+      if (home) return home;
+    }
+    return Response.error();
   })());
 });
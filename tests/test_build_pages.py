@@ -0,0 +1,81 @@
+# tests/test_build_pages.py
+import json
+
+import tools.build_pages as bp
+
+
+def test_page_key_follows_template_dependencies():
+    templates = bp.scan_templates({})
+    assert "base.html" in bp.template_closure("Medication_administration.html", templates)
+
+    key = bp.page_key("Medication_administration.html", "2025-01-01", templates, "b")
+    assert key == bp.page_key("Medication_administration.html", "2025-01-01", templates, "b")
+
+    edited = dict(templates, **{"base.html": dict(templates["base.html"], sha="changed")})
+    assert bp.page_key("Medication_administration.html", "2025-01-01", edited, "b") != key
+    assert bp.page_key("Medication_administration.html", "2025-01-02", templates, "b") != key
+    # หน้าที่ไม่ได้พึ่ง base.html ไม่ต้อง render ใหม่
+    assert bp.page_key("amikin.html", "2025-01-01", edited, "b") == bp.page_key("amikin.html", "2025-01-01", templates, "b")
+
+
+def test_scan_templates_reuses_unchanged_entries():
+    first = bp.scan_templates({})
+    again = bp.scan_templates(first)
+    assert all(again[name] is first[name] for name in first)
+
+
+def test_resolver_covers_all_export_paths():
+    r = bp.resolve_endpoint
+    assert r("compat.compat_index") == "./compatibility.html"
+    assert r("core.calculate_pma_page") == "./pma_template.html"
+    assert r("sul-am") == "./sul_am.html"
+    assert r("amikin_route") == "./amikin.html"
+    assert r("static", filename="style.css") == "./static/style.css"
+    assert r("https://example.org") == "https://example.org"
+
+
+def test_template_backend_fills_page_context():
+    html = bp.get_backend("template").render("vancomycin_dose.html", "2025-01-01")
+    assert "10 – 15 mg/kg/dose" in html
+
+
+def test_static_urls_use_fingerprinted_names(monkeypatch):
+    assert bp.hashed_name("js/app.js", b"x") == f"js/app.{bp._sha(b'x')[:bp.HASH_LEN]}.js"
+    monkeypatch.setattr(bp, "ASSETS", {"style.css": "style.0123456789.css"})
+    assert bp.resolve_endpoint("static", filename="style.css") == "./static/style.0123456789.css"
+    assert bp.resolve_endpoint("static", filename="icons/icon-192.png") == "./static/icons/icon-192.png"
+
+
+def test_precache_version_tracks_page_content(tmp_path, monkeypatch):
+    monkeypatch.setattr(bp, "DOCS", tmp_path)
+    monkeypatch.setattr(bp, "PRECACHE_MANIFEST", tmp_path / "precache-manifest.json")
+    monkeypatch.setattr(bp, "SERVICE_WORKER_OUT", tmp_path / "service-worker.js")
+    (tmp_path / "amikin.html").write_text("v1", encoding="utf-8")
+
+    v1 = bp.write_precache({"app.js": "app.0123456789.js"})
+    doc = json.loads((tmp_path / "precache-manifest.json").read_text(encoding="utf-8"))
+    assert doc["pages"] == ["./amikin.html"]
+    assert "./static/app.0123456789.js" in doc["assets"]
+    assert f'const PRECACHE_VERSION = "{v1}";' in (tmp_path / "service-worker.js").read_text(encoding="utf-8")
+
+    (tmp_path / "amikin.html").write_text("v2", encoding="utf-8")
+    assert bp.write_precache({"app.js": "app.0123456789.js"}) != v1
+
+
+def test_default_update_date_is_stable(monkeypatch):
+    monkeypatch.delenv("UPDATE_DATE", raising=False)
+    # ไม่ระบุวันที่ → ใช้วันที่ commit ล่าสุด (ไม่ใช่ "ตอนนี้") → รอบถัดไปได้ page_key เดิม
+    assert bp.pick_update_date() == bp.pick_update_date()
+    assert bp.pick_update_date(" 2025-12-01 ") == "2025-12-01"
+
+
+def test_main_exits_non_zero_on_failed_pages(monkeypatch):
+    import pytest
+
+    monkeypatch.setattr(bp, "build", lambda *a, **kw: {"amikin.html": "boom"})
+    with pytest.raises(SystemExit) as exc:
+        bp.main(["--update-date", "2025-01-01"])
+    assert "amikin.html" in str(exc.value.code)
+
+    monkeypatch.setattr(bp, "build", lambda *a, **kw: {})
+    bp.main(["--update-date", "2025-01-01"])
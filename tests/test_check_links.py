@@ -0,0 +1,27 @@
+# tests/test_check_links.py
+import json
+
+import tools.check_links as cl
+
+
+def test_reports_missing_files_and_fragments(tmp_path, monkeypatch):
+    monkeypatch.setattr(cl, "CACHE_FILE", str(tmp_path / "cache.json"))
+    site = tmp_path / "site"
+    site.mkdir()
+    (site / "a.html").write_text(
+        '<h2 id="dose">x</h2><a href="#dose">ok</a><a href="b.html#nope">bad frag</a>'
+        '<a href="missing.html">gone</a><a href="https://example.org/x">ext</a>',
+        encoding="utf-8",
+    )
+    (site / "b.html").write_text('<a name="top2"></a><a href="a.html#dose">ok</a>', encoding="utf-8")
+    report = tmp_path / "report.json"
+
+    assert cl.main([str(site), "-j", "1", "--report", str(report)]) == 1
+    doc = json.loads(report.read_text(encoding="utf-8"))
+    assert doc["parsed"] == 2 and doc["internal_links"] == 4
+    assert [m["href"] for m in doc["missing"]] == ["missing.html"]
+    assert [m["fragment"] for m in doc["missing_fragments"]] == ["nope"]
+
+    # รอบสองไม่มีไฟล์เปลี่ยน → ใช้ cache ทั้งหมด
+    assert cl.main([str(site), "-j", "1", "--report", str(report)]) == 1
+    assert json.loads(report.read_text(encoding="utf-8"))["cached"] == 2
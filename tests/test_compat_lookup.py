@@ -0,0 +1,28 @@
+# tests/test_compat_lookup.py
+import base64
+from itertools import combinations
+
+import tools.build_compat_lookup as bcl
+
+
+def test_pair_index_covers_triangle_once():
+    n = 7
+    seen = sorted(bcl.pair_index(i, j, n) for i, j in combinations(range(n), 2))
+    assert seen == list(range(n * (n - 1) // 2))
+    assert bcl.pair_index(5, 2, n) == bcl.pair_index(2, 5, n)
+
+
+def test_packed_index_matches_full_lookup():
+    lookup = bcl.collect()
+    index, shards = bcl.build_packed(lookup)
+    tri = base64.b64decode(index["triangle"])
+    pos = {d: i for i, d in enumerate(index["drugs"])}
+    n = len(index["drugs"])
+
+    for rec in lookup.values():
+        i, j = pos[bcl.canon(rec["drug_a"])], pos[bcl.canon(rec["drug_b"])]
+        assert bcl.unpack_status(tri, j, i, n) == rec["status"]
+        if rec.get("note_th"):
+            lo, hi = sorted((i, j))
+            shard = shards[f"{index['slugs'][lo]}.json"]
+            assert rec["note_th"] in shard and str(lo) in index["shards"]
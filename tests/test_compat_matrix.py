@@ -0,0 +1,156 @@
+# tests/test_compat_matrix.py
+from app_shared.compat_matrix import CompatMatrix, MatrixHolder
+from models import Drug, Compatibility
+
+
+def _matrix():
+    drugs = [(3, "Vancomycin", None), (1, "Acyclovir", "Zovirax"), (2, "Amikacin", None)]
+    pairs = [
+        (3, 1, "I", "Incompatible", "Trissel", "ห้ามผสม"),
+        (1, 2, "C", "C", None, None),
+    ]
+    meta = {("acyclovir", "vancomycin"): {"th": "ไม่เข้ากัน"}}
+    return CompatMatrix(drugs, pairs, meta_map=meta, canon=str.lower, norm=str.lower)
+
+
+def test_pair_lookup_is_symmetric():
+    m = _matrix()
+    ab = m.pair(1, 3)
+    ba = m.pair(3, 1)
+    assert (ab["code"], ab["status"]) == (ba["code"], ba["status"])
+    assert ab["code"] == "I"
+    assert ab["status"] == "Incompatible"
+    assert ab["note"] == "ห้ามผสม"
+    assert ab["meta"] == {"th": "ไม่เข้ากัน"}
+    assert m.pair(2, 3)["code"] == "ND"
+
+
+def test_unknown_and_self_pair():
+    m = _matrix()
+    out = m.pair(1, 99)
+    assert out["code"] == "ND" and out["drug_b_name"] is None
+    assert m.pair(1, 1)["meta"] is None
+    assert m.index_of("amikacin") == m.index_of(2)
+    assert [m.names[i] for i in m.by_name] == ["Acyclovir", "Amikacin", "Vancomycin"]
+
+
+def test_holder_swaps_after_invalidate():
+    holder = MatrixHolder()
+    built = []
+
+    def loader(version):
+        built.append(version)
+        return _matrix()
+
+    first = holder.get(loader)
+    assert holder.get(loader) is first
+    holder.invalidate()
+    second = holder.get(loader)
+    assert second is not first
+    assert built == [1, 2]
+
+
+def test_api_compatibility_uses_matrix(client, db_session):
+    a = Drug(generic_name="Ampicillin")
+    b = Drug(generic_name="Gentamicin")
+    db_session.add_all([a, b])
+    db_session.commit()
+    db_session.add(Compatibility(drug_id=a.id, co_drug_id=b.id, status="I", note="x"))
+    db_session.commit()
+
+    resp = client.get(f"/api/compatibility?drug_a={b.id}&drug_b={a.id}")
+    assert resp.status_code == 200
+    data = resp.get_json()
+    assert data["status"] == "I"
+    assert data["drug_a"]["name"] == "Gentamicin"
+
+
+def test_submatrix_worst_case():
+    m = _matrix()
+    idx = [m.index_of(1), m.index_of(2), m.index_of(3)]
+    grid, worst = m.submatrix(idx)
+    assert grid[0] == [None, "C", "I"]
+    assert grid[1][0] == "C" and grid[1][1] is None
+    assert worst == "I"
+    assert m.submatrix([m.index_of(1), m.index_of(2)])[1] == "C"
+
+
+def test_api_compatibility_set(client, db_session):
+    names = ["Ampicillin", "Gentamicin", "Vancomycin"]
+    drugs = [Drug(generic_name=n) for n in names]
+    db_session.add_all(drugs)
+    db_session.commit()
+    db_session.add(Compatibility(drug_id=drugs[0].id, co_drug_id=drugs[1].id, status="C"))
+    db_session.commit()
+
+    resp = client.post(
+        "/api/compatibility/set",
+        json={"drugs": [drugs[0].id, "gentamicin", "vancomycin", "nope"]},
+    )
+    assert resp.status_code == 200
+    data = resp.get_json()
+    assert data["unknown"] == ["nope"]
+    assert data["worst"] == "ND"
+    assert len(data["pairs"]) == 3
+    assert data["codes"][0][1] == "C"
+
+
+def test_holder_rebuilds_when_stamp_changes():
+    stamp = [1]
+    holder = MatrixHolder(stamp=lambda: stamp[0], check_interval=0)
+    first = holder.get(lambda version: _matrix())
+    assert holder.get(lambda version: _matrix()) is first
+    stamp[0] = 2  # process อื่นแก้ข้อมูล
+    assert holder.get(lambda version: _matrix()) is not first
+
+
+def test_other_worker_sees_committed_update(app, client, db_session):
+    from app import create_app
+    from extensions import db
+    from routes.routes_compatibility import get_compat_matrix
+
+    app.config["COMPAT_CHECK_INTERVAL"] = 0
+    a = Drug(generic_name="Ampicillin")
+    b = Drug(generic_name="Gentamicin")
+    db_session.add_all([a, b])
+    db_session.commit()
+    pair = Compatibility(drug_id=a.id, co_drug_id=b.id, status="C")
+    db_session.add(pair)
+    db_session.commit()
+    assert get_compat_matrix().pair(a.id, b.id)["code"] == "C"
+
+    # "worker" อีกตัว (app แยก, matrix แยก) แก้แถวเดิม → count / max(id) ไม่เปลี่ยน
+    other = create_app(testing=True)
+    other.config["COMPAT_VERSION_FILE"] = app.config["COMPAT_VERSION_FILE"]
+    with other.app_context():
+        row = db.session.get(Compatibility, pair.id)
+        row.status = "I"
+        db.session.commit()
+        db.session.remove()
+
+    db_session.expire_all()
+    assert get_compat_matrix().pair(a.id, b.id)["code"] == "I"
+
+
+def test_uncommitted_change_not_served_after_rollback(app, db_session):
+    from routes.routes_compatibility import get_compat_matrix
+
+    db_session.add(Drug(generic_name="Ampicillin"))
+    db_session.commit()
+    assert get_compat_matrix().size == 1
+
+    db_session.add(Drug(generic_name="Ghost"))
+    db_session.flush()
+    get_compat_matrix()  # อ่านระหว่าง transaction
+    db_session.rollback()
+    assert [get_compat_matrix().names[i] for i in range(get_compat_matrix().size)] == ["Ampicillin"]
+
+
+def test_pair_meta_reads_seed_keys(app):
+    from routes.routes_compatibility import get_pair_meta
+
+    # seed ใช้ drug_a/drug_b + note_th/reference
+    with app.app_context():
+        meta = get_pair_meta("Amikacin", "Acyclovir")
+    assert meta["th"] == "ยาสามารถผสมร่วมกันได้"
+    assert meta["reference"] == "Trissel's 2022"
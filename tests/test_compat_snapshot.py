@@ -0,0 +1,69 @@
+# tests/test_compat_snapshot.py
+import pytest
+
+from app_shared.compat_matrix import CompatMatrix
+from app_shared.compat_snapshot import CompatSnapshot, SnapshotError, write_snapshot
+from models import Drug, Compatibility
+
+
+def _matrix():
+    drugs = [(3, "Vancomycin", None), (1, "Acyclovir", "Zovirax"), (2, "Amikacin", None)]
+    pairs = [
+        (3, 1, "I", "Incompatible", "Trissel", "ห้ามผสม"),
+        (1, 2, "C", "C", None, None),
+    ]
+    meta = {("acyclovir", "vancomycin"): {"th": "ไม่เข้ากัน"}}
+    return CompatMatrix(drugs, pairs, meta_map=meta, canon=str.lower, norm=str.lower)
+
+
+def test_snapshot_matches_matrix(tmp_path):
+    m = _matrix()
+    stats = write_snapshot(m, tmp_path / "compat.snapshot", version=7)
+    snap = CompatSnapshot(stats["path"])
+    try:
+        assert snap.version == 7 and snap.size == 3
+        for a in (1, 2, 3, 99):
+            for b in (1, 2, 3, 99):
+                assert snap.pair(a, b) == m.pair(a, b)
+        assert snap.index_of("amikacin") == m.index_of("amikacin") == snap.index_of("2")
+        assert snap.index_of("nope") is None
+        assert [snap.names[i] for i in snap.by_name] == ["Acyclovir", "Amikacin", "Vancomycin"]
+        idx = [m.index_of(1), m.index_of(2), m.index_of(3)]
+        assert snap.submatrix(idx) == m.submatrix(idx)
+    finally:
+        snap.close()
+
+
+def test_rejects_non_snapshot(tmp_path):
+    p = tmp_path / "bad.snapshot"
+    p.write_bytes(b"x" * 512)
+    with pytest.raises(SnapshotError):
+        CompatSnapshot(p)
+
+
+def test_routes_read_snapshot_without_db(app, client, db_session, tmp_path):
+    a = Drug(generic_name="Ampicillin", brand_name="Amp")
+    b = Drug(generic_name="Gentamicin")
+    db_session.add_all([a, b])
+    db_session.commit()
+    db_session.add(Compatibility(drug_id=a.id, co_drug_id=b.id, status="I", note="x"))
+    db_session.commit()
+    a_id, b_id = a.id, b.id
+
+    path = tmp_path / "compat.snapshot"
+    result = app.test_cli_runner().invoke(args=["compat", "export-snapshot", str(path)])
+    assert result.exit_code == 0, result.output
+
+    # ลบข้อมูลใน DB แล้ว → คำตอบต้องมาจาก snapshot
+    Compatibility.query.delete()
+    Drug.query.delete()
+    db_session.commit()
+    app.config["COMPAT_SNAPSHOT"] = str(path)
+
+    data = client.get(f"/api/compatibility?drug_a={b_id}&drug_b={a_id}").get_json()
+    assert data["status"] == "I" and data["note"] == "x"
+    assert data["drug_a"]["name"] == "Gentamicin"
+    drugs = client.get("/api/drugs?q=amp").get_json()
+    assert drugs == [{"id": a_id, "generic_name": "Ampicillin", "brand_name": "Amp"}]
+    resp = client.get(f"/compatibility/result?drug_a_id={a_id}&drug_b_id={b_id}")
+    assert resp.status_code == 200
@@ -0,0 +1,28 @@
+# tests/test_db_profile.py
+import pytest
+from sqlalchemy import create_engine, text
+
+from app_shared.db_profile import engine_options, install_sqlite_pragmas, sqlite_pragmas
+
+
+def test_production_pragmas_applied_on_every_connection(tmp_path):
+    uri = f"sqlite:///{tmp_path / 'app.db'}"
+    engine = create_engine(uri, **engine_options(uri, threads=4))
+    install_sqlite_pragmas(engine, sqlite_pragmas("production"))
+
+    assert engine.pool.size() == 5
+    with engine.connect() as conn:
+        assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        assert conn.execute(text("PRAGMA synchronous")).scalar() == 1  # NORMAL
+        assert conn.execute(text("PRAGMA busy_timeout")).scalar() == 5000
+    engine.dispose()
+
+
+def test_profile_validation():
+    assert sqlite_pragmas("default") == {}
+    assert sqlite_pragmas("production", {"busy_timeout": 100})["busy_timeout"] == 100
+    assert engine_options("sqlite://") == {}
+    with pytest.raises(ValueError):
+        sqlite_pragmas("production", {"journal_mode": "WAL; DROP TABLE drug"})
+    with pytest.raises(ValueError):
+        sqlite_pragmas("fast")
@@ -0,0 +1,91 @@
+# tests/test_dose_formulas.py
+import pytest
+
+from app_shared.dose_formulas import load_dose_formulas
+
+FORMULAS = load_dose_formulas()
+
+
+def test_amikin_condition_step():
+    out = FORMULAS["amikin"].evaluate("123.4", multiplication="3")
+    assert out["result_ml"] == 0.49
+    assert out["final_result"] == 1.47
+    assert out["target_total"] == 9.0 and out["diluent_to_add"] == 7.53
+    assert out["msg_block"].startswith("ปริมาณที่บริหารเข้าทารก")
+    assert out["content_extra"]["details"]
+
+
+def test_two_outputs_and_concentration():
+    out = FORMULAS["vancomycin"].evaluate(75, multiplication=2, concentration="10")
+    assert (out["result_ml_1"], out["result_ml_2"]) == (1.5, 7.5)
+    assert (out["final_result_1"], out["final_result_2"]) == (3.0, 15.0)
+
+    with pytest.raises(ValueError):
+        FORMULAS["vancomycin"].evaluate(75, concentration=7)
+    with pytest.raises(ValueError):
+        FORMULAS["meropenem"].evaluate(100, multiplication=4)
+
+
+def test_generic_view_renders_registry_drug(client):
+    r = client.post("/sul-am", data={"action": "condition", "dose_hidden": "300", "multiplication": "6"})
+    assert r.status_code == 200
+    assert "4.8" in r.get_data(as_text=True)
+
+    r = client.post("/aminophylline", data={"dose": "abc"})
+    assert "กรุณาใส่ข้อมูลที่ถูกต้อง" in r.get_data(as_text=True)
+
+
+def test_form_errors_rerender_with_dose(client):
+    r = client.post("/aminophylline", data={"dose": "inf"})
+    assert r.status_code == 200
+    assert "กรุณาใส่ข้อมูลที่ถูกต้อง" in r.get_data(as_text=True)
+
+    # ขั้น condition ตัวคูณผิด → ฟอร์มยังมี dose เดิม
+    r = client.post("/amikin", data={"action": "condition", "dose_hidden": "123.4", "multiplication": "7"})
+    html = r.get_data(as_text=True)
+    assert "กรุณาใส่ข้อมูลที่ถูกต้อง" in html
+    assert 'value="123.4"' in html
+
+
+def test_alias_path_serves_page_without_redirect(client):
+    main = client.get("/acyclovir")
+    alias = client.get("/acyclovir_route")
+    assert alias.status_code == 200
+    assert alias.data == main.data
+
+
+def test_api_dose_matches_registry(client):
+    r = client.post("/api/dose/amikin", json={"dose": 123.4, "multiplication": 3})
+    assert r.status_code == 200
+    body = r.get_json()
+    assert (body["result_ml"], body["final_result"], body["diluent_to_add"]) == (0.49, 1.47, 7.53)
+    assert "content_extra" not in body
+
+    assert client.post("/api/dose/nope", json={"dose": 1}).status_code == 404
+    assert client.post("/api/dose/sul-am", json={"dose": -1}).status_code == 400
+
+
+def test_api_dose_batch_reports_per_item_errors(client):
+    items = [
+        {"drug": "vancomycin", "dose": 75, "concentration": 5},
+        {"drug": "gentamicin", "dose": 10, "multiplication": 7},
+        {"drug": "unknown", "dose": 1},
+    ] * 500
+    r = client.post("/api/dose/batch", json={"items": items})
+    body = r.get_json()
+    assert body["count"] == 1500 and body["errors"] == 1000
+    first, second, third = body["results"][:3]
+    assert (first["result_ml_1"], first["result_ml_2"]) == (1.5, 15.0)
+    assert second["index"] == 1 and "error" in second
+    assert third["error"].startswith("unknown drug")
+
+
+def test_non_finite_dose_is_a_per_item_error(client):
+    r = client.post("/api/dose/aminophylline", json={"dose": "1e400"})
+    assert r.status_code == 400 and "error" in r.get_json()
+    for bad in ("nan", "inf"):
+        assert client.post("/api/dose/amikin", json={"dose": bad}).status_code == 400
+
+    items = [{"drug": "aminophylline", "dose": "inf"}, {"drug": "amikin", "dose": 100}]
+    body = client.post("/api/dose/batch", json={"items": items}).get_json()
+    assert body["errors"] == 1 and "error" in body["results"][0] and "result_ml" in body["results"][1]
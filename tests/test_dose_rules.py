@@ -0,0 +1,87 @@
+# tests/test_dose_rules.py
+import json
+
+from app_shared.dose_rules import load_dose_rules
+
+RULES = load_dose_rules()
+
+
+def test_bracket_edges():
+    v = RULES["vancomycin"]
+    assert v.lookup(pma_weeks=29, postnatal_days=14)["active_row"] == "29_0_14"
+    assert v.lookup(pma_weeks=29, postnatal_days=15)["active_row"] == "29_15plus"
+    assert v.lookup(pma_weeks=44, postnatal_days=8)["active_row"] == "37_44_8plus"
+    assert v.lookup(pma_weeks=45, postnatal_days=0)["active_row"] == "45plus_all"
+
+    a = RULES["amikin"]
+    assert a.lookup(postnatal_days=13, bw=0.8)["dose_per_kg"] == 16
+    assert a.lookup(postnatal_days=14, bw=0.81)["dose_per_kg"] == 20
+    assert a.lookup(postnatal_days=14, bw=None) is None
+
+
+def test_dose_endpoints_use_tables(client):
+    q = "pma_weeks=31&pma_days=2&calc=31&postnatal_days=20&bw=1.55"
+    r = client.get(f"/meropenem_dose?{q}")
+    assert r.status_code == 200
+    assert RULES["meropenem"].lookup(pma_weeks=31, postnatal_days=20)["scenario"] == "intra2"
+
+    r = client.get(f"/gentamicin_dose?{q}")
+    assert "6 mg" in r.get_data(as_text=True)  # floor(4.0 × 1.55)
+
+
+CENSUS = (
+    "hn,ga_weeks,ga_days,pna_days,bw,drugs\n"
+    "A1,28,3,10,1.2,gentamicin;vanco\n"
+    "A2,x,0,1,1.0,gentamicin\n"
+    "A3,36,0,2,2.5,amikacin|foo\n"
+)
+
+
+def test_census_api_streams_ndjson(client):
+    r = client.post("/api/census?format=ndjson", data=CENSUS, content_type="text/csv")
+    assert r.status_code == 200 and r.mimetype == "application/x-ndjson"
+    rows = [json.loads(line) for line in r.get_data(as_text=True).splitlines()]
+    assert [(x["patient"], x["drug"]) for x in rows] == [
+        ("A1", "gentamicin"), ("A1", "vancomycin"), ("A2", "gentamicin"), ("A3", "amikin"), ("A3", "foo"),
+    ]
+    # GA 28+3, PNA 10 → PMA 29+6
+    assert rows[0]["pma_weeks"] == 29 and rows[0]["bracket"] == "le29_8_28" and rows[0]["dose_mg"] == 4
+    assert rows[1]["dose_min_mg"] == 12 and rows[1]["interval"] == "every 18 hours"
+    assert rows[2]["error"].startswith("invalid patient row")
+    assert rows[3]["dose_mg"] == 37.5 and rows[4]["error"] == "unknown drug: foo"
+
+
+def test_census_rejects_out_of_range_rows(client):
+    bad = (
+        "patient,ga_weeks,ga_days,pna_days,bw,drugs\n"
+        "B1,30,0,5,inf,gentamicin\n"
+        "B2,30,0,5,nan,gentamicin\n"
+        "B3,30,0,5,0,gentamicin\n"
+        "B4,30,0,-1,1.2,gentamicin\n"
+        "B5,30,7,5,1.2,gentamicin\n"
+        "B6,30,0,5,1e308,amikin\n"
+        "B7,30,0,5,1.2,gentamicin\n"
+    )
+    r = client.post("/api/census?format=ndjson", data=bad, content_type="text/csv")
+    rows = [json.loads(line) for line in r.get_data(as_text=True).splitlines()]
+    assert len(rows) == 7
+    assert all(x["error"].startswith("invalid patient row") and x["dose_mg"] is None for x in rows[:6])
+    assert rows[6]["error"] is None and rows[6]["dose_mg"] > 0
+
+
+def test_census_cli_writes_csv(app, tmp_path):
+    src = tmp_path / "census.csv"
+    src.write_text(CENSUS, encoding="utf-8")
+    out = tmp_path / "out.csv"
+    result = app.test_cli_runner().invoke(args=["meds", "census", str(src), "-o", str(out)])
+    assert result.exit_code == 0, result.output
+    lines = out.read_text(encoding="utf-8").splitlines()
+    assert lines[0].startswith("row,patient,drug,") and len(lines) == 6
+
+
+def test_amikin_page_renders_rows_and_interval(client):
+    r = client.get("/amikin_dose?pma_weeks=31&pma_days=2&calc=31&postnatal_days=20&bw=1.55")
+    html = r.get_data(as_text=True)
+    assert '<tr id="w_1_2_2_0" class="highlight">' in html
+    assert '<tr id="p_30_34_8p" class="highlight">' in html
+    assert "every 30 hours" in html
@@ -0,0 +1,69 @@
+# tests/test_drug_search.py
+from app_shared.drug_search import DrugSearchIndex
+from models import Drug
+from routes.routes_compatibility import NAME_FIXES, canonicalize_name
+
+
+def _index():
+    names = ["Vancomycin", "Meropenem", "Ampicillin", "Sodium bicarbonate", "Amikacin"]
+    brands = [None, "Merrem", None, None, "Amikin"]
+    by_name = sorted(range(len(names)), key=lambda i: names[i].lower())
+    return names, DrugSearchIndex(names, brands, by_name, aliases=NAME_FIXES, canon=canonicalize_name)
+
+
+def _search(q):
+    names, index = _index()
+    return [names[i] for i in index.search(q)]
+
+
+def test_prefix_ranks_before_substring():
+    assert _search("am") == ["Amikacin", "Ampicillin"]
+    assert _search("ycin") == ["Vancomycin"]
+    assert _search("AMIK") == ["Amikacin"]
+    assert _search("bicarb") == ["Sodium bicarbonate"]
+    assert _search("cillin") == ["Ampicillin"]
+
+
+def test_brand_alias_and_typo():
+    assert _search("merrem") == ["Meropenem"]
+    assert _search("meropenam") == ["Meropenem"]  # canonicalize_name แก้ให้
+    assert _search("meropena") == ["Meropenem"]   # alias จาก NAME_FIXES
+    assert _search("vancomicin") == ["Vancomycin"]
+    assert _search("zzz") == []
+
+
+def test_empty_query_lists_by_name():
+    names, index = _index()
+    assert [names[i] for i in index.search("", limit=2)] == ["Amikacin", "Ampicillin"]
+
+
+def test_api_drugs_rebuilds_after_change(client, db_session):
+    db_session.add(Drug(generic_name="Gentamicin", brand_name="Garamycin"))
+    db_session.commit()
+    assert [d["generic_name"] for d in client.get("/api/drugs?q=gara").get_json()] == ["Gentamicin"]
+
+    db_session.add(Drug(generic_name="Garamycin eye drop"))
+    db_session.commit()
+    got = [d["generic_name"] for d in client.get("/api/drugs?q=gara").get_json()]
+    assert got == ["Garamycin eye drop", "Gentamicin"]
+
+
+def test_api_drugs_reads_names_from_indexed_matrix(monkeypatch, app, client, db_session):
+    from app_shared.compat_matrix import CompatMatrix
+    import routes.routes_compatibility as rc
+
+    db_session.add(Drug(generic_name="Gentamicin"))
+    db_session.commit()
+    real = rc.get_compat_matrix
+    calls = []
+
+    def swapping():
+        # worker อื่น commit ระหว่าง request → เรียกครั้งถัดไปได้ matrix ใหม่ (ว่าง)
+        calls.append(1)
+        return real() if len(calls) == 1 else CompatMatrix([], [])
+
+    monkeypatch.setattr(rc, "get_compat_matrix", swapping)
+    monkeypatch.delitem(app.extensions["http_cache"].endpoints, "compat.api_drugs")  # ไม่ให้ ETag เรียก matrix ก่อน view
+    resp = client.get("/api/drugs?q=genta")
+    assert resp.status_code == 200
+    assert [d["generic_name"] for d in resp.get_json()] == ["Gentamicin"]
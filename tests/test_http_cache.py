@@ -0,0 +1,125 @@
+# tests/test_http_cache.py
+from flask import template_rendered
+
+from models import Drug, Compatibility
+
+PAGE = "/acyclovir_dose?pma_weeks=32&pma_days=1&calc=32&postnatal_days=5&bw=1.5"
+
+
+def test_page_etag_and_304_skips_render(app, client):
+    rendered = []
+
+    def record(sender, template, context, **extra):
+        rendered.append(template.name)
+
+    first = client.get(PAGE)
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+    assert "no-cache" in first.headers["Cache-Control"]
+    assert first.headers.get("Last-Modified")
+
+    with template_rendered.connected_to(record, app):
+        again = client.get(PAGE, headers={"If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.data == b""
+    assert again.headers["ETag"] == etag
+    assert rendered == []
+
+    other = client.get(PAGE.replace("bw=1.5", "bw=2"))
+    assert other.headers["ETag"] != etag
+    # ลำดับ query string ไม่มีผล
+    swapped = client.get("/acyclovir_dose?bw=1.5&pma_days=1&pma_weeks=32&calc=32&postnatal_days=5")
+    assert swapped.headers["ETag"] == etag
+
+
+def test_compat_api_etag_follows_dataset(client, db_session):
+    a = Drug(generic_name="Ampicillin")
+    b = Drug(generic_name="Gentamicin")
+    db_session.add_all([a, b])
+    db_session.commit()
+    url = f"/api/compatibility?drug_a={a.id}&drug_b={b.id}"
+
+    etag = client.get(url).headers["ETag"]
+    assert client.get(url, headers={"If-None-Match": etag}).status_code == 304
+
+    db_session.add(Compatibility(drug_id=a.id, co_drug_id=b.id, status="I"))
+    db_session.commit()
+    resp = client.get(url, headers={"If-None-Match": etag})
+    assert resp.status_code == 200
+    assert resp.get_json()["status"] == "I"
+    assert resp.headers["ETag"] != etag
+
+
+def test_post_and_errors_not_tagged(client):
+    assert "ETag" not in client.post("/api/dose/batch", json={"items": []}).headers
+    assert "ETag" not in client.get("/acyclovir_dose").headers  # 400 ขาดพารามิเตอร์
+
+
+def test_page_cache_serves_without_render(app, client):
+    rendered = []
+
+    def record(sender, template, context, **extra):
+        rendered.append(template.name)
+
+    url = PAGE.replace("bw=1.5", "bw=1.7")
+    first = client.get(url)
+    assert first.headers["X-Cache"] == "MISS"
+    with template_rendered.connected_to(record, app):
+        again = client.get(url)
+    assert again.headers["X-Cache"] == "HIT"
+    assert again.data == first.data
+    assert again.headers["ETag"] == first.headers["ETag"]
+    assert again.content_type == first.content_type
+    assert rendered == []
+
+    stats = client.get("/api/cache/stats").get_json()
+    assert stats["store"]["hits"] >= 1 and stats["store"]["misses"] >= 1
+
+
+def test_page_cache_shared_on_disk(monkeypatch, tmp_path):
+    from app import create_app
+
+    monkeypatch.setenv("PAGE_CACHE_DIR", str(tmp_path))
+    first = create_app(testing=True).test_client().get(PAGE)
+    assert first.headers["X-Cache"] == "MISS"
+    # worker อีกตัว (memory ว่าง) อ่านจาก disk
+    other = create_app(testing=True).test_client().get(PAGE)
+    assert other.headers["X-Cache"] == "HIT"
+    assert other.data == first.data
+
+
+def test_source_version_reload(tmp_path):
+    from app_shared.http_cache import SourceVersion
+
+    page = tmp_path / "page.html"
+    page.write_text("a")
+    source = SourceVersion([tmp_path], extra="2025-01-01")
+    before, _ = source.current()
+    page.write_text("ab")
+    assert source.current()[0] == before  # ไม่ reload = ใช้ค่าเดิม
+    assert source.current(reload=True)[0] != before
+
+
+def test_admin_page_follows_catalog_reload(monkeypatch, client, tmp_path):
+    import json
+    import os
+
+    from app_shared import med_catalog
+
+    path = tmp_path / "meds_catalog.json"
+    meds = json.loads(med_catalog.CATALOG.read_text(encoding="utf-8"))
+    path.write_text(json.dumps(meds), encoding="utf-8")
+    monkeypatch.setattr(med_catalog, "_default", med_catalog.MedCatalog(path, check_interval=0))
+
+    first = client.get("/medication_administration")
+    etag = first.headers["ETag"]
+    assert client.get("/medication_administration", headers={"If-None-Match": etag}).status_code == 304
+
+    meds[0]["label"] = "Zz renamed label"
+    path.write_text(json.dumps(meds), encoding="utf-8")
+    os.utime(path, ns=(10**18, 10**18))
+
+    again = client.get("/medication_administration", headers={"If-None-Match": etag})
+    assert again.status_code == 200
+    assert again.headers["X-Cache"] == "MISS"  # page cache ไม่คืน body เก่า
+    assert "Zz renamed label" in again.get_data(as_text=True)
@@ -0,0 +1,77 @@
+# tests/test_import_compat.py
+import io
+import json
+
+from app_shared.compat_sources import iter_compat_records, iter_json_array
+from models import Drug, Compatibility
+
+
+def _write(tmp_path, rows):
+    p = tmp_path / "compat.json"
+    p.write_text(json.dumps(rows, ensure_ascii=False), encoding="utf-8")
+    return str(p)
+
+
+def test_bulk_import_creates_and_updates(app, db_session, tmp_path):
+    db_session.add(Drug(generic_name="ampicillin"))
+    db_session.commit()
+
+    rows = [
+        {"drug": "Ampicillin", "co_drug": "Gentamicin", "status": "Incompatible", "source": "T"},
+        {"drug": "Meropenam", "co_drug": "Gentamicin", "status": "compatible"},
+        {"drug": "Gentamicin", "co_drug": "gentamicin", "status": "C"},
+    ]
+    runner = app.test_cli_runner()
+    result = runner.invoke(args=["compat", "import-compat-json", _write(tmp_path, rows), "--bulk"])
+    assert result.exit_code == 0, result.output
+    assert "Drugs created : 2" in result.output
+    assert "Pairs created : 2" in result.output
+    assert "Rows skipped  : 1" in result.output
+
+    names = {d.generic_name for d in Drug.query.all()}
+    assert names == {"ampicillin", "gentamicin", "meropenem"}
+
+    rows[0]["status"] = "C"
+    result = runner.invoke(args=["compat", "import-compat-json", _write(tmp_path, rows), "--bulk"])
+    assert "Pairs created : 0" in result.output
+    assert "Pairs updated : 1" in result.output
+    assert Compatibility.query.count() == 2
+    assert {c.status for c in Compatibility.query.all()} == {"C"}
+
+
+def test_iter_json_array_small_chunks():
+    data = [{"drug": "a", "x": [1, {"y": "],"}]}, 12345678, "s,]"]
+    text = json.dumps(data)
+    for size in (1, 3, 16):
+        assert list(iter_json_array(io.StringIO(text), chunk_size=size)) == data
+
+
+def test_records_accept_key_aliases(tmp_path):
+    p = tmp_path / "c.csv"
+    p.write_text("id,drug,co_drug,status,note\n1,Acyclovir,Vancomycin,Yes,ok\n", encoding="utf-8")
+    rec = next(iter_compat_records(p))
+    assert (rec.drug_a, rec.drug_b, rec.status, rec.note) == ("Acyclovir", "Vancomycin", "Yes", "ok")
+
+    j = tmp_path / "c.json"
+    j.write_text(json.dumps([{"A": "x", "B": "y", "status": "I", "reference": "T"}]), encoding="utf-8")
+    rec = next(iter_compat_records(j))
+    assert (rec.drug_a, rec.drug_b, rec.source) == ("x", "y", "T")
+
+
+def test_bulk_import_writes_chunk_before_reading_rest(app, db_session):
+    from app_shared.compat_sources import CompatRecord
+    from routes.routes_compatibility import bulk_import_compat_rows
+
+    seen = []
+
+    def records():
+        yield CompatRecord("Ampicillin", "Gentamicin", "C", None, None, {})
+        yield CompatRecord("Ampicillin", "Vancomycin", "C", None, None, {})
+        # chunk แรก (2 แถว) ต้อง commit แล้วก่อนอ่านแถวถัดไป
+        seen.append(Compatibility.query.count())
+        yield CompatRecord("Gentamicin", "Ampicillin", "I", None, None, {})
+
+    result = bulk_import_compat_rows(records(), chunk_size=2)
+    assert seen == [2]
+    assert (result["created_pairs"], result["updated_pairs"], result["rows"]) == (2, 1, 3)
+    assert Compatibility.query.count() == 2
@@ -0,0 +1,61 @@
+# tests/test_log_sink.py
+import threading
+
+from app_shared.log_sink import AccessLogSink
+
+
+def test_batches_and_flush():
+    batches = []
+    sink = AccessLogSink(batches.append, batch_size=3, flush_ms=60000).start()
+    for i in range(7):
+        assert sink.submit({"i": i})
+
+    assert sink.flush()
+    assert [len(b) for b in batches] == [3, 3, 1]
+    stats = sink.stats()
+    assert stats["enqueued"] == 7 and stats["written"] == 7 and stats["dropped"] == 0
+    sink.stop()
+
+
+def test_drop_when_full():
+    gate = threading.Event()
+    written = []
+
+    def slow_write(rows):
+        gate.wait(5)
+        written.extend(rows)
+
+    sink = AccessLogSink(slow_write, max_queue=2, batch_size=1, overflow="drop").start()
+    results = [sink.submit(i) for i in range(10)]
+    gate.set()
+    sink.stop()
+
+    assert results.count(False) == sink.stats()["dropped"] > 0
+    assert len(written) == sink.stats()["written"]
+
+
+def test_write_error_is_counted():
+    def boom(rows):
+        raise RuntimeError("db down")
+
+    sink = AccessLogSink(boom, batch_size=1).start()
+    sink.submit("x")
+    sink.flush()
+    sink.stop()
+    assert sink.stats()["failed"] == 1
+
+
+def test_stop_and_flush_do_not_hang_when_queue_full():
+    import time
+
+    gate = threading.Event()
+    sink = AccessLogSink(lambda rows: gate.wait(5), max_queue=1, batch_size=1).start()
+    sink.submit(0)
+    time.sleep(0.05)  # writer หยิบตัวแรกไปแล้วค้างอยู่
+    sink.submit(1)  # queue เต็ม
+
+    t0 = time.monotonic()
+    assert sink.flush(timeout=0.2) is False
+    sink.stop(timeout=0.2)
+    assert time.monotonic() - t0 < 2
+    gate.set()
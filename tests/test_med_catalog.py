@@ -0,0 +1,36 @@
+# tests/test_med_catalog.py
+import json
+import os
+
+import pytest
+
+from app_shared.med_catalog import MedCatalog
+
+
+def _write(path, meds, mtime_ns):
+    path.write_text(json.dumps(meds), encoding="utf-8")
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def test_catalog_reuses_snapshot_until_file_changes(tmp_path):
+    path = tmp_path / "meds.json"
+    _write(path, [{"label": "beta", "endpoint": "b"}, {"label": "Alpha", "endpoint": "a"}], 1_000_000_000)
+    cat = MedCatalog(path, check_interval=0)
+
+    first = cat.get()
+    assert first.letters == ["A", "B"]
+    assert first.meds[0]["danger"] is False
+    assert cat.get() is first  # stat เหมือนเดิม → ไม่ parse ใหม่
+
+    _write(path, [{"label": "Gamma", "endpoint": "g"}], 2_000_000_000)
+    assert cat.get().letters == ["G"]
+
+    _write(path, [{"label": "Gamma", "endpoint": "g"}, {"label": "Gamma2", "endpoint": "g"}], 3_000_000_000)
+    with pytest.raises(ValueError):
+        cat.get()
+
+
+def test_admin_page_uses_catalog(client):
+    r = client.get("/medication_administration")
+    assert r.status_code == 200
+    assert "Vancomycin" in r.get_data(as_text=True)
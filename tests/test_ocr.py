@@ -0,0 +1,147 @@
+# tests/test_ocr.py
+import io
+import json
+import time
+
+import pytest
+
+from app_shared.ocr import OcrBusy, OcrPool
+from app_shared.byte_lru import ByteLRU
+
+
+class FakeEngine:
+    """แทน EasyOcrEngine (ไม่มี easyocr ในเครื่อง test) — ต้องอยู่ระดับ module ให้ worker import ได้"""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.decodes = 0
+
+    def decode(self, data):
+        self.decodes += 1
+        return f"{data.decode()}#{self.decodes}"
+
+    def decode_pages(self, data):
+        return [self.decode(page) for page in data.split(b"|")]  # "|" = แบ่งหน้าแบบ TIFF
+
+    def enhance(self, img, scale, thresh):
+        return f"{img}@{scale:g}/{thresh}"
+
+    def readtext(self, bitmap):
+        time.sleep(self.delay)
+        if bitmap.startswith("boom"):
+            raise ValueError("อ่านภาพไม่สำเร็จ")
+        return [bitmap, "CEFOTAXIME 150 mg IV q8h"]
+
+    def readtext_batch(self, bitmaps):
+        self.batches = getattr(self, "batches", 0) + 1
+        return [[f"batch{self.batches}", *self.readtext(b)[1:], "BW 3 kg"] for b in bitmaps]
+
+
+@pytest.fixture()
+def pool():
+    p = OcrPool(workers=1, max_queue=2, engine_factory=FakeEngine, engine_args=(0.3,))
+    assert p.wait_ready(timeout=60)
+    yield p
+    p.shutdown(wait=True)
+
+
+def test_pool_runs_jobs_and_applies_backpressure(pool):
+    first = pool.submit(b"rx", scale=2, thresh=150)
+    second = pool.submit(b"boom")
+    with pytest.raises(OcrBusy):
+        pool.submit(b"other")
+
+    assert pool.result(first, timeout=30) == ["rx#1@2/150", "CEFOTAXIME 150 mg IV q8h"]
+    with pytest.raises(ValueError):
+        pool.result(second, timeout=30)
+    time.sleep(0.05)  # done callback
+    stats = pool.stats()
+    assert stats["done"] == 1 and stats["failed"] == 1 and stats["rejected"] == 1
+    assert stats["pending"] == 0
+
+
+def test_api_ocr_wait_and_poll(app, client, pool):
+    app.extensions["ocr_pool"] = pool
+
+    r = client.post("/api/ocr", data={"image": (io.BytesIO(b"rx"), "rx.png"), "scale": "3"})
+    assert r.status_code == 200
+    assert r.get_json()["text"].splitlines()[0] == "rx#1@3/170"
+
+    r = client.post("/api/ocr", data={"image": (io.BytesIO(b"rx"), "rx.png"), "wait": "0"})
+    assert r.status_code == 202
+    poll_url = r.get_json()["poll_url"]
+    pool.result(r.get_json()["job_id"], timeout=30)
+    assert client.get(poll_url).get_json()["status"] == "done"
+
+    assert client.post("/api/ocr", data={}).status_code == 400
+    assert client.get("/api/ocr/jobs/nope").status_code == 404
+
+
+def test_byte_lru_evicts_by_size_and_persists(tmp_path):
+    cache = ByteLRU(10, directory=tmp_path)
+    cache.put("a", b"12345")
+    cache.put("b", b"12345")
+    cache.get("a")  # a ใช้ล่าสุด → b ถูกทิ้ง
+    cache.put("c", b"123")
+    assert cache.stats()["bytes"] <= 10
+    assert "b" not in cache._items and "a" in cache._items
+
+    fresh = ByteLRU(10, directory=tmp_path)  # process ใหม่ อ่านจาก disk
+    assert fresh.get("b") == b"12345"
+    assert fresh.stats()["disk_hits"] == 1
+
+
+def test_byte_lru_drops_corrupt_disk_entry(tmp_path):
+    cache = ByteLRU(0, directory=tmp_path)
+    cache.put("k", b"ok")
+    cache._path("k").write_bytes(b"\x80\x05garbage")  # pickle เสีย (ไม่ใช่แค่ EOF)
+    assert cache.get("k") is None
+    assert not cache._path("k").exists()
+
+
+def test_byte_lru_disk_total_on_overwrite(tmp_path):
+    cache = ByteLRU(0, directory=tmp_path, disk_max_bytes=1 << 20)
+    for _ in range(5):
+        cache.put("k", b"x" * 100)
+    assert cache._disk_total == cache._path("k").stat().st_size
+
+
+def test_pool_passes_disk_limit_to_both_tiers(tmp_path):
+    pool = OcrPool(workers=1, engine_factory=FakeEngine, engine_args=(), cache_bytes=1 << 20,
+                   cache_dir=tmp_path, disk_max_bytes=4096)
+    assert pool.cache.disk_max_bytes == 4096
+    assert pool._worker_opts[-1] == 4096
+
+
+def test_pool_cache_skips_decode_and_repeat_work(tmp_path):
+    pool = OcrPool(workers=1, engine_factory=FakeEngine, engine_args=(), cache_bytes=1 << 20,
+                   bitmap_cache_bytes=1 << 20, cache_dir=tmp_path)
+    try:
+        assert pool.result(pool.submit(b"rx", scale=2), timeout=60)[0] == "rx#1@2/170"
+        # เปลี่ยน scale → ใช้ภาพที่ decode แล้ว
+        assert pool.result(pool.submit(b"rx", scale=3), timeout=30)[0] == "rx#1@3/170"
+        time.sleep(0.05)  # done callback
+        # พารามิเตอร์เดิม → ได้ผลทันทีไม่ผ่าน worker
+        job = pool.submit(b"rx", scale=3)
+        assert pool.status(job)["status"] == "done"
+        assert pool.stats()["submitted"] == 2
+    finally:
+        pool.shutdown(wait=True)
+
+
+def test_api_ocr_batch_streams_parsed_orders(app, client, pool):
+    app.extensions["ocr_pool"] = pool
+    files = [(io.BytesIO(b"p1|p2"), "scan.tif"), (io.BytesIO(b"rx"), "rx.png")]
+    r = client.post("/api/ocr/batch", data={"images": files})
+    assert r.status_code == 200 and r.mimetype == "application/x-ndjson"
+
+    rows = [json.loads(line) for line in r.get_data(as_text=True).splitlines()]
+    pages, summary = rows[:-1], rows[-1]
+    assert summary == {"done": True, "files": 2, "pages": 3, "orders": 3, "errors": 0}
+    assert {(p["name"], p["page"]) for p in pages} == {("scan.tif", 0), ("scan.tif", 1), ("rx.png", 0)}
+    assert {p["text"].splitlines()[0] for p in pages} == {"batch1"}  # worker เดียว → readtext ครั้งเดียว
+
+    order = pages[0]["orders"][0]
+    assert order["drug"] == "CEFOTAXIME" and order["dose_mg"] == 150.0
+    assert order["patient"] == {"weight_kg": 3.0}
+    assert order["check"]["ok"] is True and order["check"]["msg"] == "Cefotaxime ผ่านเกณฑ์เบื้องต้น"
@@ -0,0 +1,20 @@
+# tests/test_orders.py
+from app_shared.orders import parse_order_line, parse_orders, verify_order
+
+
+def test_parse_order_line_normalizes_units_route_and_freq():
+    assert parse_order_line("1. Amikin (amikacin) 0.045 g iv OD") == {
+        "drug": "AMIKACIN", "dose_mg": 45.0, "route": "IV", "freq": "OD",
+    }
+    assert parse_order_line("Cefotaxime 150mg IV q 8 hr")["freq"] == "Q8H"
+    assert parse_order_line("Paracetamol 30 mg oral tid")["route"] == "PO"
+    assert parse_order_line("Weight 3000 g") is None
+    assert parse_order_line("HN 12345") is None
+
+
+def test_parse_orders_uses_page_weight_for_checkers():
+    orders = parse_orders(["น้ำหนัก 3000 g", "Cefotaxime 90 mg IV q8h", "Amikacin 45 mg IV q24h"])
+    assert [o["patient"]["weight_kg"] for o in orders] == [3.0, 3.0]
+    assert verify_order(orders[0])["ok"] is False  # 30 mg/kg
+    assert verify_order(orders[1])["ok"] is True
+    assert verify_order({"drug": "VANCOMYCIN"}) is None
@@ -0,0 +1,40 @@
+# tests/test_verify.py
+from app_shared.order_rules import OrderRule, OrderVerifier
+
+
+def test_rule_engine_from_data_only():
+    rule = OrderRule("meropenem", {"routes": ["IV"], "freqs": ["Q8H", "Q12H"], "mg_per_kg": [18, 22]})
+    verifier = OrderVerifier({rule.drug: rule}, freq_aliases={"TID": "Q8H"})
+    results = verifier.verify_many([
+        {"drug": "Meropenem", "dose_mg": 60, "route": "iv", "freq": "tid", "weight_kg": 3},
+        {"drug": "meropenem", "dose_mg": 90, "route": "PO", "freq": "q 8 hr"},
+        {"drug": "unknown", "dose_mg": 1},
+        {"drug": "meropenem", "dose_mg": "abc"},
+    ], patient={"weight_kg": 3})
+
+    assert results[0]["ok"] is True and results[0]["msg"] == "Meropenem ผ่านเกณฑ์เบื้องต้น"
+    assert results[1]["messages"] == ["Route ต้องเป็น IV", "dose เป้า 18–22 mg/kg (ตอนนี้ 30.0 mg/kg)"]
+    assert results[2]["supported"] is False
+    assert "error" in results[3]
+
+
+def test_api_verify_batch(client):
+    orders = [{"drug": "CEFOTAXIME", "dose_mg": 150, "route": "IV", "freq": "Q8H"}] * 300
+    orders += [{"drug": "Amikin", "dose_mg": 90, "route": "IV", "freq": "OD", "patient": {"weight_kg": 3}},
+               {"drug": "Vancomycin", "dose_mg": 45}, "oops",
+               {"drug": "amikin", "patient": "3kg"}]
+    r = client.post("/api/verify/batch", json={"patient": {"weight_kg": 3.0}, "orders": orders})
+    assert r.status_code == 200
+    body = r.get_json()
+    assert (body["count"], body["passed"], body["failed"], body["unsupported"], body["errors"]) == (304, 300, 1, 1, 2)
+    assert "patient" in body["results"][303]["error"]
+    assert body["results"][300]["msg"] == "dose เป้า ~15 mg/kg (ตอนนี้ 30.0 mg/kg)"
+
+    assert client.post("/api/verify/batch", json={"orders": "x"}).status_code == 400
+
+
+def test_verify_page(client):
+    r = client.get("/verify?drug=amikacin&dose_mg=45&route=IV&freq=Q24H&wt=3")
+    html = r.get_data(as_text=True)
+    assert r.status_code == 200 and "Amikacin ผ่านเกณฑ์เบื้องต้น" in html
+    assert 'href="/amikin"' in html
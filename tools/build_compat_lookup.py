@@ -1,12 +1,34 @@
 # tools/build_compat_lookup.py
+"""
+data/seed_compatibility.json → ข้อมูล compatibility ฝั่ง client (static/)
+
+static/compat/index.json   (ไฟล์เดียวที่ต้องโหลดเพื่อรู้สถานะของทุกคู่)
+  drugs    : ชื่อยาแบบ canonical เรียงแล้ว (index ของยา = ตำแหน่งใน list)
+  labels   : ชื่อสำหรับแสดงผล (ตำแหน่งเดียวกับ drugs)
+  codes    : ค่า 2 bit → สถานะ ["ND", "C", "I", "U"]
+  triangle : base64 ของสามเหลี่ยมบน (i < j) แพ็ก 4 คู่ต่อ byte → โหลดเป็น Uint8Array ได้ตรง ๆ
+  shards   : index ยา → hash ของไฟล์ notes (ยาที่ไม่มี notes ไม่มี key)
+static/compat/notes/<slug>.json (โหลดเมื่อต้องแสดง notes เท่านั้น)
+  {index ของยาอีกตัว: {reference, summary_th, summary_en, note_th, note_en}}
+  คู่ (i, j) เก็บไว้ใน shard ของยาที่ index น้อยกว่า
+
+static/compat_lookup.json ยังเขียนเหมือนเดิม (key "a||b") ให้สคริปต์เก่า/เครื่องมือภายนอก
+"""
 from __future__ import annotations
-import json, re
+import base64, hashlib, json, re, shutil, sys
 from pathlib import Path
 
 ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from app_shared.compat_sources import iter_compat_records  # noqa: E402
+
 DATA = ROOT / "data" / "seed_compatibility.json"
 OUT = ROOT / "static" / "compat_lookup.json"
-OUT_MIN = ROOT / "static" / "compat_lookup.min.json"
+OUT_DIR = ROOT / "static" / "compat"
+
+CODES = ("ND", "C", "I", "U")
+NOTE_FIELDS = ("reference", "summary_th", "summary_en", "note_th", "note_en")
 
 def canon(s: str) -> str:
     s = (s or "").strip().lower()
@@ -18,6 +40,36 @@ def pair_key(a: str, b: str) -> str:
     a2, b2 = canon(a), canon(b)
     return "||".join(sorted([a2, b2]))
 
+def slug(name: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", canon(name)).strip("-") or "drug"
+
+def status_code(raw: str) -> str:
+    s = (raw or "").strip().upper()
+    if s.startswith("ND"):
+        return "ND"
+    return s[:1] if s[:1] in ("C", "I", "U") else "ND"
+
+def pair_index(i: int, j: int, n: int) -> int:
+    """ตำแหน่งของคู่ (i, j) ในสามเหลี่ยมบนของ n ยา (ไม่มีคู่ยาตัวเดียวกัน)"""
+    if i > j:
+        i, j = j, i
+    return i * n - i * (i + 1) // 2 + (j - i - 1)
+
+def pack_triangle(statuses: dict, n: int) -> bytearray:
+    """{(i, j): "C"/"I"/...} → 2 bit ต่อคู่ (คู่ที่ k อยู่ที่ byte k//4, bit (k%4)*2)"""
+    total = n * (n - 1) // 2
+    buf = bytearray((total + 3) // 4)
+    for (i, j), code in statuses.items():
+        k = pair_index(i, j, n)
+        buf[k >> 2] |= CODES.index(code) << ((k & 3) * 2)
+    return buf
+
+def unpack_status(buf: bytes, i: int, j: int, n: int) -> str:
+    if i == j:
+        return "ND"
+    k = pair_index(i, j, n)
+    return CODES[(buf[k >> 2] >> ((k & 3) * 2)) & 3]
+
 def merge_pref(old: dict, new: dict) -> dict:
     # keep old but fill missing with new (or override if new has stronger note)
     merged = dict(old)
@@ -31,21 +83,18 @@ def merge_pref(old: dict, new: dict) -> dict:
         merged["note_en"] = new["note_en"]
     return merged
 
-def main() -> None:
-    rows = json.loads(DATA.read_text(encoding="utf-8"))
-
+def collect(src: Path = DATA) -> dict[str, dict]:
     lookup: dict[str, dict] = {}
-    for r in rows:
-        a = r.get("drug_a", "")
-        b = r.get("drug_b", "")
+    for rec in iter_compat_records(src):
+        a, b, r = rec.drug_a, rec.drug_b, rec.raw
         if not a or not b:
             continue
 
         payload = {
             "drug_a": a,
             "drug_b": b,
-            "status": (r.get("status") or "ND").upper(),
-            "reference": r.get("reference", ""),
+            "status": status_code(rec.status),
+            "reference": r.get("reference", "") or r.get("source", ""),
             "summary_th": r.get("summary_th", ""),
             "summary_en": r.get("summary_en", ""),
             "note_th": r.get("note_th", "") or r.get("note", ""),  # เผื่อเคยใช้ note เดิม
@@ -57,11 +106,68 @@ def main() -> None:
             lookup[k] = merge_pref(lookup[k], payload)
         else:
             lookup[k] = payload
+    return lookup
+
+def build_packed(lookup: dict[str, dict]) -> tuple[dict, dict[str, str]]:
+    """→ (index.json, {ชื่อไฟล์ shard: เนื้อหา})"""
+    labels: dict[str, str] = {}
+    for rec in lookup.values():
+        for name in (rec["drug_a"], rec["drug_b"]):
+            labels.setdefault(canon(name), name)
+    drugs = sorted(labels)
+    pos = {name: i for i, name in enumerate(drugs)}
+    n = len(drugs)
+    slugs = []
+    for i, d in enumerate(drugs):
+        sl = slug(d)
+        slugs.append(sl if sl not in slugs else f"{sl}-{i}")
+
+    statuses, notes = {}, {}
+    for rec in lookup.values():
+        i, j = sorted((pos[canon(rec["drug_a"])], pos[canon(rec["drug_b"])]))
+        if i == j:
+            continue
+        statuses[(i, j)] = rec["status"]
+        note = {f: rec[f] for f in NOTE_FIELDS if rec.get(f)}
+        if note:
+            notes.setdefault(i, {})[str(j)] = note
 
+    shards, shard_hashes = {}, {}
+    for i, body in sorted(notes.items()):
+        text = json.dumps(body, ensure_ascii=False, separators=(",", ":"), sort_keys=True)
+        shards[f"{slugs[i]}.json"] = text
+        shard_hashes[str(i)] = hashlib.sha256(text.encode("utf-8")).hexdigest()[:10]
+
+    index = {
+        "version": 1,
+        "drugs": drugs,
+        "labels": [labels[d] for d in drugs],
+        "slugs": slugs,
+        "codes": list(CODES),
+        "triangle": base64.b64encode(pack_triangle(statuses, n)).decode("ascii"),
+        "shards": shard_hashes,
+    }
+    return index, shards
+
+def write_packed(index: dict, shards: dict[str, str], out_dir: Path = OUT_DIR) -> None:
+    notes_dir = out_dir / "notes"
+    if notes_dir.exists():
+        shutil.rmtree(notes_dir)  # ยาที่ถูกลบ/เปลี่ยนชื่อ ไม่ให้ shard ค้าง
+    notes_dir.mkdir(parents=True)
+    for name, text in shards.items():
+        (notes_dir / name).write_text(text, encoding="utf-8")
+    (out_dir / "index.json").write_text(
+        json.dumps(index, ensure_ascii=False, separators=(",", ":")), encoding="utf-8"
+    )
+
+def main() -> None:
+    lookup = collect()
     OUT.write_text(json.dumps(lookup, ensure_ascii=False, indent=2), encoding="utf-8")
-    OUT_MIN.write_text(json.dumps(lookup, ensure_ascii=False, separators=(",", ":")), encoding="utf-8")
     print(f"✅ wrote: {OUT}  (keys={len(lookup)})")
-    print(f"✅ wrote: {OUT_MIN}")
+
+    index, shards = build_packed(lookup)
+    write_packed(index, shards)
+    print(f"✅ wrote: {OUT_DIR / 'index.json'}  (drugs={len(index['drugs'])}, shards={len(shards)})")
 
 if __name__ == "__main__":
     main()
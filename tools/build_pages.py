@@ -1,22 +1,55 @@
+# tools/build_pages.py
+"""
+Static build ของ docs/ (GitHub Pages) — engine เดียวสำหรับทุกทาง export
+
+- backend "template": render template ตรง ๆ ด้วย env ของไฟล์นี้ (default; ไม่ต้องมี DB)
+- backend "route":    ดึงหน้าจาก route จริงของ Flask (test_client) สำหรับหน้าที่ต้องใช้ logic ฝั่ง server
+- ทั้งสอง backend ใช้ resolve_endpoint() ตัวเดียวกันแปลง endpoint → ไฟล์ใน docs/
+- Jinja compile ครั้งเดียวแล้วเก็บ bytecode ไว้ที่ .cache/jinja (ใช้ร่วมกันทุก process / ทุกรอบ build)
+- asset (.js/.css/.json) ได้สำเนาชื่อ name.<hash>.ext + .gz/.br และ docs/static/asset-manifest.json
+  u("static", filename=...) ชี้ไปชื่อที่มี hash → cache แบบ immutable ได้
+- docs/precache-manifest.json + docs/service-worker.js (offline PWA; version เปลี่ยนเมื่อหน้า/asset เปลี่ยน)
+
+tools/jinja_render.py, build_docs.py, export_docs.py เหลือเป็นทางเข้าเดิมที่เรียก main() ของไฟล์นี้
+
+เจ้าของหน้าใน docs/: backend "template" (default, ที่ CI / deploy ใช้) เป็นเจ้าของทุกหน้า
+— backend "route" (build_docs.py / export_docs.py) ให้ HTML ของหน้าใน ROUTE_PAGES ต่างออกไป
+(render ผ่าน view ของ Flask) ใช้เทียบ / debug เฉพาะเครื่องเท่านั้น ไม่ commit ผลลงใน docs/
+หน้าจาก route ไม่บันทึก key ใน manifest → build default รอบถัดไป render หน้านั้นกลับเป็นแบบ template เอง
+"""
 from pathlib import Path
 from datetime import datetime
 import os
 import argparse
 import shutil
 import json
+import gzip
+import hashlib
+import re
+import subprocess
+from concurrent.futures import ProcessPoolExecutor
 from typing import Optional
 
-from jinja2 import Environment, FileSystemLoader, Undefined
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader, Undefined, meta
+
+try:
+    import brotli  # optional: ไม่มี → ข้าม .br
+except ImportError:
+    brotli = None
 
 # ---------- PATHS ----------
 ROOT   = Path(__file__).resolve().parents[1]
 TPL    = ROOT / "templates"
 DOCS   = ROOT / "docs"
 STATIC = ROOT / "static"
+JINJA_CACHE = ROOT / ".cache" / "jinja"
 DOCS.mkdir(exist_ok=True)
+JINJA_CACHE.mkdir(parents=True, exist_ok=True)
 
-# ---------- meds catalog (single source of truth) ----------
-MEDS_CATALOG = ROOT / "data" / "meds_catalog.json"
+# ---------- meds catalog (single source of truth: app_shared/med_catalog.py) ----------
+import sys
+sys.path.insert(0, str(ROOT))
+from app_shared.med_catalog import get_catalog  # noqa: E402
 
 # ✅ สำคัญ: บังคับ state เริ่มต้นให้ “ยังไม่คำนวณ” (None) เพื่อไม่ให้ template render ผลลัพธ์ออกมาใน GitHub Pages
 EMPTY_CALC_STATE = {
@@ -45,43 +78,6 @@ EMPTY_CALC_STATE = {
     "error": None,
 }
 
-def load_meds_catalog():
-    if not MEDS_CATALOG.exists():
-        raise FileNotFoundError(f"Missing {MEDS_CATALOG} (create meds_catalog.json first)")
-    meds = json.loads(MEDS_CATALOG.read_text(encoding="utf-8"))
-
-    # validation กันพังเงียบ ๆ เวลาเพิ่มข้อมูล
-    seen = set()
-    for i, m in enumerate(meds, start=1):
-        label = (m.get("label") or "").strip()
-        ep = (m.get("endpoint") or "").strip()
-        if not label or not ep:
-            raise ValueError(f"[meds_catalog] item#{i} ต้องมี label และ endpoint")
-        if ep in seen:
-            raise ValueError(f"[meds_catalog] endpoint ซ้ำ: {ep}")
-        seen.add(ep)
-        # ensure danger exists
-        if "danger" not in m:
-            m["danger"] = False
-    return meds
-
-def group_meds_by_letter(meds):
-    groups = {}
-    for m in meds:
-        label = (m.get("label") or "").strip()
-        ch = (label[0].upper() if label else "#")
-        if not ("A" <= ch <= "Z"):
-            ch = "#"
-        groups.setdefault(ch, []).append(m)
-
-    for ch, items in groups.items():
-        items.sort(key=lambda x: (x.get("label") or "").lower())
-
-    ordered = {ch: groups[ch] for ch in sorted(k for k in groups.keys() if k != "#")}
-    if "#" in groups:
-        ordered["#"] = groups["#"]
-    return ordered
-
 # ---------- Undefined -> 0 (safe math/str/round) ----------
 class ZeroUndefined(Undefined):
     def __int__(self): return 0
@@ -105,10 +101,14 @@ class ZeroUndefined(Undefined):
         return 0
 
 # ---------- Jinja env ----------
+BYTECODE_CACHE = FileSystemBytecodeCache(str(JINJA_CACHE))
+
 env = Environment(
     loader=FileSystemLoader(str(TPL)),
     autoescape=False,
     undefined=ZeroUndefined,
+    bytecode_cache=BYTECODE_CACHE,
+    auto_reload=False,  # ไฟล์ไม่เปลี่ยนระหว่าง build → ไม่ต้อง stat ซ้ำทุก get_template
 )
 
 # ---------- Filters / Helpers ----------
@@ -158,19 +158,44 @@ def tojson_safe(value):
             return None
     return json.dumps(value, ensure_ascii=False, default=default)
 
+def sig(value, n=3, default=""):
+    if isinstance(value, ZeroUndefined) or value is None or value == "":
+        return default
+    try:
+        return f"{float(value):.{int(n)}g}"
+    except Exception:
+        return default
+
+def safe_fmt(value, fmt_pattern="%.2f"):
+    try:
+        return fmt_pattern % (value,)
+    except Exception:
+        try:
+            return fmt_pattern % (0,)
+        except Exception:
+            return str(value)
+
 env.filters["nz"] = nz
 env.filters["round"] = safe_round
 env.filters["tojson"] = tojson_safe
 env.filters["fmt"] = fmt
+env.filters["fmt2"] = lambda v: fmt(v, 2)
 env.filters["fmt_int"] = fmt_int
+env.filters["sig"] = sig
+env.filters["safe_fmt"] = safe_fmt
 
 # ---------- url_for / u / resolve_endpoint (offline build) ----------
+# endpoint (ตัดชื่อ blueprint ออกแล้ว) → ไฟล์ใน docs/ ; ที่ไม่อยู่ในนี้ใช้กฎ _route/_page/.html ด้านล่าง
 ROUTE_MAP = {
     "index": "index.html",
     "calculate_pma_route": "pma_template.html",
+    "calculate_pma_page": "pma_template.html",
+    "pma_template": "pma_template.html",
     "compatibility_page": "compatibility.html",
+    "compat_index": "compatibility.html",  # ปุ่ม New check จากหน้า result
     "compatibility_result": "compatibility_result.html",
     "medication_administration": "Medication_administration.html",
+    "Medication_administration": "Medication_administration.html",
     "time_management_route": "time_management.html",
     "scan": "scan.html",
     "scan_server": "scan_server.html",
@@ -184,10 +209,13 @@ def _normalize_endpoint_name(endpoint: str) -> str:
     return endpoint.strip()
 
 def resolve_endpoint(endpoint: str, **values) -> str:
-    ep = _normalize_endpoint_name(endpoint)
+    if isinstance(endpoint, str) and endpoint.startswith(("http://", "https://", "#")):
+        return endpoint
+    ep = _normalize_endpoint_name(endpoint).replace("-", "_")
 
     if ep == "static":
-        return f"./static/{values.get('filename','')}".rstrip("/")
+        filename = values.get("filename", "")
+        return f"./static/{ASSETS.get(filename, filename)}".rstrip("/")
 
     if ep in ROUTE_MAP:
         return f"./{ROUTE_MAP[ep]}"
@@ -219,6 +247,35 @@ env.globals["nz"] = nz
 # แต่เรายังเก็บค่าพื้นฐานพวก BW/age ไว้ได้
 default_context = {
     "bw": 0, "age_days": 0, "ga_weeks": 0, "pma_weeks": 0, "pma_days": 0,
+    "request": {"path": "/"}, "session": {}, "order": {},
+}
+
+# context เพิ่มรายหน้า (ค่าที่ template แสดงตรง ๆ แม้ยังไม่คำนวณ)
+PAGE_CONTEXT = {
+    "vancomycin_dose.html": {
+        "dose_min_per_kg": 10.0,
+        "dose_max_per_kg": 15.0,
+        "interval": "every 6–18 hours",
+    },
+}
+
+# หน้าที่ backend "route" ดึงจาก Flask ได้: ไฟล์ใน docs/ → path ของ route
+ROUTE_PAGES = {
+    "ampicillin.html": "/ampicillin",
+    "aminophylline.html": "/aminophylline",
+    "amikin.html": "/amikin",
+    "amphotericinB.html": "/amphotericinB",
+    "benzathine_penicillin_g.html": "/benzathine-penicillin-g",
+    "cefotaxime.html": "/cefotaxime",
+    "ceftazidime.html": "/ceftazidime",
+    "ciprofloxacin.html": "/ciprofloxacin",
+    "clindamycin.html": "/clindamycin",
+    "cloxacillin.html": "/cloxacillin",
+    "colistin.html": "/colistin",
+    "dexamethasone.html": "/dexamethasone",
+    "furosemide.html": "/furosemide",
+    "gentamicin.html": "/gentamicin",
+    "hydrocortisone.html": "/hydrocortisone",
 }
 
 # ---------- update date picker ----------
@@ -227,19 +284,30 @@ def pick_update_date(cli_value: Optional[str] = None) -> str:
     priority:
     1) --update-date "..."
     2) ENV UPDATE_DATE
-    3) now "YYYY-MM-DD HH:MM"
+    3) วันที่ของ commit ล่าสุด (HEAD) "YYYY-MM-DD HH:MM"
+    4) now (ไม่มี git)
+
+    ค่า default ต้องคงที่ระหว่างรอบ build: update_date อยู่ใน page_key ทุกหน้า
+    → ถ้าใช้เวลาปัจจุบัน ทุกนาทีจะ render ใหม่หมด
     """
     if cli_value and cli_value.strip():
         return cli_value.strip()
     env_v = os.getenv("UPDATE_DATE")
     if env_v and env_v.strip():
         return env_v.strip()
+    try:
+        out = subprocess.run(
+            ["git", "log", "-1", "--format=%cd", "--date=format:%Y-%m-%d %H:%M"],
+            cwd=ROOT, capture_output=True, text=True, timeout=10, check=True,
+        ).stdout.strip()
+        if out:
+            return out
+    except (OSError, subprocess.SubprocessError):
+        pass
     return datetime.now().strftime("%Y-%m-%d %H:%M")
 
 # ---------- build steps ----------
-def render_one(template_name: str, update_date_str: str):
-    tpl = env.get_template(template_name)
-
+def page_context(template_name: str, update_date_str: str) -> dict:
     # base ctx
     ctx = dict(
         static_build=True,
@@ -250,55 +318,355 @@ def render_one(template_name: str, update_date_str: str):
 
     # inject เฉพาะหน้าที่ต้องใช้ข้อมูล dynamic ตอน build
     if template_name in ("Medication_administration.html", "medication_administration.html"):
-        meds = load_meds_catalog()
-        groups = group_meds_by_letter(meds)
-        letters = list(groups.keys())
-        ctx.update({"meds": meds, "groups": groups, "letters": letters})
+        ctx.update(get_catalog().as_context())
 
     # ✅ สำคัญที่สุด: บังคับให้ state คำนวณเป็น None ก่อน render (เหมือนเข้า Flask ครั้งแรก)
     ctx.update(EMPTY_CALC_STATE)
-
-    html = tpl.render(**ctx)
+    ctx.update(PAGE_CONTEXT.get(template_name, {}))
+    return ctx
+
+def normalize_html(html: str) -> str:
+    # safety net กัน path พังจากการต่อสตริง
+    html = html.replace(".html.html", ".html")
+    for attr in ("href", "src"):
+        html = html.replace(f'{attr}="././', f'{attr}="./')
+        html = html.replace(f'{attr}=".//', f'{attr}="./')
+    return html
+
+class TemplateBackend:
+    """render template ใน templates/ ด้วย env ของ build นี้"""
+    name = "template"
+
+    def render(self, page: str, update_date_str: str) -> str:
+        return env.get_template(page).render(**page_context(page, update_date_str))
+
+class RouteBackend:
+    """ดึงหน้าจาก route จริงของ Flask (หน้าที่ไม่มีใน ROUTE_PAGES ใช้ TemplateBackend แทน)"""
+    name = "route"
+
+    def __init__(self):
+        self._app = None
+        self._fallback = TemplateBackend()
+
+    def app(self, update_date_str: str):
+        if self._app is None:
+            from app import create_app
+            app = create_app(update_date=update_date_str)
+            # ลิงก์ในหน้า static ต้องชี้ไฟล์ใน docs/ ไม่ใช่ path ของ Flask
+            app.jinja_env.globals.update(u=u, url_for=url_for_stub, static_build=True)
+            app.jinja_env.bytecode_cache = BYTECODE_CACHE
+            self._app = app
+        return self._app
+
+    def render(self, page: str, update_date_str: str) -> str:
+        path = ROUTE_PAGES.get(page)
+        if path is None:
+            return self._fallback.render(page, update_date_str)
+        app = self.app(update_date_str)
+        with app.app_context():
+            resp = app.test_client().get(path)
+        if resp.status_code != 200:
+            raise RuntimeError(f"GET {path} -> {resp.status_code}")
+        return resp.get_data(as_text=True)
+
+BACKENDS = {"template": TemplateBackend, "route": RouteBackend}
+_backends = {}  # instance ต่อ process (app ของ RouteBackend สร้างครั้งเดียว)
+
+def get_backend(name: str):
+    if name not in _backends:
+        _backends[name] = BACKENDS[name]()
+    return _backends[name]
+
+def render_one(template_name: str, update_date_str: str, backend: str = "template"):
+    html = normalize_html(get_backend(backend).render(template_name, update_date_str))
 
     out = DOCS / template_name
     out.parent.mkdir(parents=True, exist_ok=True)
     out.write_text(html, encoding="utf-8")
     print(f"✓ {template_name} -> {out}")
 
+def _render_job(template_name: str, update_date_str: str, backend: str = "template", assets=None):
+    """งานใน process pool: คืน error (repr) หรือ None"""
+    if assets is not None:
+        ASSETS.clear()
+        ASSETS.update(assets)  # worker ที่ spawn ใหม่ไม่ได้ state จาก process หลัก
+    try:
+        render_one(template_name, update_date_str, backend)
+        return None
+    except Exception as e:
+        return repr(e)
+
+# ---------- fingerprinted assets ----------
+# ชื่อเดิมยังคัดลอกไว้ด้วย (service worker / JS ที่อ้างชื่อตรง ๆ) ; HTML ใช้ชื่อที่มี hash
+ASSET_SUFFIXES = {".js", ".css", ".json"}
+ASSET_SKIP = {"service-worker.js"}  # ต้องอยู่ที่ URL เดิมเสมอ (scope ของ SW)
+ASSET_SKIP_DIRS = ("compat/notes/",)  # shard ที่ index.json อ้างด้วย ?v=<hash> อยู่แล้ว
+ASSET_MANIFEST = DOCS / "static" / "asset-manifest.json"
+HASH_LEN = 10
+COMPRESS_MIN_BYTES = 256
+_HASHED_NAME = re.compile(rf"\.[0-9a-f]{{{HASH_LEN}}}(\.[A-Za-z0-9]+)(\.gz|\.br)?$")
+
+ASSETS = {}  # ชื่อเดิม (relative กับ static/) → ชื่อที่มี hash ; ว่าง = ยังไม่ fingerprint
+
+def hashed_name(rel: str, data: bytes) -> str:
+    stem, dot, ext = rel.rpartition(".")
+    return f"{stem}.{_sha(data)[:HASH_LEN]}.{ext}"
+
+def _write_if_missing(path: Path, make) -> int:
+    if not path.exists():
+        path.write_bytes(make())
+    return path.stat().st_size
+
+def fingerprint_assets() -> dict:
+    """static/*.{js,css,json} → docs/static/name.<hash>.ext (+ .gz/.br) และ asset-manifest.json"""
+    dst = DOCS / "static"
+    assets, keep = {}, set()
+    for p in sorted(STATIC.rglob("*")):
+        rel = p.relative_to(STATIC).as_posix()
+        if not p.is_file() or p.suffix not in ASSET_SUFFIXES or p.name in ASSET_SKIP:
+            continue
+        if rel.startswith(ASSET_SKIP_DIRS):
+            continue
+        data = p.read_bytes()
+        name = hashed_name(rel, data)
+        out = dst / name
+        out.parent.mkdir(parents=True, exist_ok=True)
+        entry = {"file": name, "sha256": _sha(data), "bytes": _write_if_missing(out, lambda: data)}
+        keep.add(name)
+        if len(data) >= COMPRESS_MIN_BYTES:
+            entry["gz"] = _write_if_missing(out.with_name(out.name + ".gz"),
+                                            lambda: gzip.compress(data, 9, mtime=0))
+            keep.add(name + ".gz")
+            if brotli is not None:
+                entry["br"] = _write_if_missing(out.with_name(out.name + ".br"),
+                                                lambda: brotli.compress(data, quality=11))
+                keep.add(name + ".br")
+        assets[rel] = entry
+
+    # ลบ fingerprint รุ่นเก่าที่ไม่มีใครอ้างแล้ว
+    for p in dst.rglob("*"):
+        rel = p.relative_to(dst).as_posix()
+        if p.is_file() and _HASHED_NAME.search(rel) and rel not in keep:
+            p.unlink()
+
+    doc = {"version": 1, "assets": assets}
+    text = json.dumps(doc, ensure_ascii=False, indent=1, sort_keys=True)
+    if not ASSET_MANIFEST.exists() or ASSET_MANIFEST.read_text(encoding="utf-8") != text:
+        ASSET_MANIFEST.write_text(text, encoding="utf-8")
+    print(f"✓ fingerprinted {len(assets)} assets (brotli={'on' if brotli else 'off'})")
+    return {rel: e["file"] for rel, e in assets.items()}
+
+# ---------- offline precache (service worker) ----------
+PRECACHE_MANIFEST = DOCS / "precache-manifest.json"
+SERVICE_WORKER_SRC = STATIC / "service-worker.js"
+SERVICE_WORKER_OUT = DOCS / "service-worker.js"  # ต้องอยู่ที่ root ของ docs/ ถึงคุมได้ทุกหน้า
+_SW_VERSION_LINE = re.compile(r'^const PRECACHE_VERSION = ".*";$', re.M)
+
+def write_precache(assets: dict) -> str:
+    """รายการหน้าที่ render แล้ว + asset ที่มี hash → precache-manifest.json ; คืน version"""
+    pages = [n for n in page_names() if (DOCS / n).exists()]
+    h = hashlib.sha256()
+    for name in pages:
+        h.update(f"{name}\0{_sha((DOCS / name).read_bytes())}\0".encode("utf-8"))
+    files = sorted(set(assets.values()))
+    extra = ["manifest.webmanifest"] if (STATIC / "manifest.webmanifest").exists() else []
+    for name in files + extra:
+        h.update(f"static/{name}\0".encode("utf-8"))
+    if extra:
+        h.update(_sha((STATIC / "manifest.webmanifest").read_bytes()).encode())
+    version = h.hexdigest()[:HASH_LEN]
+
+    doc = {
+        "version": version,
+        "pages": [f"./{n}" for n in pages],
+        "assets": [f"./static/{n}" for n in files + extra],
+    }
+    PRECACHE_MANIFEST.write_text(json.dumps(doc, ensure_ascii=False, indent=1), encoding="utf-8")
+
+    sw = SERVICE_WORKER_SRC.read_text(encoding="utf-8")
+    sw, n = _SW_VERSION_LINE.subn(f'const PRECACHE_VERSION = "{version}";', sw, count=1)
+    if n != 1:
+        raise RuntimeError(f"{SERVICE_WORKER_SRC}: ไม่พบบรรทัด PRECACHE_VERSION")
+    SERVICE_WORKER_OUT.write_text(sw, encoding="utf-8")
+    print(f"✓ precache {len(pages)} pages + {len(files) + len(extra)} assets (version {version})")
+    return version
+
+# ---------- incremental build ----------
+# manifest เก็บ hash ของ input แต่ละหน้า → รอบถัดไป render เฉพาะหน้าที่ input เปลี่ยน
+#   templates: {ชื่อ: {"sha": hash ของ source, "refs": extends/include/import ตรง ๆ}}
+#   pages:     {ชื่อ: hash รวมของ (builder, context, source ของทุก template ที่หน้านั้นพึ่ง)}
+MANIFEST = DOCS / ".build-manifest.json"
+MANIFEST_VERSION = 1
+DYNAMIC_REF = "*"  # {% include var %} ที่หาไม่ได้ตอน parse → ถือว่าพึ่งทุก template
+
+def _sha(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+def load_manifest() -> dict:
+    try:
+        doc = json.loads(MANIFEST.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    return doc if doc.get("version") == MANIFEST_VERSION else {}
+
+def save_manifest(doc: dict):
+    doc["version"] = MANIFEST_VERSION
+    tmp = MANIFEST.with_suffix(".tmp")
+    tmp.write_text(json.dumps(doc, ensure_ascii=False, indent=1, sort_keys=True), encoding="utf-8")
+    os.replace(tmp, MANIFEST)
+
+def scan_templates(previous: dict) -> dict:
+    """hash ทุก template + refs ตรง ๆ (parse ใหม่เฉพาะไฟล์ที่ hash เปลี่ยน)"""
+    out = {}
+    for p in sorted(TPL.rglob("*.html")):
+        name = p.relative_to(TPL).as_posix()
+        src = p.read_bytes()
+        sha = _sha(src)
+        old = previous.get(name)
+        if old and old.get("sha") == sha:
+            out[name] = old
+            continue
+        refs = set()
+        try:
+            ast = env.parse(src.decode("utf-8"), name=name)
+            for ref in meta.find_referenced_templates(ast):
+                refs.add(DYNAMIC_REF if ref is None else ref)
+        except Exception:
+            refs.add(DYNAMIC_REF)  # parse ไม่ผ่าน → ให้ render ใหม่เสมอเมื่ออะไรเปลี่ยน
+        out[name] = {"sha": sha, "refs": sorted(refs)}
+    return out
+
+def template_closure(name: str, templates: dict) -> set:
+    """ทุก template ที่ name พึ่ง (รวมตัวเอง) ตาม extends/include/import"""
+    seen, stack = set(), [name]
+    while stack:
+        cur = stack.pop()
+        if cur in seen:
+            continue
+        seen.add(cur)
+        for ref in templates.get(cur, {}).get("refs", ()):
+            if ref == DYNAMIC_REF:
+                return set(templates)
+            stack.append(ref)
+    return seen
+
+def page_key(name: str, update_date_str: str, templates: dict, builder_sha: str,
+             backend: str = "template", assets=None):
+    """hash ของทุก input ของหน้า (None = ต้อง render ใหม่เสมอ: หน้าจาก route ขึ้นกับโค้ด Python)"""
+    if backend == "route" and name in ROUTE_PAGES:
+        return None
+    h = hashlib.sha256(builder_sha.encode())
+    ctx = page_context(name, update_date_str)
+    h.update(json.dumps(ctx, sort_keys=True, ensure_ascii=False, default=str).encode("utf-8"))
+    h.update(json.dumps(assets or {}, sort_keys=True).encode("utf-8"))
+    for dep in sorted(template_closure(name, templates)):
+        h.update(f"\0{dep}\0{templates.get(dep, {}).get('sha', 'missing')}".encode("utf-8"))
+    return h.hexdigest()
+
+def page_names():
+    for p in sorted(TPL.glob("*.html")):
+        name = p.name
+        if name == "base.html" or name.startswith("_"):
+            continue
+        yield name
+
+def render_pages(names, update_date_str: str, jobs: int, backend: str = "template") -> dict:
+    """render หลายหน้า (ขนานถ้ามีหลายหน้า) → {ชื่อ: error หรือ None}"""
+    if jobs <= 1 or len(names) <= 1:
+        return {n: _render_job(n, update_date_str, backend) for n in names}
+    assets = dict(ASSETS)
+    with ProcessPoolExecutor(max_workers=min(jobs, len(names))) as pool:
+        futs = {n: pool.submit(_render_job, n, update_date_str, backend, assets) for n in names}
+        return {n: f.result() for n, f in futs.items()}
+
 def copy_static():
+    """คัดลอก static/ → docs/static/ เฉพาะไฟล์ที่ขนาด/mtime ต่างจากปลายทาง (copy2 เก็บ mtime ไว้ให้)"""
     dst = DOCS / "static"
     dst.mkdir(parents=True, exist_ok=True)
+    (DOCS / ".nojekyll").touch()
+    copied = 0
 
     if STATIC.exists():
         for p in STATIC.rglob("*"):
             to = dst / p.relative_to(STATIC)
             if p.is_dir():
                 to.mkdir(parents=True, exist_ok=True)
-            else:
-                to.parent.mkdir(parents=True, exist_ok=True)
-                shutil.copy2(p, to)
+                continue
+            st = p.stat()
+            try:
+                dt = to.stat()
+                if dt.st_size == st.st_size and dt.st_mtime_ns == st.st_mtime_ns:
+                    continue
+            except FileNotFoundError:
+                pass
+            to.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copy2(p, to)
+            copied += 1
+
+    print(f"✓ static/ -> docs/static/ ({copied} changed)")
+
+def build(update_date_str: str, backend: str = "template", only=None, jobs: int = 1,
+          force: bool = False) -> dict:
+    """render หน้าที่ input เปลี่ยน + sync static → {ชื่อ: error} ของหน้าที่พัง"""
+    manifest = {} if force else load_manifest()
+    templates = scan_templates(manifest.get("templates", {}))
+    builder_sha = _sha(Path(__file__).read_bytes())
+
+    # asset ก่อน page: หน้าที่ render ต้องรู้ชื่อไฟล์ที่มี hash แล้ว
+    ASSETS.clear()
+    ASSETS.update(fingerprint_assets())
+
+    names = list(page_names())
+    if only:
+        wanted = set(only)
+        missing = wanted.difference(names)
+        if missing:
+            raise SystemExit(f"unknown page(s): {', '.join(sorted(missing))}")
+        names = [n for n in names if n in wanted]
+
+    old_pages = manifest.get("pages", {})
+    pages = {n: k for n, k in old_pages.items() if n not in names}
+    stale = []
+    for name in names:
+        key = page_key(name, update_date_str, templates, builder_sha, backend, ASSETS)
+        if key is None or old_pages.get(name) != key or not (DOCS / name).exists():
+            stale.append(name)
+        if key is not None:
+            pages[name] = key
+
+    errors = render_pages(stale, update_date_str, jobs, backend)
+    failed = {n: e for n, e in errors.items() if e is not None}
+    for name, err in failed.items():
+        print(f"✗ skip {name} : {err}")
+        pages.pop(name, None)  # ไม่บันทึก → รอบหน้าลองใหม่
 
-    print("✓ static/ -> docs/static/")
+    copy_static()
+    write_precache(ASSETS)
+    save_manifest({"templates": templates, "pages": pages})
+    print(f"Built docs/ ✅ (backend={backend}, update_date={update_date_str}, "
+          f"rendered {len(stale) - len(failed)}/{len(names)}, failed {len(failed)})")
+    return failed
 
-def main():
+def main(argv=None):
     parser = argparse.ArgumentParser()
+    parser.add_argument("pages", nargs="*",
+                        help="เฉพาะบางหน้า เช่น amikin.html (default = ทุกหน้าใน templates/)")
     parser.add_argument("--update-date", dest="update_date", default=None,
                         help='Override update date shown in footer, e.g. "2025-12-01" or "2025-12-01 18:30"')
-    args = parser.parse_args()
+    parser.add_argument("--backend", choices=sorted(BACKENDS), default="template",
+                        help="template = render ตรงจาก templates/ (เจ้าของ docs/) ; "
+                             "route = ดึงจาก Flask route (ROUTE_PAGES) ไว้เทียบ/debug")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1,
+                        help="จำนวน process ที่ใช้ render (default = จำนวน core)")
+    parser.add_argument("--force", action="store_true",
+                        help="render ทุกหน้าใหม่ ไม่สน manifest")
+    args = parser.parse_args(argv)
 
     update_date_str = pick_update_date(args.update_date)
-
-    for p in sorted(TPL.glob("*.html")):
-        name = p.name
-        if name == "base.html" or name.startswith("_"):
-            continue
-        try:
-            render_one(name, update_date_str)
-        except Exception as e:
-            print(f"✗ skip {name} : {e!r}")
-
-    copy_static()
-    print(f"Built docs/ from templates ✅ (update_date={update_date_str})")
+    failed = build(update_date_str, backend=args.backend, only=args.pages, jobs=args.jobs, force=args.force)
+    if failed:
+        # ให้ CI / script ที่เรียกรู้ว่ามีหน้าที่ build ไม่ผ่าน (docs/ ยังเป็นของเดิมสำหรับหน้านั้น)
+        raise SystemExit(f"build failed: {', '.join(sorted(failed))}")
 
 if __name__ == "__main__":
     main()
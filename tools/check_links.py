@@ -1,29 +1,54 @@
-cat > tools/check_links.py <<'PY'
 #!/usr/bin/env python3
+# tools/check_links.py
+"""
+ตรวจลิงก์ภายในของเว็บที่ build แล้ว (default: docs/)
+
+- parse HTML หลายไฟล์พร้อมกันใน process pool
+- cache ผล parse ไว้ที่ .cache/check_links.json (key = sha256 ของไฟล์) → หน้าที่ไม่เปลี่ยนไม่ต้อง parse ใหม่
+- เช็คไฟล์ปลายทางแบบ memoize (ลิงก์ซ้ำ ๆ ไปไฟล์เดียวกันไม่ stat ซ้ำ)
+- เช็ค #fragment กับ id/name ที่หน้าปลายทางมีจริง
+- --report out.json = รายงานแบบ machine-readable
+
+exit code 1 ถ้ามีลิงก์/fragment หาย (เหมาะกับ CI)
+"""
+import argparse
+import hashlib
+import json
 import os
 import sys
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 from html.parser import HTMLParser
-from urllib.parse import urlsplit
+from urllib.parse import unquote, urlsplit
 
 IGNORE_SCHEMES = {"http", "https", "mailto", "tel", "data", "javascript"}
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CACHE_FILE = os.path.join(ROOT, ".cache", "check_links.json")
+CACHE_VERSION = 1
 
 class LinkParser(HTMLParser):
+    # tags ที่มักมีลิงก์ไฟล์
+    WANT = {
+        "a": "href",
+        "link": "href",
+        "script": "src",
+        "img": "src",
+        "source": "src",
+    }
+
     def __init__(self):
         super().__init__()
         self.links = []  # (tag, attr, value, lineno)
+        self.ids = set()
 
     def handle_starttag(self, tag, attrs):
-        # tags ที่มักมีลิงก์ไฟล์
-        want = {
-            "a": "href",
-            "link": "href",
-            "script": "src",
-            "img": "src",
-            "source": "src",
-        }
-        if tag not in want:
+        for k, v in attrs:
+            if v and (k == "id" or (k == "name" and tag == "a")):
+                self.ids.add(v.strip())
+
+        attr_name = self.WANT.get(tag)
+        if attr_name is None:
             return
-        attr_name = want[tag]
         for k, v in attrs:
             if k == attr_name and v:
                 self.links.append((tag, attr_name, v.strip(), self.getpos()[0]))
@@ -41,25 +66,21 @@ def is_ignored(url: str) -> bool:
     u = url.strip()
     if not u:
         return True
-    if u.startswith("#"):
-        return True
     parts = urlsplit(u)
     if parts.scheme and parts.scheme.lower() in IGNORE_SCHEMES:
         return True
     return False
 
-def clean_target(url: str) -> str:
-    # ตัด query/fragment ออก เหลือเฉพาะ path
-    parts = urlsplit(url.strip())
-    path = parts.path or ""
-    return path
-
 def resolve_to_fs(source_file: str, href: str, root_dir: str) -> str | None:
+    """ลิงก์ → path ของไฟล์ปลายทาง (None = ไม่ต้องเช็ค ; ลิงก์ #frag ล้วน → source_file เอง)"""
     if is_ignored(href):
         return None
 
-    path = clean_target(href)
-    if not path or path == "/":
+    # ตัด query/fragment ออก เหลือเฉพาะ path
+    path = unquote(urlsplit(href.strip()).path or "")
+    if not path:
+        return source_file if href.strip().startswith("#") else None
+    if path == "/":
         return None
 
     # absolute path แบบ "/xxx" ใน GH Pages = อิง root_dir
@@ -68,77 +89,180 @@ def resolve_to_fs(source_file: str, href: str, root_dir: str) -> str | None:
     else:
         fs = os.path.join(os.path.dirname(source_file), path)
 
-    fs = os.path.normpath(fs)
-
     # ถ้าลิงก์ลงท้ายด้วย "/" ให้ตีความเป็น index.html
-    if fs.endswith(os.sep):
+    if path.endswith("/"):
         fs = os.path.join(fs, "index.html")
 
-    return fs
+    return os.path.normpath(fs)
 
-def main():
-    if len(sys.argv) < 2:
-        print("Usage: python tools/check_links.py <docs_or_file_path>")
-        sys.exit(2)
+def fragment_of(href: str) -> str:
+    frag = unquote(urlsplit(href.strip()).fragment or "")
+    # "#" เปล่า ๆ / "#!" / "#top" = ลิงก์ที่ browser จัดการเอง
+    return "" if frag in ("", "!", "top") else frag
 
-    target = sys.argv[1]
-    target_abs = os.path.abspath(target)
+@lru_cache(maxsize=None)
+def _isdir(path: str) -> bool:
+    return os.path.isdir(path)
 
-    # root_dir: ถ้าส่งไฟล์มา ให้ใช้โฟลเดอร์เดียวกับไฟล์เป็น root; ถ้าส่งโฟลเดอร์มา ใช้โฟลเดอร์นั้น
-    root_dir = os.path.dirname(target_abs) if os.path.isfile(target_abs) else target_abs
+@lru_cache(maxsize=None)
+def _exists(path: str) -> bool:
+    return os.path.exists(path)
 
-    html_files = sorted(set(iter_html_files(target_abs)))
-    internal_links = 0
-    missing = []  # (src, lineno, href, resolved_fs)
+def target_file(fs: str) -> str:
+    # ถ้าลิงก์ชี้ไปโฟลเดอร์ ให้ใช้ index.html ในโฟลเดอร์นั้น
+    return os.path.join(fs, "index.html") if _isdir(fs) else fs
+
+def parse_file(path: str) -> dict:
+    """งานใน process pool: อ่าน + parse 1 ไฟล์"""
+    try:
+        with open(path, "rb") as fp:
+            data = fp.read()
+    except OSError as e:
+        return {"error": f"[READ_ERROR] {e}"}
+    p = LinkParser()
+    p.feed(data.decode("utf-8", errors="replace"))
+    return {
+        "sha": hashlib.sha256(data).hexdigest(),
+        "ids": sorted(p.ids),
+        "links": p.links,
+    }
 
+def _file_sha(path: str) -> str | None:
+    try:
+        with open(path, "rb") as fp:
+            return hashlib.sha256(fp.read()).hexdigest()
+    except OSError:
+        return None
+
+def load_cache() -> dict:
+    try:
+        with open(CACHE_FILE, encoding="utf-8") as fp:
+            doc = json.load(fp)
+    except (OSError, ValueError):
+        return {}
+    return doc.get("files", {}) if doc.get("version") == CACHE_VERSION else {}
+
+def save_cache(files: dict):
+    os.makedirs(os.path.dirname(CACHE_FILE), exist_ok=True)
+    tmp = CACHE_FILE + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as fp:
+        json.dump({"version": CACHE_VERSION, "files": files}, fp, ensure_ascii=False)
+    os.replace(tmp, CACHE_FILE)
+
+def parse_all(html_files, jobs: int, use_cache: bool = True):
+    """→ ({path: parsed}, จำนวนที่ parse ใหม่) ; ไฟล์ที่ sha ตรงกับ cache ใช้ผลเดิม"""
+    cache = load_cache() if use_cache else {}
+    parsed, todo = {}, []
     for f in html_files:
-        try:
-            with open(f, "r", encoding="utf-8", errors="replace") as fp:
-                content = fp.read()
-        except Exception as e:
-            missing.append((f, 0, f"[READ_ERROR] {e}", ""))
-            continue
+        hit = cache.get(f)
+        if hit is not None and hit.get("sha") == _file_sha(f):
+            parsed[f] = hit
+        else:
+            todo.append(f)
 
-        p = LinkParser()
-        p.feed(content)
+    if jobs > 1 and len(todo) > 1:
+        with ProcessPoolExecutor(max_workers=min(jobs, len(todo))) as pool:
+            for f, res in zip(todo, pool.map(parse_file, todo, chunksize=8)):
+                parsed[f] = res
+    else:
+        for f in todo:
+            parsed[f] = parse_file(f)
+
+    if use_cache:
+        save_cache({f: r for f, r in parsed.items() if "error" not in r})
+    return parsed, len(todo)
 
-        for tag, attr, href, lineno in p.links:
-            fs = resolve_to_fs(f, href, root_dir)
+def check(parsed: dict, root_dir: str, check_fragments: bool = True) -> dict:
+    missing = []    # ไฟล์ปลายทางไม่มี
+    fragments = []  # ไฟล์มี แต่ไม่มี id ตาม #fragment
+    internal_links = 0
+    ids = {f: set(r.get("ids", ())) for f, r in parsed.items()}
+
+    for src, res in parsed.items():
+        if "error" in res:
+            missing.append({"source": src, "line": 0, "href": res["error"], "expected": ""})
+            continue
+        for tag, attr, href, lineno in res["links"]:
+            fs = resolve_to_fs(src, href, root_dir)
             if fs is None:
                 continue
 
             internal_links += 1
+            fs = target_file(fs)
+            if not _exists(fs):
+                missing.append({"source": src, "line": lineno, "href": href, "expected": fs})
+                continue
+
+            frag = fragment_of(href) if check_fragments else ""
+            # เช็ค fragment เฉพาะปลายทางที่เป็นหน้า HTML ที่สแกนอยู่
+            if frag and fs in ids and frag not in ids[fs]:
+                fragments.append({"source": src, "line": lineno, "href": href, "fragment": frag})
+
+    return {"internal_links": internal_links, "missing": missing, "missing_fragments": fragments}
+
+def _rel(path: str, root_dir: str) -> str:
+    return os.path.relpath(path, root_dir) if path else path
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="ตรวจลิงก์ภายในของ docs/ (หรือไฟล์/โฟลเดอร์ที่ระบุ)")
+    parser.add_argument("target", nargs="?", default=os.path.join(ROOT, "docs"))
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--report", help="เขียนผลเป็น JSON ที่ path นี้")
+    parser.add_argument("--no-cache", action="store_true", help="parse ทุกไฟล์ใหม่")
+    parser.add_argument("--no-fragments", action="store_true", help="ไม่เช็ค #fragment")
+    args = parser.parse_args(argv)
 
-            # ถ้าลิงก์ชี้ไปโฟลเดอร์ที่มี index.html หรือไฟล์จริง
-            if os.path.isdir(fs):
-                fs2 = os.path.join(fs, "index.html")
-                if not os.path.exists(fs2):
-                    missing.append((f, lineno, href, fs2))
-            else:
-                if not os.path.exists(fs):
-                    missing.append((f, lineno, href, fs))
+    target_abs = os.path.abspath(args.target)
+    if not os.path.exists(target_abs):
+        print(f"not found: {args.target}")
+        return 2
+
+    # root_dir: ถ้าส่งไฟล์มา ให้ใช้โฟลเดอร์เดียวกับไฟล์เป็น root; ถ้าส่งโฟลเดอร์มา ใช้โฟลเดอร์นั้น
+    root_dir = os.path.dirname(target_abs) if os.path.isfile(target_abs) else target_abs
+
+    html_files = sorted(set(iter_html_files(target_abs)))
+    parsed, reparsed = parse_all(html_files, args.jobs, use_cache=not args.no_cache)
+    result = check(parsed, root_dir, check_fragments=not args.no_fragments)
+    missing, fragments = result["missing"], result["missing_fragments"]
 
     # Summary
     print("\n=== SUMMARY ===")
-    print(f"HTML files scanned    : {len(html_files)}")
-    print(f"Internal links found  : {internal_links}")
+    print(f"HTML files scanned    : {len(html_files)} (parsed {reparsed}, cached {len(html_files) - reparsed})")
+    print(f"Internal links found  : {result['internal_links']}")
     print(f"Missing targets       : {len(missing)}")
+    print(f"Missing fragments     : {len(fragments)}")
 
     if missing:
         print("\n=== MISSING (first 60) ===")
-        for i, (src, lineno, href, fs) in enumerate(missing[:60], 1):
-            rel_src = os.path.relpath(src, root_dir)
-            rel_fs = os.path.relpath(fs, root_dir) if fs else fs
-            print(f"{i:02d}. {rel_src}:{lineno} -> {href}  [expected: {rel_fs}]")
-
+        for i, m in enumerate(missing[:60], 1):
+            print(f"{i:02d}. {_rel(m['source'], root_dir)}:{m['line']} -> {m['href']}  "
+                  f"[expected: {_rel(m['expected'], root_dir)}]")
         if len(missing) > 60:
             print(f"... and {len(missing) - 60} more")
 
+    if fragments:
+        print("\n=== MISSING FRAGMENTS (first 60) ===")
+        for i, m in enumerate(fragments[:60], 1):
+            print(f"{i:02d}. {_rel(m['source'], root_dir)}:{m['line']} -> {m['href']}  [no id=\"{m['fragment']}\"]")
+        if len(fragments) > 60:
+            print(f"... and {len(fragments) - 60} more")
+
+    if args.report:
+        report = {
+            "root": root_dir,
+            "files": len(html_files),
+            "parsed": reparsed,
+            "cached": len(html_files) - reparsed,
+            "internal_links": result["internal_links"],
+            "missing": [dict(m, source=_rel(m["source"], root_dir), expected=_rel(m["expected"], root_dir))
+                        for m in missing],
+            "missing_fragments": [dict(m, source=_rel(m["source"], root_dir)) for m in fragments],
+        }
+        with open(args.report, "w", encoding="utf-8") as fp:
+            json.dump(report, fp, ensure_ascii=False, indent=2)
+
     # exit code: มี missing ให้เป็น 1 (เหมาะกับ CI)
-    sys.exit(1 if missing else 0)
+    return 1 if (missing or fragments) else 0
 
 if __name__ == "__main__":
-    main()
-PY
-
-chmod +x tools/check_links.py
+    sys.exit(main())
@@ -121,8 +121,9 @@ inject = r'''
     hd.textContent = "Notes / ข้อสรุปเชิงปฏิบัติ";
     box.appendChild(hd);
 
-    const en = (row && row.summary_en) || "";
-    const th = (row && row.summary_th) || "";
+    // shard ใหม่มีแค่ note_* (summary_* มาจาก build_static_compat.py รุ่นเดิม)
+    const en = (row && (row.summary_en || row.note_en)) || "";
+    const th = (row && (row.summary_th || row.note_th)) || "";
     const ref = (row && row.reference) || "";
 
     if (en){
@@ -165,15 +166,10 @@ inject = r'''
     const params = new URLSearchParams(location.search);
     const drugA = params.get("drug_a") || "";
     const drugB = params.get("drug_b") || "";
-    const a = normDrug(drugA);
-    const b = normDrug(drugB);
-    const k1 = a + "|" + b;
-    const k2 = b + "|" + a;
 
     try{
-      const res = await fetch("./static/compat_lookup.json?x=" + Date.now(), { cache: "no-store" });
-      const lookup = await res.json();
-      const row = lookup[k1] || lookup[k2];
+      // ตัวอ่านเดียวกับหน้า result (static/app.js → static/compat/index.json + notes shard)
+      const row = await window.NMCCompat.lookup(normDrug(drugA), normDrug(drugB));
 
       const code = (row && row.status ? String(row.status).toUpperCase() : "ND");
 